@@ -0,0 +1,61 @@
+"""
+Branch switch throughput: per-entry get_blob + decompress vs the batched,
+streaming checkout.
+
+  python benchmark/bench_checkout.py --files 100000
+"""
+
+import argparse
+import contextlib
+from unittest.mock import patch
+
+from common import measure, temporary_repository, write_files
+
+from database.entity.index_entry import IndexEntry
+from repository.repository import Repository
+
+
+def per_entry_checkout(self: Repository, entries: list[IndexEntry]):
+    """The checkout write loop before batching"""
+    for entry in entries:
+        blob = self.database.get_blob(entry.object_id)
+        assert blob is not None and blob.data is not None
+        path = self.worktree.write(entry, self.compress_file.decompress(blob.data))
+        self.convert.apply_stat(entry, path.stat())
+
+
+def bench(files: int, per_entry: bool):
+    with temporary_repository() as (repository, root):
+        (root / "base.txt").write_text("base\n")
+        repository.add_index(["."])
+        repository.commit("base")
+        repository.create_branch("files")
+        repository.checkout("files")
+        write_files(root, files, size=1024)
+        repository.add_index(["."])
+        repository.commit("files")
+        repository.checkout("main")
+
+        label = "per-entry" if per_entry else "batched"
+        checkout = (
+            patch.object(Repository, "_checkout_entries", per_entry_checkout)
+            if per_entry
+            else contextlib.nullcontext()
+        )
+        with checkout:
+            with measure(f"{label}: checkout {files} files", files, "files"):
+                result = repository.checkout("files")
+        assert result.success, result.error
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    args = parser.parse_args()
+
+    bench(args.files, per_entry=False)
+    bench(args.files, per_entry=True)
+
+
+if __name__ == "__main__":
+    main()
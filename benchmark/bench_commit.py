@@ -0,0 +1,52 @@
+"""
+Commit throughput with and without the single-transaction unit of work.
+
+  python benchmark/bench_commit.py --files 10000 --commits 20
+
+`--autocommit` replays the old behaviour where every statement is its own
+transaction, so both numbers can be compared on the same machine.
+"""
+
+import argparse
+import contextlib
+from unittest.mock import patch
+
+from common import measure, temporary_repository, write_files
+
+from database.sqlite import SQLite
+
+
+def bench(files: int, commits: int, autocommit: bool):
+    with temporary_repository() as (repository, root):
+        paths = write_files(root, files)
+        repository.add_index(["."])
+        repository.commit("initial commit")
+
+        label = "autocommit" if autocommit else "transaction"
+        transaction = (
+            patch.object(SQLite, "transaction", lambda self: contextlib.nullcontext())
+            if autocommit
+            else contextlib.nullcontext()
+        )
+        with transaction:
+            with measure(f"{label}: {commits} commits / {files} files", commits):
+                for i in range(commits):
+                    changed = paths[(i * 97) % len(paths) :][:10]
+                    for path in changed:
+                        path.write_text(f"commit {i}\n")
+                    repository.add_index([p.relative_to(root).as_posix() for p in changed])
+                    repository.commit(f"commit {i}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--commits", type=int, default=20)
+    args = parser.parse_args()
+
+    bench(args.files, args.commits, autocommit=True)
+    bench(args.files, args.commits, autocommit=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Commit latency by number of changed files: bulk insert-or-ignore of tree
+entries vs one SELECT and one INSERT per entry.
+
+  python benchmark/bench_commit_latency.py --files 20000 --changed 1 10 100 1000 10000
+
+Only `commit` is timed; the changed files are staged beforehand. The
+per-entry variant replays the old TreeStore.save_commit_tree.
+"""
+
+import argparse
+import contextlib
+from unittest.mock import patch
+
+from common import measure, temporary_repository, write_files
+
+from repository.tree_store import TreeStore
+
+
+def per_entry_save_commit_tree(self: TreeStore, tree_entries):
+    root_tree = [entry for entry in tree_entries if entry.entry_name == "."][0]
+    if self.database.get_root_tree_entry(root_tree.entry_object_id) is not None:
+        return root_tree
+    for entry in tree_entries:
+        data = {
+            "entry_object_id": entry.entry_object_id,
+            "tree_id": entry.tree_id,
+            "entry_type": entry.entry_type,
+            "entry_name": entry.entry_name,
+        }
+        if self.database.get_tree_entry(data) is None:
+            self.database.create_tree_entry(entry)
+    return root_tree
+
+
+def bench(files: int, changed_counts: list[int], per_entry: bool):
+    label = "per-entry" if per_entry else "bulk"
+    save = (
+        patch.object(TreeStore, "save_commit_tree", per_entry_save_commit_tree)
+        if per_entry
+        else contextlib.nullcontext()
+    )
+    with temporary_repository() as (repository, root), save:
+        paths = write_files(root, files)
+        repository.add_index(["."])
+        repository.commit("initial commit")
+
+        for i, count in enumerate(changed_counts):
+            # spread the changes over as many directories as possible
+            step = max(1, len(paths) // count)
+            changed = paths[::step][:count]
+            for path in changed:
+                path.write_text(f"commit {i}\n")
+            for start in range(0, len(changed), 500):
+                repository.add_index(
+                    [p.relative_to(root).as_posix() for p in changed[start : start + 500]]
+                )
+            with measure(f"{label}: commit {count} changed / {files} files"):
+                assert repository.commit(f"commit {i}") is not None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument(
+        "--changed", type=int, nargs="+", default=[1, 10, 100, 1000, 10_000]
+    )
+    args = parser.parse_args()
+
+    bench(args.files, args.changed, per_entry=True)
+    bench(args.files, args.changed, per_entry=False)
+
+
+if __name__ == "__main__":
+    main()
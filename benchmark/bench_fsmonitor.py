@@ -0,0 +1,52 @@
+"""
+status with and without the fsmonitor daemon when few files changed.
+
+  python benchmark/bench_fsmonitor.py --files 1000000 --changed 10
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from common import measure, temporary_repository, write_files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+
+    with temporary_repository() as (repository, root):
+        paths = write_files(root, args.files, size=64)
+        # age the files past the racy window so the full walk uses the stat cache
+        an_hour_ago = time.time_ns() - 3600 * 1_000_000_000
+        for path in paths:
+            os.utime(path, ns=(an_hour_ago, an_hour_ago))
+        repository.add_index(["."])
+
+        with measure(f"status, full walk, {args.files} files"):
+            repository.status()
+
+        stop = threading.Event()
+        daemon = threading.Thread(target=repository.fsmonitor.run, args=(stop,))
+        daemon.start()
+        try:
+            while not repository.fsmonitor.is_running():
+                time.sleep(0.01)
+            repository.status()
+
+            for path in paths[: args.changed]:
+                path.write_text("changed\n")
+            with measure(f"status, fsmonitor, {args.changed} changed"):
+                result = repository.status()
+            assert result.value is not None
+            assert len(result.value.unstaged.modified) == args.changed
+        finally:
+            stop.set()
+            daemon.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Index load time of the SQLite table and the memory-mapped index file.
+
+  python benchmark/bench_index.py --entries 1000000
+
+Both backends hold the same synthetic entries. Loading the file maps it and
+verifies its checksum; entries are only decoded when they are looked up, so
+the full listing is measured separately.
+"""
+
+import argparse
+
+from common import measure, temporary_repository
+
+from database.entity.index_entry import IndexEntry
+from repository.index_file import IndexFile
+
+
+def make_entries(count: int, per_dir: int = 100) -> list[IndexEntry]:
+    return [
+        IndexEntry(
+            path=f"./dir{i // per_dir:06d}/file{i:07d}.txt",
+            object_id=f"{i:040x}",
+            mode="0o100644",
+            size=i,
+            mtime_ns=1_700_000_000_000_000_000 + i,
+            ctime_ns=1_700_000_000_000_000_000 + i,
+            inode=i,
+            dev=2049,
+        )
+        for i in range(count)
+    ]
+
+
+def bench(count: int):
+    with temporary_repository() as (repository, root):
+        entries = make_entries(count)
+        with repository.database.transaction():
+            repository.database.create_index_entries(entries)
+        index_file = IndexFile(root / ".gitoy" / "index")
+        with measure(f"file: write {count} entries"):
+            index_file.write(entries)
+        del entries
+
+        with measure(f"sqlite: load {count} entries"):
+            repository.database.list_index_entries()
+
+        with measure(f"file: load {count} entries"):
+            snapshot = index_file.load()
+        with measure(f"file: decode {count} entries"):
+            list(snapshot)
+
+        path = f"./dir{count // 200:06d}/file{count // 2:07d}.txt"
+        with measure("sqlite: look up one path"):
+            repository.database.list_index_entries_by_paths([path])
+        with measure("file: load and look up one path"):
+            index_file.load().find(path)
+
+        directory = f"./dir{count // 200:06d}/"
+        with measure("sqlite: list one directory"):
+            repository.database.list_index_entries_by_paths_startwith([directory])
+        with measure("file: load and list one directory"):
+            list(index_file.load().iter_prefix(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    bench(args.entries)
+
+
+if __name__ == "__main__":
+    main()
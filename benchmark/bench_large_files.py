@@ -0,0 +1,83 @@
+"""
+Throughput and peak memory of hashing, compressing and adding large files.
+
+  python benchmark/bench_large_files.py --sizes 1 4 20
+
+Writes one file per size in GiB, half random and half zero bytes so it
+compresses about 2:1, then measures the streaming hash, the streaming
+compression and `add` (hash + compression into blob parts) in MB/s, and
+finally restores the file from its blob parts with `checkout`. Peak RSS is
+the process high-water mark after each step. The page cache is not dropped,
+so files that fit in memory are read from cache.
+"""
+
+import argparse
+import os
+import resource
+from pathlib import Path
+
+from common import measure, temporary_repository
+
+from repository.compress_file import CompressFile
+from repository.hash_file import HashFile
+
+BLOCK = 1024 * 1024
+
+
+def write_large_file(path: Path, size: int) -> None:
+    with open(path, "wb") as f:
+        for _ in range(size // BLOCK):
+            f.write(os.urandom(BLOCK // 2))
+            f.write(bytes(BLOCK // 2))
+
+
+def peak_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    for gib in args.sizes:
+        size = int(gib * 1024**3) // BLOCK * BLOCK
+        megabytes = size / 1_000_000
+        with temporary_repository() as (repository, root):
+            path = root / "large.bin"
+            write_large_file(path, size)
+            hash_file: HashFile = repository.hash_file
+            compress_file: CompressFile = repository.compress_file
+            print(f"{gib:g} GiB file, peak RSS {peak_rss_mib():.0f} MiB")
+
+            with measure("hash_stream", int(megabytes), "MB"):
+                object_id = hash_file.hash_stream(path)
+            print(f"  peak RSS {peak_rss_mib():.0f} MiB")
+
+            compressed = 0
+            with measure("compress_stream", int(megabytes), "MB"):
+                for chunk in compress_file.compress_stream(path):
+                    compressed += len(chunk)
+            print(f"  {compressed / size:.2f} ratio, peak RSS {peak_rss_mib():.0f} MiB")
+
+            with measure("add", int(megabytes), "MB"):
+                assert repository.add_index([path.name]).success
+            assert repository.index_store.find_by_paths([path.name])[0].object_id == (
+                object_id
+            )
+            print(f"  peak RSS {peak_rss_mib():.0f} MiB")
+
+            assert repository.commit("large file") is not None
+            repository.create_branch("without")
+            assert repository.checkout("without").success
+            path.unlink()
+            assert repository.add_index(["."]).success
+            assert repository.commit("remove large file") is not None
+            with measure("checkout", int(megabytes), "MB"):
+                assert repository.checkout("main").success
+            assert path.stat().st_size == size
+            print(f"  peak RSS {peak_rss_mib():.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Path-limited log over a long history, with and without changed-path filters.
+
+  python benchmark/bench_log_path.py --commits 5000
+
+Every commit changes one of `--files` files in directories of 50. The log of
+a single file is measured with the Bloom filters written at commit time, and
+again after dropping them, when each commit's trees must be compared.
+"""
+
+import argparse
+import random
+
+from common import measure, temporary_repository
+
+from database.entity.index_entry import IndexEntry
+
+
+def make_history(repository, commits: int, files: int) -> None:
+    database = repository.database
+    paths = [f"./dir{i // 50:04d}/file{i:06d}.txt" for i in range(files)]
+    with database.transaction():
+        database.create_index_entries(
+            [IndexEntry(path, f"{0:040x}", "100644") for path in paths]
+        )
+    repository.commit("initial")
+    rng = random.Random(0)
+    for i in range(1, commits):
+        entry = IndexEntry(rng.choice(paths), f"{i:040x}", "100644")
+        database.delete_index_entries([entry])
+        database.create_index_entries([entry])
+        repository.commit(f"commit {i}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=1000)
+    args = parser.parse_args()
+
+    with temporary_repository() as (repository, _):
+        with measure(f"build: {args.commits} commits", args.commits, "commits"):
+            make_history(repository, args.commits, args.files)
+
+        path = "./dir0000/file000000.txt"
+        store = repository.commit_store
+        head = repository.get_head_branch().target_object_id
+        store.commit_graph.load()
+
+        with measure("log --path with changed-path filters"):
+            with_filters = list(store.iter_commit_logs(head, path=path))
+        repository.database.delete_commit_blooms()
+        with measure("log --path comparing trees"):
+            without_filters = list(store.iter_commit_logs(head, path=path))
+        assert with_filters == without_filters
+        print(f"{len(with_filters)} of {args.commits} commits changed {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Merge base of two long branches: commit-graph walk vs per-commit queries.
+
+  python benchmark/bench_merge_base.py --commits 100000
+
+Two branches of `--commits` commits each grow from a common root. The
+per-commit variant replays the walk that asked SQLite for the parents of
+every commit it visited.
+"""
+
+import argparse
+import collections
+import heapq
+
+from common import measure, temporary_repository
+
+from database.database import Database
+from database.entity.commit import Commit
+from database.entity.commit_parent import CommitParent
+from database.entity.entity import Entity
+from repository.commit_graph import CommitGraph
+
+
+def make_history(database: Database, length: int) -> tuple[str, str]:
+    def commit(object_id: str, generation: int) -> Commit:
+        date = "2024-01-01 00:00:00"
+        return Commit(object_id, "", "", "", date, "", "", date, "", generation, date)
+
+    # rows for SQLite.insert_many, which takes any entities
+    commits: list[Entity] = [commit("root", 0)]
+    parents: list[Entity] = []
+    tips = []
+    for branch in ("left", "right"):
+        parent = "root"
+        for i in range(1, length + 1):
+            object_id = f"{branch}{i}"
+            commits.append(commit(object_id, i))
+            parents.append(CommitParent(object_id, parent, 0))
+            parent = object_id
+        tips.append(parent)
+    with database.transaction():
+        database.sqlite.insert_many(commits)
+        database.sqlite.insert_many(parents)
+    return tips[0], tips[1]
+
+
+def sql_merge_base(database: Database, one: str, two: str):
+    flags = collections.defaultdict(int)
+    generations = {c.object_id: c.generation for c in database.list_commits([one, two])}
+    pq = [(-generations[one], one), (-generations[two], two)]
+    flags[one] |= 1
+    flags[two] |= 2
+    in_pq = {one, two}
+    while pq:
+        _, current = heapq.heappop(pq)
+        if flags[current] == 3:
+            return current
+        parent_ids = [p.parent_id for p in database.get_commit_parents(current)]
+        for parent in database.list_commits(parent_ids):
+            new_flags = flags[parent.object_id] | flags[current]
+            if new_flags != flags[parent.object_id]:
+                flags[parent.object_id] = new_flags
+                if parent.object_id not in in_pq:
+                    heapq.heappush(pq, (-parent.generation, parent.object_id))
+                    in_pq.add(parent.object_id)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with temporary_repository() as (repository, _):
+        database = repository.database
+        left, right = make_history(database, args.commits)
+
+        with measure(f"per-commit sql: {args.commits} commits apart"):
+            assert sql_merge_base(database, left, right) == "root"
+        with measure("commit-graph: build from commits"):
+            graph = CommitGraph(database).load()
+        with measure("commit-graph: load"):
+            graph = CommitGraph(database).load()
+        with measure(f"commit-graph: {args.commits} commits apart"):
+            assert graph.merge_base(left, right) == "root"
+
+
+if __name__ == "__main__":
+    main()
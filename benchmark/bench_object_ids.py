@@ -0,0 +1,105 @@
+"""
+Database size and lookup latency with hex TEXT object ids vs 20-byte keys.
+
+  python benchmark/bench_object_ids.py --objects 1000000
+
+Stores `--objects` blobs, as many tree entries (trees of 100 entries) and
+one commit per tree, measures the file size and random lookups, then
+converts the database to the binary layout and measures again.
+"""
+
+import argparse
+import hashlib
+import random
+import sqlite3
+from datetime import datetime
+
+from common import measure, temporary_repository
+
+from database.database import Database
+from database.entity.blob import Blob
+from database.entity.commit import Commit
+from database.entity.commit_parent import CommitParent
+from database.entity.tree_entry import TreeEntry
+from util.array import chunked
+
+TREE_SIZE = 100
+
+
+def sha1(value: str) -> str:
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def populate(database: Database, count: int) -> tuple[list[str], list[str], list[str]]:
+    blob_ids = [sha1(f"blob {i}") for i in range(count)]
+    tree_ids = [sha1(f"tree {i}") for i in range(count // TREE_SIZE)]
+    commit_ids = [sha1(f"commit {i}") for i in range(len(tree_ids))]
+    now = datetime.now()
+    with database.transaction():
+        for chunk in chunked(blob_ids, 10_000):
+            database.create_blobs([Blob(b, b"x" * 16, 16, now) for b in chunk])
+        for t, tree_id in enumerate(tree_ids):
+            database.create_tree_entries(
+                [TreeEntry(".", "040000", "tree", tree_id)]
+                + [
+                    TreeEntry(f"file{i}", "100644", "blob", blob_id, tree_id)
+                    for i, blob_id in enumerate(
+                        blob_ids[t * TREE_SIZE : (t + 1) * TREE_SIZE]
+                    )
+                ]
+            )
+        date = now.strftime("%Y-%m-%d %H:%M:%S")
+        for i, (commit_id, tree_id) in enumerate(zip(commit_ids, tree_ids)):
+            database.create_commit(
+                Commit(commit_id, tree_id, "", "", date, "", "", date, "", i, date)
+            )
+            if i:
+                database.create_commit_parent(
+                    CommitParent(commit_id, commit_ids[i - 1], 0)
+                )
+    return blob_ids, tree_ids, commit_ids
+
+
+def report(label: str, database: Database, ids, lookups: int):
+    database.sqlite.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    database.sqlite.execute("VACUUM")
+    path = database.sqlite.path
+    assert path is not None
+    print(f"{label}: database size {path.stat().st_size / 2**20:.1f} MiB")
+
+    blob_ids, tree_ids, commit_ids = ids
+    rng = random.Random(0)
+    sample = rng.sample(blob_ids, lookups)
+    with measure(f"{label}: {lookups} blob existence checks", lookups):
+        for object_id in sample:
+            database.list_existing_blob_ids([object_id])
+    sample = rng.sample(tree_ids, min(lookups, len(tree_ids)))
+    with measure(f"{label}: {len(sample)} tree listings", len(sample)):
+        for tree_id in sample:
+            database.get_child_tree_entries(tree_id)
+    sample = rng.sample(commit_ids, min(lookups, len(commit_ids)))
+    with measure(f"{label}: {len(sample)} commit + parent lookups", len(sample)):
+        for commit_id in sample:
+            database.get_commit(commit_id)
+            database.get_commit_parents(commit_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+    print(f"sqlite {sqlite3.sqlite_version}")
+
+    with temporary_repository() as (repository, _):
+        database = repository.database
+        with measure(f"populate {args.objects} objects"):
+            ids = populate(database, args.objects)
+        report("hex", database, ids, args.lookups)
+        with measure("convert to binary ids"):
+            database.convert_to_binary_ids()
+        report("binary", database, ids, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Commit tree loading: one recursive query vs one query per directory.
+
+  python benchmark/bench_tree_load.py --sizes 1000 10000 100000 500000
+"""
+
+import argparse
+
+from common import measure, temporary_repository
+
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from database.entity.tree_entry import TreeEntry
+from repository.tree import Tree
+
+
+def wide_path(i: int) -> str:
+    return f"./dir{i // 100:05d}/file{i}.txt"
+
+
+def deep_path(i: int) -> str:
+    # four files per directory, four sub directories per directory
+    parts = []
+    n = i // 4
+    while n:
+        n, digit = divmod(n - 1, 4)
+        parts.append(f"d{digit}")
+    return "/".join(["."] + parts[::-1] + [f"file{i}.txt"])
+
+
+def per_directory_load(database: Database, root_tree_id: str) -> Tree:
+    """The loader before the recursive query: one SELECT per directory"""
+    root_tree = database.get_root_tree_entry(root_tree_id)
+    tree = Tree(root_tree)
+    if root_tree is None:
+        return tree
+    tree.index.set(root_tree.entry_name, root_tree)
+    stack: list[tuple[str, TreeEntry]] = [(root_tree.entry_name, root_tree)]
+    while stack:
+        parent_path, parent = stack.pop()
+        assert parent.entry_object_id is not None
+        for child in database.get_child_tree_entries(parent.entry_object_id):
+            child_path = parent_path + "/" + child.entry_name
+            tree.index.set(child_path, child)
+            parent.append_child(child)
+            if child.entry_type == "tree":
+                stack.append((child_path, child))
+    return tree
+
+
+def bench(size: int, shape: str):
+    path_of = wide_path if shape == "wide" else deep_path
+    with temporary_repository() as (repository, _):
+        tree = Tree()
+        for i in range(size):
+            tree.add(IndexEntry(path_of(i), f"{i:040x}", "100644"))
+        with repository.database.transaction():
+            root = repository.tree_store.save_commit_tree(tree.build_object_ids())
+        assert root.entry_object_id is not None
+
+        with measure(f"{shape:>4} {size:>7} per-directory", size, "entries"):
+            old = per_directory_load(repository.database, root.entry_object_id)
+        with measure(f"{shape:>4} {size:>7} recursive query", size, "entries"):
+            new = repository.tree_store.build_commit_tree(root.entry_object_id)
+        assert old.entry_count == new.entry_count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for shape in ("wide", "deep"):
+            bench(size, shape)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Worktree walk: Path.rglob with per-path filtering vs the os.scandir walker.
+
+  python benchmark/bench_walk.py --files 1000000
+"""
+
+import argparse
+from pathlib import Path
+
+from common import measure, temporary_repository, write_files
+
+from repository.worktree import Worktree
+
+
+def rglob_match(worktree: Worktree, path: str) -> list[Path]:
+    """The walk before the scandir walker"""
+    repo_path = worktree.repo_path
+    _path = worktree.root_dir / repo_path.to_relative_path(path)
+    result = []
+    for p in _path.rglob("*"):
+        if repo_path.repo_dir in p.parents:
+            continue
+        if p.is_file():
+            result.append(p)
+    return [Path(repo_path.normalize_relative_path(p)) for p in result]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    args = parser.parse_args()
+
+    with temporary_repository() as (repository, root):
+        write_files(root, args.files, per_dir=args.per_dir, size=0)
+        worktree = repository.worktree
+
+        with measure(f"rglob   {args.files} files", args.files, "files"):
+            old = rglob_match(worktree, ".")
+        with measure(f"scandir {args.files} files", args.files, "files"):
+            new = [(file.path, file.stat) for file in worktree.walk(".")]
+        assert len(old) == len(new) == args.files
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+add / status throughput of the hashing worker pool by worker count.
+
+  python benchmark/bench_worker_pool.py --files 50000 --workers 1 2 4 8
+
+Each round drops the index and blobs so `add` hashes and compresses every
+file. Files are freshly written, so they are racily clean and `status`
+rehashes all of them instead of using the stat cache.
+"""
+
+import argparse
+import os
+
+from common import measure, temporary_repository, write_files
+
+from database.entity.blob import Blob
+from database.entity.index_entry import IndexEntry
+from util.worker_pool import WorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+
+    with temporary_repository() as (repository, root):
+        write_files(root, args.files, size=args.size)
+        sqlite = repository.database.sqlite
+        for workers in sorted(set(args.workers)):
+            sqlite.execute(f"DELETE FROM {IndexEntry.table_name()}")
+            repository.database.objects.execute(f"DELETE FROM {Blob.table_name()}")
+            repository.worker_pool = WorkerPool(workers)
+
+            with measure(f"add    {args.files} files, {workers} workers", args.files, "files"):
+                repository.add_index(["."])
+            with measure(f"status {args.files} files, {workers} workers", args.files, "files"):
+                result = repository.status()
+            assert result.value is not None and result.value.unstaged.is_empty()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Shared helpers for the gitoy benchmarks.
+
+Benchmarks are plain scripts run from the project root, e.g.
+
+  python benchmark/bench_commit.py --files 10000
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+src_path = Path(__file__).parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from cli import create_repository  # noqa: E402
+from repository.repo_path import RepositoryPath  # noqa: E402
+from repository.repository import Repository  # noqa: E402
+
+
+@contextmanager
+def temporary_repository():
+    """Create an initialized repository in a temp dir and chdir into it"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="gitoy-bench-") as root:
+        root_path = Path(root)
+        os.chdir(root_path)
+        try:
+            repository = create_repository(RepositoryPath(root_path))
+            repository.init()
+            yield repository, root_path
+        finally:
+            os.chdir(cwd)
+
+
+def write_files(
+    root: Path, count: int, per_dir: int = 100, size: int = 256, seed: str = ""
+) -> list[Path]:
+    """Write `count` small files spread over directories of `per_dir` files"""
+    paths = []
+    for i in range(count):
+        directory = root / f"dir{i // per_dir:05d}"
+        directory.mkdir(exist_ok=True)
+        path = directory / f"file{i:07d}.txt"
+        content = f"{seed}{i}\n".encode()
+        path.write_bytes((content * (size // len(content) + 1))[:size])
+        paths.append(path)
+    return paths
+
+
+@contextmanager
+def measure(label: str, count: int | None = None, unit: str = "ops"):
+    """Print the elapsed time (and throughput when `count` is given)"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if count:
+        print(f"{label:<40} {elapsed:10.3f}s {count / elapsed:12.1f} {unit}/s")
+    else:
+        print(f"{label:<40} {elapsed:10.3f}s")
+
+
+__all__ = [
+    "Repository",
+    "temporary_repository",
+    "write_files",
+    "measure",
+]
@@ -4,19 +4,26 @@ Gitoy CLI - A simple File Version Control CLI tool built with Python Fire
 """
 
 import fire
+import os
 import sys
 
 from repository.entry_diff import EntryDiff
 import zstandard
 
 from repository.blob_store import BlobStore
+from repository.cache_tree import CacheTree
 from repository.commit_store import CommitStore
 from repository.compress_file import CompressFile
 from repository.convert import Convert
+from repository.fsmonitor import FsMonitor
 from repository.hash_file import HashFile
+from repository.index_backend import FileIndexBackend
+from repository.index_file import IndexFile
 from repository.index_store import IndexStore
 from repository.path_validator import PathValidator
 from repository.repository import Repository
+from repository.tree_diff import TreeDiff
+from repository.tree_merge import TreeMerge
 from repository.tree_store import TreeStore
 from repository.worktree import Worktree
 from repository.repo_path import RepositoryPath
@@ -29,7 +36,18 @@ from command.status import Status
 from command.commit import Commit
 from command.log import Log
 from command.checkout import Checkout
+from command.fsmonitor import Fsmonitor
+from command.diff import Diff
+from command.merge import Merge
 from util.console import Console
+from util.constant import (
+    GITOY_INDEX_ENV,
+    GITOY_INDEX_FILE,
+    GITOY_OBJECT_IDS_ENV,
+    GITOY_OBJECTS_DB_FILE,
+    OBJECTS_DB_PRAGMAS,
+)
+from util.worker_pool import WorkerPool
 
 
 class GitoyCLI:
@@ -47,6 +65,9 @@ class GitoyCLI:
     - commit: Record changes to the Gitoy repository
     - log: Show commit logs
     - checkout: Switch branches or restore working tree files
+    - fsmonitor: Start, stop or query the filesystem monitor daemon
+    - diff: Show changes between two commits or branches
+    - merge: Join another branch into the current branch
     """
 
     def __init__(self, commands):
@@ -65,23 +86,34 @@ class GitoyCLI:
         }
 
 
-def main():
-    """Main entry point for Gitoy CLI"""
+def create_repository(repository_path: RepositoryPath) -> Repository:
+    """Wire a Repository and its collaborators for the given repository path"""
 
-    repository_path = RepositoryPath()
     repo_db_path = None
     if repository_path.repo_dir is None:
         repo_db_path = repository_path.create_repo_db_path()
     else:
         repo_db_path = repository_path.get_repo_db_path()
+    assert repo_db_path is not None
 
     sqlite = SQLite(repo_db_path)
-    database = Database(sqlite)
+    objects = SQLite(repo_db_path.with_name(GITOY_OBJECTS_DB_FILE), OBJECTS_DB_PRAGMAS)
+    binary_object_ids = os.environ.get(GITOY_OBJECT_IDS_ENV) == "binary"
+    database = Database(sqlite, binary_object_ids, objects)
+    if database.is_initialized():
+        database.migrate()
+        if binary_object_ids:
+            database.convert_to_binary_ids()
     worktree = Worktree(repository_path)
     compress_file = CompressFile(
         zstandard.ZstdCompressor(), zstandard.ZstdDecompressor()
     )
-    index_store = IndexStore(database, repository_path)
+    index_backend = None
+    if os.environ.get(GITOY_INDEX_ENV) == "file":
+        index_backend = FileIndexBackend(
+            IndexFile(repo_db_path.with_name(GITOY_INDEX_FILE)), database
+        )
+    index_store = IndexStore(database, repository_path, index_backend)
     blob_store = BlobStore(database)
     hash_file = HashFile()
     convert = Convert(hash_file, compress_file, repository_path)
@@ -89,7 +121,7 @@ def main():
     tree_store = TreeStore(database)
     commit_store = CommitStore(database)
     entry_dff = EntryDiff()
-    repository = Repository(
+    return Repository(
         database,
         repository_path,
         worktree,
@@ -102,7 +134,18 @@ def main():
         tree_store,
         commit_store,
         entry_dff,
+        TreeDiff(database),
+        CacheTree(database),
+        WorkerPool.from_env(),
+        FsMonitor(repository_path),
+        TreeMerge(database),
     )
+
+
+def main():
+    """Main entry point for Gitoy CLI"""
+
+    repository = create_repository(RepositoryPath())
     console = Console()
     commands = [
         Init(repository, console),
@@ -112,6 +155,9 @@ def main():
         Commit(repository, console),
         Log(repository, console),
         Checkout(repository, console),
+        Fsmonitor(repository, console),
+        Diff(repository, console),
+        Merge(repository, console),
     ]
     app = GitoyCLI(commands)
     fire.Fire(app)
@@ -1,5 +1,6 @@
 from repository.repository import Repository
 from util.console import Console
+from util.constant import ADD_BUFFER_SIZE
 
 
 class Add:
@@ -11,7 +12,7 @@ class Add:
         self._repository = repository
         self._console = console
 
-    def __call__(self, *paths: str):
-        result = self._repository.add_index(list(paths))
+    def __call__(self, *paths: str, buffer_size: int = ADD_BUFFER_SIZE):
+        result = self._repository.add_index(list(paths), buffer_size)
         if result.failed:
             self._console.error(result.error)
@@ -0,0 +1,33 @@
+from repository.repository import Repository
+from util.console import Console
+
+
+class Diff:
+    """
+    gitoy-diff - Show changes between two commits or branches
+    """
+
+    def __init__(self, repository: Repository, console: Console):
+        self._repository = repository
+        self._console = console
+
+    def __call__(self, old: str, new: str):
+        result = self._repository.diff_commits(old, new)
+        if result.failed:
+            assert result.error is not None
+            self._console.error(result.error)
+            return
+
+        assert result.value is not None
+        diff = result.value
+        worktree_path = self._repository.worktree_path
+        for entry in diff.added:
+            self._console.log(
+                f"new file: {entry.relative_path(worktree_path)}", "green"
+            )
+        for entry in diff.modified:
+            self._console.log(
+                f"modified: {entry.relative_path(worktree_path)}", "yellow"
+            )
+        for entry in diff.deleted:
+            self._console.log(f"deleted: {entry.relative_path(worktree_path)}", "red")
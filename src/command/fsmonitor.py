@@ -0,0 +1,42 @@
+from repository.repository import Repository
+from util.console import Console
+
+
+class Fsmonitor:
+    """
+    gitoy fsmonitor - Watch the worktree so status only examines changed paths
+    """
+
+    def __init__(self, repository: Repository, console: Console):
+        self._repository = repository
+        self._console = console
+
+    def __call__(self):
+        pid = self._repository.fsmonitor.get_pid()
+        if pid is None:
+            self._console.info("fsmonitor is not running")
+        else:
+            self._console.info(f"fsmonitor is running (pid {pid})")
+
+    def start(self):
+        result = self._repository.fsmonitor.start()
+        if result.failed:
+            assert result.error is not None
+            self._console.error(result.error)
+        else:
+            self._console.success(f"fsmonitor started (pid {result.value})")
+
+    def stop(self):
+        result = self._repository.fsmonitor.stop()
+        if result.failed:
+            assert result.error is not None
+            self._console.error(result.error)
+        else:
+            self._console.success("fsmonitor stopped")
+
+    def run(self):
+        """Run the daemon in the foreground"""
+        if not self._repository.is_initialized():
+            self._console.error("Not a gitoy repository")
+            return
+        self._repository.fsmonitor.run()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from repository.repository import Repository
 from util.console import Console
 
@@ -5,14 +7,23 @@ from util.console import Console
 class Log:
     """
     gitoy log - Show commit logs
+
+    gitoy log --path <path> lists only the commits that changed a file or
+    directory.
     """
 
     def __init__(self, repository: Repository, console: Console):
         self._repository = repository
         self._console = console
 
-    def __call__(self):
-        commit_logs = self._repository.log()
+    def __call__(
+        self,
+        max_count: Optional[int] = None,
+        skip: int = 0,
+        first_parent: bool = False,
+        path: Optional[str] = None,
+    ):
+        commit_logs = self._repository.log(max_count, skip, first_parent, path)
         for commit in commit_logs:
             self._console.warning(f"commit {commit.object_id}")
             self._console.info(
@@ -12,4 +12,18 @@ class Merge:
         self._console = console
 
     def __call__(self, ref_name: str):
-        pass
+        result = self._repository.merge(ref_name)
+        if result.failed:
+            assert result.error is not None
+            self._console.error(result.error)
+            return
+        merge = result.value
+        assert merge is not None
+        if merge.kind == "up-to-date":
+            self._console.info("Already up to date.")
+        elif merge.kind == "fast-forward":
+            self._console.info(f"Fast-forward to {merge.commit.object_id}")
+        else:
+            self._console.success(
+                f"Merge made by the three-way merge: {merge.commit.object_id}"
+            )
@@ -3,8 +3,9 @@ Common type definitions for the gitoy project.
 """
 
 from dataclasses import dataclass
-from typing import Union
+from typing import Literal, Union
 
+from database.entity.commit import Commit
 from database.entity.index_entry import IndexEntry
 
 # Type alias for readable buffer types that can be used with hash functions
@@ -34,3 +35,9 @@ class StatusResult:
         self.branch_name = branch_name
         self.unstaged = Diff([], [], [])
         self.staged = Diff([], [], [])
+
+
+@dataclass
+class MergeResult:
+    kind: Literal["up-to-date", "fast-forward", "merge"]
+    commit: Commit
@@ -1,29 +1,89 @@
+import dataclasses
 from datetime import datetime
-from typing import Any, Iterable, Optional
+import secrets
+from typing import Any, Iterable, Iterator, Optional, TypeVar
+from database.entity.commit_bloom import CommitBloom
+from database.entity.commit_graph_entry import CommitGraphEntry
 from database.entity.commit_parent import CommitParent
+from database.entity.schema_version import SchemaVersion
+from database.migration import (
+    BASELINE_VERSION,
+    LATEST_VERSION,
+    MIGRATIONS,
+    OBJECTS_DB_VERSION,
+)
+from database.object_id import (
+    binary_layout_statements,
+    decode_id,
+    encode_id,
+    id_columns,
+)
 from database.sqlite import SQLite
 from database.entity.blob import Blob
+from database.entity.blob_part import BlobPart
+from database.entity.entity import Entity
 from database.entity.commit import Commit
 from database.entity.ref import Ref
 from database.entity.reflog import Reflog
 from database.entity.tag import Tag
 from database.entity.tree_entry import TreeEntry
 from database.entity.index_entry import IndexEntry
+from database.entity.index_tree import IndexTree
+from util.array import chunked
+from util.path import accumulate_paths
+from util.constant import (
+    BLOB_PART_SIZE,
+    DECOMPRESS_CHUNK_SIZE,
+    GITOY_OBJECTS_DB_FILE,
+    OBJECTS_DB_PRAGMAS,
+    SQL_VARIABLE_BATCH,
+)
+
+E = TypeVar("E", bound=Entity)
+
+
+class _BlobExists(Exception):
+    """Rolls back the parts of a streamed blob that is already stored"""
 
 
 class Database:
-    def __init__(self, sqlite: SQLite):
+    """Repository metadata in `sqlite`, blob payloads in `objects`.
+
+    The objects database sits next to the metadata one by default and is only
+    opened when blob data is read or written, so commands working on refs,
+    commits, trees and the index never touch it.
+    """
+
+    def __init__(
+        self,
+        sqlite: SQLite,
+        binary_object_ids: bool = False,
+        objects: Optional[SQLite] = None,
+    ):
         self.sqlite = sqlite
+        if objects is None:
+            objects = SQLite(
+                sqlite.path.with_name(GITOY_OBJECTS_DB_FILE) if sqlite.path else None,
+                OBJECTS_DB_PRAGMAS,
+            )
+        self.objects = objects
+        # layout of a database created by `init`; an existing one keeps its own
+        self.binary_object_ids = binary_object_ids
+        self._uses_binary_ids: Optional[bool] = None
         self.entity_list = [
-            Blob,
             Commit,
             CommitParent,
+            CommitGraphEntry,
+            CommitBloom,
             Ref,
             Reflog,
             Tag,
             TreeEntry,
             IndexEntry,
+            IndexTree,
+            SchemaVersion,
         ]
+        self.object_entity_list = [Blob, BlobPart]
 
     @staticmethod
     def build_where_clause(query: str, data: dict) -> tuple[str, Iterable[Any]]:
@@ -37,16 +97,170 @@ class Database:
                 where.append(f"{key} IS NULL")
         return query + " WHERE " + " AND ".join(where), params
 
+    def transaction(self):
+        return self.sqlite.transaction()
+
     def is_initialized(self) -> bool:
         return (
             self.sqlite.path is not None
             and self.sqlite.path.exists()
-            and len(self.sqlite.list_tables()) == len(self.entity_list)
+            and self.get_schema_version() > 0
         )
 
     def init(self) -> None:
-        for entity in self.entity_list:
-            self.sqlite.create_table(entity.table_name(), entity.columns())
+        self._init_objects(self.binary_object_ids)
+        with self.transaction():
+            self._create_tables(self.sqlite, self.entity_list)
+            if self.binary_object_ids:
+                for statement in binary_layout_statements(self.entity_list):
+                    self.sqlite.execute(statement)
+            self._record_schema_version(LATEST_VERSION, "initial schema")
+        self._uses_binary_ids = None
+
+    def _init_objects(self, binary_object_ids: bool) -> None:
+        """Create the missing tables of the objects database, converting those
+        still in the hex layout when `binary_object_ids` is set"""
+        with self.objects.transaction():
+            self._create_tables(self.objects, self.object_entity_list)
+            if not binary_object_ids:
+                return
+            hex_entities = [
+                entity
+                for entity in self.object_entity_list
+                if not self._stores_binary_ids(self.objects, entity.table_name())
+            ]
+            for statement in binary_layout_statements(hex_entities):
+                self.objects.execute(statement)
+
+    @staticmethod
+    def _create_tables(sqlite: SQLite, entity_list: list) -> None:
+        for entity in entity_list:
+            sqlite.create_table(entity.table_name(), entity.columns())
+            for index_name, columns in entity.indexes().items():
+                sqlite.create_index(index_name, entity.table_name(), columns)
+            for index_name, columns in entity.unique_indexes().items():
+                sqlite.create_index(
+                    index_name, entity.table_name(), columns, unique=True
+                )
+
+    def get_schema_version(self) -> int:
+        tables = self.sqlite.list_tables()
+        if SchemaVersion.table_name() not in tables:
+            # repositories created before versioning have tables but no version
+            return BASELINE_VERSION if Ref.table_name() in tables else 0
+        rows = self.sqlite.select(
+            f"SELECT MAX(version) AS version FROM {SchemaVersion.table_name()}"
+        )
+        return rows[0]["version"] or 0
+
+    def migrate(self) -> list[int]:
+        """Apply pending migrations in order, each one in its own transaction"""
+        current_version = self.get_schema_version()
+        applied = []
+        for migration in MIGRATIONS:
+            if migration.version <= current_version:
+                continue
+            if migration.version == OBJECTS_DB_VERSION:
+                self._copy_blobs_to_objects()
+            with self.transaction():
+                self.sqlite.create_table(
+                    SchemaVersion.table_name(), SchemaVersion.columns()
+                )
+                migration.apply(self.sqlite)
+                self._record_schema_version(migration.version, migration.description)
+            applied.append(migration.version)
+        if applied and applied[-1] >= OBJECTS_DB_VERSION:
+            self._init_objects(self.uses_binary_ids)
+        if OBJECTS_DB_VERSION in applied:
+            # give back the pages the blob payloads used
+            self.sqlite.execute("VACUUM")
+        return applied
+
+    def _copy_blobs_to_objects(self) -> None:
+        """Copy the blob rows of a database from before objects.db there, in
+        storage order. Rows already copied by an interrupted run are kept."""
+        if Blob.table_name() not in self.sqlite.list_tables():
+            return
+        self._init_objects(self.uses_binary_ids)
+        columns = ", ".join(Blob.__dataclass_fields__.keys())
+        placeholders = ", ".join(["?"] * len(Blob.__dataclass_fields__))
+        rows = self.sqlite.iterate(
+            f"SELECT {columns} FROM {Blob.table_name()} ORDER BY rowid"
+        )
+        with self.objects.transaction():
+            for chunk in chunked(rows, SQL_VARIABLE_BATCH):
+                self.objects.execute_many(
+                    f"INSERT OR IGNORE INTO {Blob.table_name()} ({columns}) "
+                    f"VALUES ({placeholders})",
+                    chunk,
+                )
+
+    @property
+    def uses_binary_ids(self) -> bool:
+        """True when object ids are stored as 20-byte keys (see object_id)"""
+        if self._uses_binary_ids is None:
+            self._uses_binary_ids = self._stores_binary_ids(
+                self.sqlite, Commit.table_name()
+            )
+        return self._uses_binary_ids
+
+    @staticmethod
+    def _stores_binary_ids(sqlite: SQLite, table_name: str) -> bool:
+        columns = sqlite.select(f"PRAGMA table_info({table_name})")
+        return any(c["name"] == "object_id" and c["type"] == "BLOB" for c in columns)
+
+    def convert_to_binary_ids(self) -> bool:
+        """Rebuild the object tables of a hex database in the binary layout.
+        Returns False when it already uses it."""
+        if self.uses_binary_ids:
+            return False
+        # blobs first: an interrupted conversion is finished by the next one,
+        # which skips the already converted objects database
+        self._init_objects(binary_object_ids=True)
+        with self.transaction():
+            for statement in binary_layout_statements(self.entity_list):
+                self.sqlite.execute(statement)
+        self._uses_binary_ids = None
+        return True
+
+    def _key(self, object_id: Optional[str]) -> Any:
+        return encode_id(object_id) if self.uses_binary_ids else object_id
+
+    def _keys(self, object_ids: Iterable[str]) -> list:
+        if self.uses_binary_ids:
+            return [encode_id(object_id) for object_id in object_ids]
+        return list(object_ids)
+
+    def _object_id(self, value: Any) -> str:
+        """Hex id of a stored id column that always holds one"""
+        object_id = decode_id(value) if self.uses_binary_ids else value
+        assert object_id is not None
+        return object_id
+
+    def _stored(self, entity: E) -> E:
+        """Entity with its object ids in their stored form"""
+        if not self.uses_binary_ids:
+            return entity
+        return dataclasses.replace(
+            entity,
+            **{
+                column: encode_id(getattr(entity, column))
+                for column in id_columns(type(entity))
+            },
+        )
+
+    def _loaded(self, entity_type: type[E], rows: list[dict]) -> list[E]:
+        """Entities of selected rows, with their object ids decoded"""
+        if self.uses_binary_ids:
+            columns = id_columns(entity_type)
+            for row in rows:
+                for column in columns:
+                    row[column] = decode_id(row[column])
+        return [entity_type(**row) for row in rows]
+
+    def _record_schema_version(self, version: int, description: str) -> None:
+        applied_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.sqlite.insert(SchemaVersion(version, description, applied_at))
 
     def create_main_branch(self) -> Ref:
         ref = Ref(
@@ -96,7 +310,8 @@ class Database:
 
     def get_branch(self, name: str) -> Optional[Ref]:
         refs = self.sqlite.select(
-            f"SELECT * FROM {Ref.table_name()} WHERE ref_name = '{name}' AND ref_type = 'branch'"
+            f"SELECT * FROM {Ref.table_name()} WHERE ref_name = ? AND ref_type = 'branch'",
+            (name,),
         )
         return Ref(**refs[0]) if refs else None
 
@@ -104,37 +319,173 @@ class Database:
         self.sqlite.delete(branch)
 
     def create_blob(self, blob: Blob) -> None:
-        return self.sqlite.insert(Blob)
+        self.objects.insert(self._stored(blob))
 
     def create_blobs(self, blobs: list[Blob]) -> None:
-        return self.sqlite.insert_many(blobs)
+        self.objects.insert_many([self._stored(blob) for blob in blobs])
+
+    def create_streamed_blob(
+        self, blob: Blob, chunks: Iterable[bytes], part_size: int = BLOB_PART_SIZE
+    ) -> bool:
+        """Store a blob whose compressed data arrives as `chunks`, without
+        holding it in memory. The data goes to blob_part rows of `part_size`
+        bytes, each a zeroblob filled in place, under a provisional key.
+
+        `blob.object_id` is only read once `chunks` is exhausted, so it can be
+        the hash of the very content compressed. The parts then take that id
+        and the blob row is inserted last, keeping no data. When the blob is
+        stored already, everything is rolled back and False is returned.
+        """
+        # as long as a real id, so renaming the parts only rewrites their keys
+        provisional_key = self._key(secrets.token_hex(20))
+        try:
+            with self.objects.transaction():
+                self._write_blob_parts(provisional_key, chunks, part_size)
+                if self.list_existing_blob_ids([blob.object_id]):
+                    raise _BlobExists()
+                self.objects.execute(
+                    f"UPDATE {BlobPart.table_name()} SET object_id = ? "
+                    "WHERE object_id = ?",
+                    (self._key(blob.object_id), provisional_key),
+                )
+                self.objects.insert(
+                    self._stored(dataclasses.replace(blob, data=None))
+                )
+        except _BlobExists:
+            return False
+        return True
+
+    def _write_blob_parts(
+        self, key: Any, chunks: Iterable[bytes], part_size: int
+    ) -> None:
+        part, written, rowid = 0, part_size, 0
+        handle = None
+        try:
+            for chunk in chunks:
+                view = memoryview(chunk)
+                while view:
+                    if written == part_size:
+                        if handle is not None:
+                            handle.close()
+                        rowid = self.objects.insert_zeroblob(
+                            BlobPart.table_name(),
+                            {"object_id": key, "part": part},
+                            "data",
+                            part_size,
+                        )
+                        handle = self.objects.open_blob(
+                            BlobPart.table_name(), "data", rowid, readonly=False
+                        )
+                        part, written = part + 1, 0
+                    assert handle is not None
+                    size = min(len(view), part_size - written)
+                    handle.write(view[:size])
+                    written, view = written + size, view[size:]
+        finally:
+            if handle is not None:
+                handle.close()
+        if part and written < part_size:
+            # cut the last part down to the data written into it
+            self.objects.execute(
+                f"UPDATE {BlobPart.table_name()} "
+                "SET data = substr(data, 1, ?) WHERE rowid = ?",
+                (written, rowid),
+            )
+
+    def iter_blob_parts(
+        self, object_id: str, chunk_size: int = DECOMPRESS_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Compressed data of a blob stored in parts, read incrementally in
+        chunks of at most `chunk_size` bytes"""
+        rowids = [
+            row[0]
+            for row in self.objects.iterate(
+                f"SELECT rowid FROM {BlobPart.table_name()} "
+                "WHERE object_id = ? ORDER BY part",
+                (self._key(object_id),),
+            )
+        ]
+        for rowid in rowids:
+            with self.objects.open_blob(BlobPart.table_name(), "data", rowid) as handle:
+                while chunk := handle.read(chunk_size):
+                    yield chunk
 
     def get_blob(self, object_id: str) -> Optional[Blob]:
-        blobs = self.sqlite.select(
-            f"SELECT * FROM {Blob.table_name()} WHERE object_id = '{object_id}'"
+        blobs = self.objects.select(
+            f"SELECT * FROM {Blob.table_name()} WHERE object_id = ?",
+            (self._key(object_id),),
         )
-        return Blob(**blobs[0]) if blobs else None
+        return self._loaded(Blob, blobs[:1])[0] if blobs else None
 
-    def list_blobs_by_ids(self, object_ids: list[str]) -> list[Blob]:
-        id_params = ",".join([f"'{obj_id}'" for obj_id in object_ids])
-        blobs = self.sqlite.select(
-            f"SELECT * FROM {Blob.table_name()} WHERE object_id IN ({id_params})"
-        )
-        return [Blob(**blob) for blob in blobs]
+    def list_existing_blob_ids(self, object_ids: Iterable[str]) -> set[str]:
+        """Ids among `object_ids` that are stored, answered from the primary
+        key index without reading blob data."""
+        existing: set[str] = set()
+        for chunk in chunked(object_ids, SQL_VARIABLE_BATCH):
+            rows = self.objects.iterate(
+                f"SELECT object_id FROM {Blob.table_name()} "
+                f"WHERE object_id IN ({', '.join(['?'] * len(chunk))})",
+                self._keys(chunk),
+            )
+            existing.update(self._object_id(row[0]) for row in rows)
+        return existing
+
+    def iter_blob_data(
+        self, object_ids: Iterable[str]
+    ) -> Iterator[tuple[str, Optional[bytes]]]:
+        """Yield (object_id, compressed data) of the stored blobs among
+        `object_ids` in storage (rowid) order, fetched in batches. Blobs
+        stored in parts come with None, see `iter_blob_parts`."""
+        rowids: list[int] = []
+        for chunk in chunked(object_ids, SQL_VARIABLE_BATCH):
+            rows = self.objects.iterate(
+                f"SELECT rowid FROM {Blob.table_name()} "
+                f"WHERE object_id IN ({', '.join(['?'] * len(chunk))})",
+                self._keys(chunk),
+            )
+            rowids.extend(row[0] for row in rows)
+        rowids.sort()
+        for chunk in chunked(rowids, SQL_VARIABLE_BATCH):
+            rows = self.objects.iterate(
+                f"SELECT object_id, data FROM {Blob.table_name()} "
+                f"WHERE rowid IN ({', '.join(['?'] * len(chunk))}) ORDER BY rowid",
+                chunk,
+            )
+            for object_id, data in rows:
+                yield self._object_id(object_id), data
+
+    def list_blob_sizes(self, object_ids: Iterable[str]) -> dict[str, int]:
+        """Uncompressed size of each stored blob among `object_ids`"""
+        sizes: dict[str, int] = {}
+        for chunk in chunked(object_ids, SQL_VARIABLE_BATCH):
+            rows = self.objects.iterate(
+                f"SELECT object_id, size FROM {Blob.table_name()} "
+                f"WHERE object_id IN ({', '.join(['?'] * len(chunk))})",
+                self._keys(chunk),
+            )
+            sizes.update((self._object_id(object_id), size) for object_id, size in rows)
+        return sizes
 
     def list_index_entries_by_paths(self, paths: list[str]) -> list[IndexEntry]:
-        path_params = ",".join([f"'{path}'" for path in paths])
-        index_entries = self.sqlite.select(
-            f"SELECT * FROM {IndexEntry.table_name()} WHERE path IN ({path_params})"
-        )
+        index_entries = []
+        for chunk in chunked(paths, SQL_VARIABLE_BATCH):
+            index_entries += self.sqlite.select(
+                f"SELECT * FROM {IndexEntry.table_name()} "
+                f"WHERE path IN ({', '.join(['?'] * len(chunk))})",
+                chunk,
+            )
         return [IndexEntry(**index_entry) for index_entry in index_entries]
 
     def list_index_entries_by_paths_startwith(
         self, paths: list[str]
     ) -> list[IndexEntry]:
-        like_conditions = " OR ".join([f"path LIKE '{path}%'" for path in paths])
+        # prefix match as a range so the primary key index on path is used
+        # (LIKE is case-insensitive and cannot use it)
+        range_conditions = " OR ".join(["(path >= ? AND path < ?)"] * len(paths))
+        params = [bound for path in paths for bound in (path, path + "\U0010ffff")]
         index_entries = self.sqlite.select(
-            f"SELECT * FROM {IndexEntry.table_name()} WHERE {like_conditions}"
+            f"SELECT * FROM {IndexEntry.table_name()} WHERE {range_conditions}",
+            params,
         )
         return [IndexEntry(**index_entry) for index_entry in index_entries]
 
@@ -143,63 +494,245 @@ class Database:
         return [IndexEntry(**index_entry) for index_entry in index_entries]
 
     def create_index_entries(self, index_entries: list[IndexEntry]) -> None:
+        self.invalidate_index_trees(index_entries)
         return self.sqlite.insert_many(index_entries)
 
+    def update_index_entry_stats(self, index_entries: list[IndexEntry]) -> None:
+        self.sqlite.execute_many(
+            f"UPDATE {IndexEntry.table_name()} "
+            "SET size = ?, mtime_ns = ?, ctime_ns = ?, inode = ?, dev = ? WHERE path = ?",
+            [
+                (e.size, e.mtime_ns, e.ctime_ns, e.inode, e.dev, e.path)
+                for e in index_entries
+            ],
+        )
+
     def delete_index_entries(self, entries: list[IndexEntry]) -> None:
+        self.invalidate_index_trees(entries)
         return self.sqlite.delete_many(entries)
 
+    def invalidate_index_trees(self, entries: list[IndexEntry]) -> None:
+        """Drop the cached tree ids of every directory above the entries"""
+        directories = {
+            directory
+            for entry in entries
+            for directory in accumulate_paths(entry.path)[:-1]
+        }
+        self.delete_index_trees(directories)
+
+    def list_index_trees(self) -> dict[str, IndexTree]:
+        rows = self.sqlite.iterate(
+            f"SELECT path, object_id, entry_count FROM {IndexTree.table_name()}"
+        )
+        return {row[0]: IndexTree(*row) for row in rows}
+
+    def save_index_trees(self, index_trees: list[IndexTree]) -> None:
+        self.sqlite.execute_many(
+            f"INSERT OR REPLACE INTO {IndexTree.table_name()} "
+            "(path, object_id, entry_count) VALUES (?, ?, ?)",
+            [(t.path, t.object_id, t.entry_count) for t in index_trees],
+        )
+
+    def delete_index_trees(self, paths: Iterable[str]) -> None:
+        for chunk in chunked(paths, SQL_VARIABLE_BATCH):
+            self.sqlite.execute(
+                f"DELETE FROM {IndexTree.table_name()} "
+                f"WHERE path IN ({', '.join(['?'] * len(chunk))})",
+                chunk,
+            )
+
     def get_tree_entry(self, data: dict) -> TreeEntry | None:
+        tree_id_columns = id_columns(TreeEntry)
         query, params = self.build_where_clause(
-            f"SELECT * FROM {TreeEntry.table_name()}", data
+            f"SELECT * FROM {TreeEntry.table_name()}",
+            {
+                key: self._key(value) if key in tree_id_columns else value
+                for key, value in data.items()
+            },
         )
         tree_entries = self.sqlite.select(query, params)
-        return TreeEntry(**tree_entries[0]) if tree_entries else None
+        return self._loaded(TreeEntry, tree_entries[:1])[0] if tree_entries else None
 
     def get_root_tree_entry(self, object_id: str) -> TreeEntry | None:
         tree_entries = self.sqlite.select(
-            f"SELECT * FROM {TreeEntry.table_name()} WHERE entry_object_id = '{object_id}' and entry_type = 'tree' and entry_name = '.'",
+            f"SELECT * FROM {TreeEntry.table_name()} WHERE entry_object_id = ? "
+            "AND entry_type = 'tree' AND entry_name = '.'",
+            (self._key(object_id),),
         )
-        return TreeEntry(**tree_entries[0]) if tree_entries else None
+        return self._loaded(TreeEntry, tree_entries[:1])[0] if tree_entries else None
 
     def get_child_tree_entries(self, tree_id: str) -> list[TreeEntry]:
         tree_entries = self.sqlite.select(
-            f"SELECT * FROM {TreeEntry.table_name()} WHERE tree_id = '{tree_id}'"
+            f"SELECT * FROM {TreeEntry.table_name()} WHERE tree_id = ?",
+            (self._key(tree_id),),
+        )
+        return self._loaded(TreeEntry, tree_entries)
+
+    def iter_commit_tree_entries(
+        self, root_object_id: str, root_path: str = "."
+    ) -> Iterator[tuple[str, TreeEntry]]:
+        """Stream (parent_path, entry) for every entry below a root tree.
+
+        One recursive query collects the directories, the same statement then
+        joins their children, so the whole tree costs a single round trip.
+        """
+        query = f"""
+            WITH RECURSIVE directory(object_id, path) AS (
+                SELECT ?, ?
+                UNION ALL
+                SELECT child.entry_object_id, directory.path || '/' || child.entry_name
+                FROM directory
+                JOIN {TreeEntry.table_name()} AS child
+                    ON child.tree_id = directory.object_id
+                WHERE child.entry_type = 'tree'
+            )
+            SELECT directory.path, child.tree_id, child.entry_name, child.entry_mode,
+                child.entry_type, child.entry_object_id
+            FROM directory
+            JOIN {TreeEntry.table_name()} AS child ON child.tree_id = directory.object_id
+        """
+        rows = self.sqlite.iterate(
+            query, [self._key(root_object_id), root_path], batch_size=5000
         )
-        return [TreeEntry(**tree_entry) for tree_entry in tree_entries]
+        decode = self._object_id
+        for parent_path, tree_id, name, mode, entry_type, object_id in rows:
+            yield parent_path, TreeEntry(
+                name, mode, entry_type, decode(object_id), decode(tree_id)
+            )
 
     def create_tree_entry(self, tree_entry: TreeEntry) -> None:
-        return self.sqlite.insert(tree_entry)
+        self.sqlite.insert(self._stored(tree_entry))
 
     def create_tree_entries(self, tree_entries: list[TreeEntry]) -> None:
-        return self.sqlite.insert_many(tree_entries)
+        self.sqlite.insert_many([self._stored(entry) for entry in tree_entries])
+
+    def save_tree_entries(self, tree_entries: list[TreeEntry]) -> None:
+        """Insert tree entries in one statement, skipping rows already stored"""
+        self.sqlite.execute_many(
+            f"INSERT OR IGNORE INTO {TreeEntry.table_name()} "
+            "(tree_id, entry_name, entry_mode, entry_object_id, entry_type) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    self._key(e.tree_id),
+                    e.entry_name,
+                    e.entry_mode,
+                    self._key(e.entry_object_id),
+                    e.entry_type,
+                )
+                for e in tree_entries
+            ],
+        )
 
     def get_commit(self, object_id: str) -> Optional[Commit]:
         commits = self.sqlite.select(
-            f"SELECT * FROM {Commit.table_name()} WHERE object_id = '{object_id}'"
+            f"SELECT * FROM {Commit.table_name()} WHERE object_id = ?",
+            (self._key(object_id),),
         )
-        return Commit(**commits[0]) if commits else None
+        return self._loaded(Commit, commits[:1])[0] if commits else None
     
-    def list_commits(self, object_ids: list[str]) -> list[Commit]:
-        id_params = ",".join([f"'{path}'" for path in object_ids])
-        commits = self.sqlite.select(
-            f"SELECT * FROM {Commit.table_name()} WHERE object_id IN ({id_params})"
+    def list_commits(self, object_ids: Iterable[str]) -> list[Commit]:
+        commits = []
+        for chunk in chunked(object_ids, SQL_VARIABLE_BATCH):
+            commits += self.sqlite.select(
+                f"SELECT * FROM {Commit.table_name()} "
+                f"WHERE object_id IN ({', '.join(['?'] * len(chunk))})",
+                self._keys(chunk),
+            )
+        return self._loaded(Commit, commits)
+
+    def count_commits(self) -> int:
+        rows = self.sqlite.select(f"SELECT COUNT(*) AS count FROM {Commit.table_name()}")
+        return rows[0]["count"]
+
+    def iter_commit_graph_sources(self) -> Iterator[tuple[str, int, str]]:
+        """(object_id, generation, committer_date) of every commit, parents
+        before children"""
+        # a WITHOUT ROWID table has no insertion order to break ties with
+        order = "created_at, object_id" if self.uses_binary_ids else "rowid"
+        rows = self.sqlite.iterate(
+            f"SELECT object_id, generation, committer_date FROM {Commit.table_name()} "
+            f"ORDER BY generation, {order}"
+        )
+        for object_id, generation, committer_date in rows:
+            yield self._object_id(object_id), generation, committer_date
+
+    def iter_commit_parent_ids(self) -> Iterator[tuple[str, str]]:
+        """(commit_id, parent_id) of every commit, parents in order"""
+        rows = self.sqlite.iterate(
+            f"SELECT commit_id, parent_id FROM {CommitParent.table_name()} "
+            "ORDER BY commit_id, parent_order"
+        )
+        for commit_id, parent_id in rows:
+            yield self._object_id(commit_id), self._object_id(parent_id)
+
+    def count_commit_graph(self) -> int:
+        rows = self.sqlite.select(
+            f"SELECT COUNT(*) AS count FROM {CommitGraphEntry.table_name()}"
+        )
+        return rows[0]["count"]
+
+    def get_commit_graph_size(self) -> int:
+        """Positions are dense from 0, so the last one gives the size"""
+        rows = self.sqlite.select(
+            f"SELECT COALESCE(MAX(position) + 1, 0) AS size "
+            f"FROM {CommitGraphEntry.table_name()}"
         )
-        return [Commit(**commit) for commit in commits]
+        return rows[0]["size"]
+
+    def iter_commit_graph_rows(self) -> Iterator[tuple]:
+        """Commit-graph rows as tuples in CommitGraphEntry field order"""
+        return self.sqlite.iterate(
+            f"SELECT * FROM {CommitGraphEntry.table_name()} ORDER BY position",
+            batch_size=10_000,
+        )
+
+    def iter_commit_graph(self) -> Iterator[CommitGraphEntry]:
+        for row in self.iter_commit_graph_rows():
+            yield CommitGraphEntry(*row)
+
+    def create_commit_graph_entries(self, entries: list[CommitGraphEntry]) -> None:
+        self.sqlite.insert_many(entries)
+
+    def delete_commit_graph(self) -> None:
+        self.sqlite.execute(f"DELETE FROM {CommitGraphEntry.table_name()}")
+
+    def create_commit_bloom(self, commit_bloom: CommitBloom) -> None:
+        self.sqlite.insert(commit_bloom)
+
+    def list_commit_blooms(self, object_ids: Iterable[str]) -> dict[str, bytes]:
+        """Changed-path filters by commit object_id; commits without one are
+        left out"""
+        blooms = {}
+        for chunk in chunked(object_ids, SQL_VARIABLE_BATCH):
+            blooms.update(
+                self.sqlite.iterate(
+                    f"SELECT object_id, bloom FROM {CommitBloom.table_name()} "
+                    f"WHERE object_id IN ({', '.join(['?'] * len(chunk))})",
+                    chunk,
+                )
+            )
+        return blooms
+
+    def delete_commit_blooms(self) -> None:
+        self.sqlite.execute(f"DELETE FROM {CommitBloom.table_name()}")
 
     def get_commit_children(self, parent_object_id: str) -> list[CommitParent]:
         commit_children = self.sqlite.select(
-            f"SELECT * FROM {CommitParent.table_name()} WHERE parent_id = '{parent_object_id}'"
+            f"SELECT * FROM {CommitParent.table_name()} WHERE parent_id = ?",
+            (self._key(parent_object_id),),
         )
-        return [CommitParent(**child) for child in commit_children]
+        return self._loaded(CommitParent, commit_children)
 
     def get_commit_parents(self, child_object_id: str):
         commit_parents = self.sqlite.select(
-            f"SELECT * FROM {CommitParent.table_name()} WHERE commit_id = '{child_object_id}'"
+            f"SELECT * FROM {CommitParent.table_name()} WHERE commit_id = ?",
+            (self._key(child_object_id),),
         )
-        return [CommitParent(**parent) for parent in commit_parents]
+        return self._loaded(CommitParent, commit_parents)
 
     def create_commit(self, commit: Commit):
-        return self.sqlite.insert(commit)
+        self.sqlite.insert(self._stored(commit))
 
     def create_commit_parent(self, commit_parent: CommitParent):
-        return self.sqlite.insert(commit_parent)
+        self.sqlite.insert(self._stored(commit_parent))
@@ -13,6 +13,7 @@ from .tag import Tag
 from .ref import Ref
 from .index_entry import IndexEntry
 from .reflog import Reflog
+from .schema_version import SchemaVersion
 
 __all__ = [
     "Blob",
@@ -23,4 +24,5 @@ __all__ = [
     "Ref",
     "IndexEntry",
     "Reflog",
+    "SchemaVersion",
 ]
@@ -12,7 +12,7 @@ class Blob(Entity):
 
     Attributes:
         object_id: SHA-1/SHA-256 hash (primary key)
-        data: Raw file content
+        data: Raw file content, None for blobs stored in blob_part rows
         size: File size in bytes
         encoding: File encoding (optional)
         mime_type: MIME type (optional)
@@ -20,7 +20,7 @@ class Blob(Entity):
     """
 
     object_id: str  # Primary key
-    data: bytes
+    data: Optional[bytes]
     size: int
     created_at: datetime
     encoding: Optional[str] = None
@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+
+
+from database.entity.entity import Entity
+
+
+@dataclass
+class BlobPart(Entity):
+    """
+    Piece of the compressed data of a blob too large to store in one row
+
+    Attributes:
+        object_id: Blob object_id (part of composite primary key)
+        part: Position of the piece, from 0 (part of composite primary key)
+        data: Compressed bytes, written and read through incremental BLOB I/O
+
+    The blob row of such an object has no data; its parts joined in order
+    are the compressed content.
+    """
+
+    object_id: str  # Primary key component
+    part: int  # Primary key component
+    data: bytes
+
+    @staticmethod
+    def table_name():
+        return "blob_part"
+
+    @staticmethod
+    def columns():
+        return [
+            "object_id TEXT",
+            "part INTEGER",
+            "data BLOB",
+            "PRIMARY KEY (object_id, part)",
+        ]
@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+
+
+from database.entity.entity import Entity
+
+
+@dataclass
+class CommitBloom(Entity):
+    """
+    Bloom filter of the paths a commit changed against its first parent
+
+    Attributes:
+        object_id: Commit object_id (primary key)
+        bloom: Filter bits, see repository.bloom_filter.BloomFilter
+
+    Commits without a row have no filter and must be checked against
+    their trees.
+    """
+
+    object_id: str  # Primary key
+    bloom: bytes
+
+    @staticmethod
+    def primary_key_column():
+        return "object_id"
+
+    @staticmethod
+    def table_name():
+        return "commit_bloom"
+
+    @staticmethod
+    def columns():
+        return [
+            "object_id TEXT PRIMARY KEY",
+            "bloom BLOB",
+        ]
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+from database.entity.entity import Entity
+
+
+@dataclass
+class CommitGraphEntry(Entity):
+    """
+    Row of the commit-graph, a dense array of every commit
+
+    Attributes:
+        position: Index of the commit in the graph (primary key)
+        object_id: Commit object_id
+        parent1: Position of the first parent, -1 when there is none
+        parent2: Position of the second parent, -1 when there is none
+        extra_parents: Comma separated positions of any further parents
+        generation: Commit generation number
+        commit_time: Committer date as seconds since the epoch
+
+    Parents always have a lower position than their children.
+    """
+
+    position: int  # Primary key
+    object_id: str
+    parent1: int
+    parent2: int
+    extra_parents: Optional[str]
+    generation: int
+    commit_time: int
+
+    @staticmethod
+    def primary_key_column():
+        return "position"
+
+    @staticmethod
+    def table_name():
+        return "commit_graph"
+
+    @staticmethod
+    def columns():
+        return [
+            "position INTEGER PRIMARY KEY",
+            "object_id TEXT",
+            "parent1 INTEGER",
+            "parent2 INTEGER",
+            "extra_parents TEXT",
+            "generation INTEGER",
+            "commit_time INTEGER",
+        ]
+
+    @staticmethod
+    def indexes():
+        return {"idx_commit_graph_object_id": ["object_id"]}
@@ -29,4 +29,9 @@ class CommitParent(Entity):
             "commit_id TEXT",
             "parent_id TEXT",
             "parent_order INTEGER",
+            "PRIMARY KEY (commit_id, parent_id)",
         ]
+
+    @staticmethod
+    def indexes():
+        return {"idx_commit_parent_parent_id": ["parent_id"]}
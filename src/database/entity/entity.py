@@ -11,6 +11,16 @@ class Entity:
     def columns():
         raise NotImplementedError("Subclasses must implement this method")
 
+    @staticmethod
+    def indexes() -> dict[str, list[str]]:
+        """Secondary indexes as {index_name: [column, ...]}"""
+        return {}
+
+    @staticmethod
+    def unique_indexes() -> dict[str, list[str]]:
+        """Unique indexes as {index_name: [column, ...]}"""
+        return {}
+
     @staticmethod
     def primary_key_column():
         raise NotImplementedError("Subclasses must implement this method")
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -16,12 +17,23 @@ class IndexEntry(Entity):
         object_id: Staged object_id
         mode: File permissions
         size: File size in bytes
+        mtime_ns: Modification time when the file was hashed
+        ctime_ns: Status change time when the file was hashed
+        inode: Inode number when the file was hashed
+        dev: Device id when the file was hashed
+
+    The stat fields form the stat cache. They are left empty when the file
+    was racily clean, which forces the next status to hash it again.
     """
 
     path: str  # Primary key
     object_id: str
     mode: str
     size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+    ctime_ns: Optional[int] = None
+    inode: Optional[int] = None
+    dev: Optional[int] = None
 
     @staticmethod
     def primary_key_column():
@@ -38,6 +50,10 @@ class IndexEntry(Entity):
             "object_id TEXT",
             "mode TEXT",
             "size INTEGER",
+            "mtime_ns INTEGER",
+            "ctime_ns INTEGER",
+            "inode INTEGER",
+            "dev INTEGER",
         ]
 
     def __eq__(self, other: "IndexEntry"):
@@ -48,6 +64,25 @@ class IndexEntry(Entity):
             and self.size == other.size
         )
 
+    def set_stat(self, stat: os.stat_result, cacheable: bool = True) -> None:
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns if cacheable else None
+        self.ctime_ns = stat.st_ctime_ns if cacheable else None
+        self.inode = stat.st_ino if cacheable else None
+        self.dev = stat.st_dev if cacheable else None
+
+    def is_stat_match(self, stat: os.stat_result) -> bool:
+        """True when the file is unchanged since it was hashed into this entry"""
+        return (
+            self.mtime_ns is not None
+            and self.mtime_ns == stat.st_mtime_ns
+            and self.ctime_ns == stat.st_ctime_ns
+            and self.inode == stat.st_ino
+            and self.dev == stat.st_dev
+            and self.size == stat.st_size
+            and self.mode == oct(stat.st_mode)
+        )
+
     @property
     def file_path_obj(self):
         return Path(self.path)
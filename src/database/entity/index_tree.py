@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+
+
+from database.entity.entity import Entity
+
+
+@dataclass
+class IndexTree(Entity):
+    """
+    Cached tree object of an index directory (git's cache-tree)
+
+    Attributes:
+        path: Directory path relative to the worktree (primary key)
+        object_id: Tree object_id of the directory as staged in the index
+        entry_count: Number of index entries below the directory
+
+    A row exists only while the directory is valid: touching an index entry
+    removes the rows of all its parent directories. The tree object of a
+    valid row is always stored in tree_entry.
+    """
+
+    path: str  # Primary key
+    object_id: str
+    entry_count: int
+
+    @staticmethod
+    def primary_key_column():
+        return "path"
+
+    @staticmethod
+    def table_name():
+        return "index_tree"
+
+    @staticmethod
+    def columns():
+        return [
+            "path TEXT PRIMARY KEY",
+            "object_id TEXT",
+            "entry_count INTEGER",
+        ]
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+
+from database.entity.entity import Entity
+
+
+@dataclass
+class SchemaVersion(Entity):
+    """
+    Applied schema migration
+
+    Attributes:
+        version: Schema version number (primary key)
+        description: What the migration changed
+        applied_at: When the migration was applied
+    """
+
+    version: int  # Primary key
+    description: str
+    applied_at: str
+
+    @staticmethod
+    def primary_key_column():
+        return "version"
+
+    @staticmethod
+    def table_name():
+        return "schema_version"
+
+    @staticmethod
+    def columns():
+        return [
+            "version INTEGER PRIMARY KEY",
+            "description TEXT",
+            "applied_at DATETIME",
+        ]
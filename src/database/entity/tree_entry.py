@@ -42,6 +42,28 @@ class TreeEntry(Entity):
             "entry_type TEXT",
         ]
 
+    @staticmethod
+    def indexes():
+        return {
+            "idx_tree_entry_entry_object_id": [
+                "entry_object_id",
+                "entry_type",
+                "entry_name",
+            ],
+        }
+
+    @staticmethod
+    def unique_indexes():
+        # also serves lookups by tree_id
+        return {
+            "idx_tree_entry_unique": [
+                "tree_id",
+                "entry_name",
+                "entry_object_id",
+                "entry_type",
+            ],
+        }
+
     @property
     def hashable_str(self):
         return f"{self.entry_mode}:{self.entry_type}:{self.entry_object_id}:{self.entry_name}"
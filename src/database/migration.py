@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+
+from database.sqlite import SQLite
+
+
+@dataclass
+class Migration:
+    """
+    Forward-only schema change applied to databases older than `version`
+
+    Statements are frozen SQL: later entity changes must not alter them,
+    each schema change gets a new migration instead.
+    """
+
+    version: int
+    description: str
+    statements: list[str] = field(default_factory=list)
+
+    def apply(self, sqlite: SQLite) -> None:
+        for statement in self.statements:
+            sqlite.execute(statement)
+
+
+# version from which blobs are stored in objects.db instead of gitoy.db
+OBJECTS_DB_VERSION = 8
+
+# Version 1 is the schema every repository created before versioning had,
+# so a database with tables but no schema_version table is at version 1.
+BASELINE_VERSION = 1
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=2,
+        description="Add commit_parent composite key and tree/commit secondary indexes",
+        statements=[
+            "CREATE TABLE commit_parent_v2 ("
+            "commit_id TEXT, parent_id TEXT, parent_order INTEGER, "
+            "PRIMARY KEY (commit_id, parent_id))",
+            "INSERT OR IGNORE INTO commit_parent_v2 (commit_id, parent_id, parent_order) "
+            "SELECT commit_id, parent_id, parent_order FROM commit_parent",
+            "DROP TABLE commit_parent",
+            "ALTER TABLE commit_parent_v2 RENAME TO commit_parent",
+            "CREATE INDEX IF NOT EXISTS idx_commit_parent_parent_id "
+            "ON commit_parent (parent_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tree_entry_tree_id ON tree_entry (tree_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tree_entry_entry_object_id "
+            "ON tree_entry (entry_object_id, entry_type, entry_name)",
+        ],
+    ),
+    Migration(
+        version=3,
+        description="Add stat cache columns to index_entry",
+        statements=[
+            "ALTER TABLE index_entry ADD COLUMN mtime_ns INTEGER",
+            "ALTER TABLE index_entry ADD COLUMN ctime_ns INTEGER",
+            "ALTER TABLE index_entry ADD COLUMN inode INTEGER",
+            "ALTER TABLE index_entry ADD COLUMN dev INTEGER",
+        ],
+    ),
+    Migration(
+        version=4,
+        description="Add index_tree cache of index directory tree ids",
+        statements=[
+            "CREATE TABLE IF NOT EXISTS index_tree ("
+            "path TEXT PRIMARY KEY, object_id TEXT, entry_count INTEGER)",
+        ],
+    ),
+    Migration(
+        version=5,
+        description="Add commit_graph of commit parents and generations",
+        statements=[
+            "CREATE TABLE IF NOT EXISTS commit_graph ("
+            "position INTEGER PRIMARY KEY, object_id TEXT, parent1 INTEGER, "
+            "parent2 INTEGER, extra_parents TEXT, generation INTEGER, "
+            "commit_time INTEGER)",
+            "CREATE INDEX IF NOT EXISTS idx_commit_graph_object_id "
+            "ON commit_graph (object_id)",
+        ],
+    ),
+    Migration(
+        version=6,
+        description="Add commit_bloom changed-path filters",
+        statements=[
+            "CREATE TABLE IF NOT EXISTS commit_bloom ("
+            "object_id TEXT PRIMARY KEY, bloom BLOB)",
+        ],
+    ),
+    Migration(
+        version=7,
+        description="Make tree_entry rows unique for insert-or-ignore writes",
+        statements=[
+            "DELETE FROM tree_entry WHERE rowid NOT IN ("
+            "SELECT MIN(rowid) FROM tree_entry "
+            "GROUP BY tree_id, entry_name, entry_object_id, entry_type)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tree_entry_unique "
+            "ON tree_entry (tree_id, entry_name, entry_object_id, entry_type)",
+            "DROP INDEX IF EXISTS idx_tree_entry_tree_id",
+        ],
+    ),
+    # Database.migrate copies the blob rows to objects.db before this runs
+    Migration(
+        version=OBJECTS_DB_VERSION,
+        description="Move blobs to the objects database",
+        statements=[
+            "DROP TABLE IF EXISTS blob",
+        ],
+    ),
+    # objects.db has no version of its own: Database.migrate creates its
+    # missing tables from the entities once a migration from version 8 on ran
+    Migration(
+        version=9,
+        description="Add blob_part to the objects database",
+    ),
+]
+
+LATEST_VERSION = max(
+    [BASELINE_VERSION] + [migration.version for migration in MIGRATIONS]
+)
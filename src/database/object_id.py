@@ -0,0 +1,122 @@
+"""
+Binary object id storage.
+
+In the binary layout the object id columns of blob, blob_part, commits,
+commit_parent and tree_entry hold SHA-1 ids as 20-byte BLOBs, and all but the
+blob tables become WITHOUT ROWID tables clustered on their keys. Database converts ids at its
+boundary, so the rest of gitoy only sees hex strings.
+"""
+
+import re
+from typing import Any, Iterable, Optional
+
+from database.entity.blob import Blob
+from database.entity.blob_part import BlobPart
+from database.entity.commit import Commit
+from database.entity.commit_parent import CommitParent
+from database.entity.entity import Entity
+from database.entity.tree_entry import TreeEntry
+
+SHA1_HEX = re.compile(r"[0-9a-f]{40}")
+
+# SQL function name of `encode_id`, registered on every connection
+ENCODE_ID_FUNCTION = "object_id_key"
+
+# a missing id, e.g. the tree_id of a root tree entry, which a WITHOUT ROWID
+# primary key cannot hold as NULL
+NO_ID = b""
+
+# tables moved to the binary layout, with their object id columns
+BINARY_ID_TABLES: dict[type[Entity], list[str]] = {
+    Blob: ["object_id"],
+    BlobPart: ["object_id"],
+    Commit: ["object_id", "tree_id"],
+    CommitParent: ["commit_id", "parent_id"],
+    TreeEntry: ["tree_id", "entry_object_id"],
+}
+
+_ID_COLUMNS_BY_TABLE = {
+    entity.table_name(): columns for entity, columns in BINARY_ID_TABLES.items()
+}
+
+# blob rows carry file data and are read in rowid order, and blob_part data is
+# opened by rowid for incremental I/O, so both keep their rowid
+WITHOUT_ROWID_PRIMARY_KEYS: dict[type[Entity], list[str]] = {
+    Commit: ["object_id"],
+    CommitParent: ["commit_id", "parent_id"],
+    TreeEntry: ["tree_id", "entry_name", "entry_object_id", "entry_type"],
+}
+
+
+def id_columns(entity_type: type[Entity]) -> list[str]:
+    """Object id columns of a table in the binary layout, matched by table
+    name so entity classes imported under another module path work too"""
+    return _ID_COLUMNS_BY_TABLE.get(entity_type.table_name(), [])
+
+
+def encode_id(object_id: Optional[str]) -> Any:
+    """Stored form of an object id: 20 bytes for a lowercase SHA-1, the
+    string itself for anything else"""
+    if object_id is None:
+        return NO_ID
+    if isinstance(object_id, str) and SHA1_HEX.fullmatch(object_id):
+        return bytes.fromhex(object_id)
+    return object_id
+
+
+def decode_id(value: Any) -> Optional[str]:
+    if isinstance(value, bytes):
+        return value.hex() if value else None
+    return value
+
+
+def binary_layout_statements(entity_types: Iterable[type[Entity]]) -> list[str]:
+    """Statements rebuilding the hex tables among `entity_types` in the binary
+    layout, copying their rows. Built from the current entity definitions."""
+    tables = {entity_type.table_name() for entity_type in entity_types}
+    statements = []
+    for entity, id_columns in BINARY_ID_TABLES.items():
+        table = entity.table_name()
+        if table not in tables:
+            continue
+        new_table = f"{table}_binary"
+        columns = []
+        for column in entity.columns():
+            name = column.split()[0]
+            if name in id_columns:
+                column = column.replace(" TEXT", " BLOB", 1)
+            columns.append(column)
+        primary_key = WITHOUT_ROWID_PRIMARY_KEYS.get(entity)
+        if primary_key is not None:
+            columns = [c for c in columns if not c.startswith("PRIMARY KEY")]
+            columns = [c.replace(" PRIMARY KEY", "") for c in columns]
+            columns.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        names = list(entity.__dataclass_fields__.keys())
+        values = [
+            f"{ENCODE_ID_FUNCTION}({name})" if name in id_columns else name
+            for name in names
+        ]
+        if primary_key is None:
+            # keep the storage order
+            names = ["rowid"] + names
+            values = ["rowid"] + values
+
+        statements += [
+            f"CREATE TABLE {new_table} ({', '.join(columns)})"
+            + (" WITHOUT ROWID" if primary_key is not None else ""),
+            f"INSERT OR IGNORE INTO {new_table} ({', '.join(names)}) "
+            f"SELECT {', '.join(values)} FROM {table}",
+            f"DROP TABLE {table}",
+            f"ALTER TABLE {new_table} RENAME TO {table}",
+        ]
+        for index_name, index_columns in entity.indexes().items():
+            statements.append(
+                f"CREATE INDEX {index_name} ON {table} ({', '.join(index_columns)})"
+            )
+        if primary_key is None:
+            for index_name, index_columns in entity.unique_indexes().items():
+                statements.append(
+                    f"CREATE UNIQUE INDEX {index_name} "
+                    f"ON {table} ({', '.join(index_columns)})"
+                )
+    return statements
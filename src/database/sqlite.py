@@ -1,22 +1,34 @@
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from database.entity.entity import Entity
+from database.object_id import ENCODE_ID_FUNCTION, encode_id
 
 
 class SQLite:
-    def __init__(self, path: Path | None = None):
+    def __init__(self, path: Path | None = None, pragmas: Optional[dict] = None):
         self.path = path
+        # applied on connect, before the journal mode so a new file takes
+        # settings like page_size
+        self.pragmas = pragmas or {}
         self.conn: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
+        self.transaction_depth = 0
+        self.commit_callbacks: list[tuple[Callable[[], None], Callable[[], None]]] = []
 
     def connect(self):
         if self.path is None:
             raise ValueError("Path is not set")
 
         self.conn = sqlite3.connect(self.path.absolute())
+        self.conn.create_function(
+            ENCODE_ID_FUNCTION, 1, encode_id, deterministic=True
+        )
         self.cursor = self.conn.cursor()
+        for name, value in self.pragmas.items():
+            self.conn.execute(f"PRAGMA {name} = {value}")
         self.conn.execute("PRAGMA journal_mode = WAL")
         self.conn.execute("PRAGMA synchronous = NORMAL")
         self.conn.execute("PRAGMA temp_store = MEMORY")
@@ -28,12 +40,85 @@ class SQLite:
 
         return self.conn, self.cursor
 
+    @contextmanager
+    def transaction(self):
+        """Group every write issued inside the block into a single transaction.
+
+        Nested blocks join the outermost one, which commits on a clean exit and
+        rolls everything back when an exception escapes.
+        """
+        if self.transaction_depth == 0:
+            conn, _ = self.get_connection()
+            if not conn.in_transaction:
+                # explicit BEGIN so schema changes are part of the transaction too
+                conn.execute("BEGIN")
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0 and self.conn is not None:
+                self.conn.rollback()
+                self._run_commit_callbacks(committed=False)
+            raise
+        else:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0 and self.conn is not None:
+                self.conn.commit()
+                self._run_commit_callbacks(committed=True)
+
+    def on_commit(
+        self, on_commit: Callable[[], None], on_rollback: Callable[[], None]
+    ) -> None:
+        """Run `on_commit` once the current transaction commits, or right away
+        outside of one. `on_rollback` runs instead if it rolls back, so state
+        kept outside the database can follow the transaction."""
+        if not self.in_transaction:
+            on_commit()
+            return
+        self.commit_callbacks.append((on_commit, on_rollback))
+
+    def _run_commit_callbacks(self, committed: bool) -> None:
+        callbacks, self.commit_callbacks = self.commit_callbacks, []
+        for on_commit, on_rollback in callbacks:
+            (on_commit if committed else on_rollback)()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.transaction_depth > 0
+
+    def commit(self):
+        if self.in_transaction:
+            return
+        conn, _ = self.get_connection()
+        conn.commit()
+
     def create_table(self, table_name: str, columns: list[str]):
         conn, cursor = self.get_connection()
         cursor.execute(
             f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})"
         )
-        conn.commit()
+        self.commit()
+
+    def create_index(
+        self, index_name: str, table_name: str, columns: list[str], unique=False
+    ):
+        conn, cursor = self.get_connection()
+        cursor.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} "
+            f"ON {table_name} ({', '.join(columns)})"
+        )
+        self.commit()
+
+    def execute(self, sql: str, params: Iterable[Any] = ()):
+        conn, cursor = self.get_connection()
+        cursor.execute(sql, params)
+        self.commit()
+
+    def execute_many(self, sql: str, params_list: Iterable[Iterable[Any]]):
+        conn, cursor = self.get_connection()
+        cursor.executemany(sql, params_list)
+        self.commit()
 
     def list_tables(self):
         conn, cursor = self.get_connection()
@@ -43,7 +128,7 @@ class SQLite:
     def truncate_table(self, table_name: str):
         conn, cursor = self.get_connection()
         cursor.execute(f"DELETE FROM {table_name}")
-        conn.commit()
+        self.commit()
 
     def truncate_all(self):
         tables = self.list_tables()
@@ -57,7 +142,7 @@ class SQLite:
         placeholders = ", ".join(["?"] * len(values))
         sql = f"INSERT INTO {entity.table_name()} ({', '.join(columns)}) VALUES ({placeholders})"
         cursor.execute(sql, values)
-        conn.commit()
+        self.commit()
         return entity
 
     def insert_many(self, entities: list[Entity]):
@@ -76,10 +161,31 @@ class SQLite:
         # Prepare values for all entities
         values_list = [[getattr(entity, col) for col in columns] for entity in entities]
         cursor.executemany(sql, values_list)
-        conn.commit()
+        self.commit()
 
         return entities
 
+    def insert_zeroblob(
+        self, table_name: str, values: dict, column: str, length: int
+    ) -> int:
+        """Insert a row whose `column` holds `length` zero bytes, to be filled
+        in place through `open_blob`. Returns the rowid of the row."""
+        conn, cursor = self.get_connection()
+        columns = [*values.keys(), column]
+        placeholders = ", ".join(["?"] * len(values) + ["zeroblob(?)"])
+        sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        cursor.execute(sql, [*values.values(), length])
+        self.commit()
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def open_blob(
+        self, table_name: str, column: str, rowid: int, readonly: bool = True
+    ) -> sqlite3.Blob:
+        """Incremental I/O on one BLOB value, without loading it whole"""
+        conn, _ = self.get_connection()
+        return conn.blobopen(table_name, column, rowid, readonly=readonly)
+
     def select(self, query: str, params: Iterable[Any] = ()) -> list[dict]:
         conn, cursor = self.get_connection()
         cursor.execute(query, params)
@@ -87,6 +193,21 @@ class SQLite:
         rows = cursor.fetchall()
         return [dict(zip(columns, row)) for row in rows]
 
+    def iterate(
+        self, query: str, params: Iterable[Any] = (), batch_size: int = 1000
+    ) -> Iterator[tuple]:
+        """Stream result rows as tuples, fetching `batch_size` rows at a time.
+
+        Uses its own cursor so other queries can run while the stream is open.
+        """
+        conn, _ = self.get_connection()
+        cursor = conn.execute(query, params)
+        try:
+            while rows := cursor.fetchmany(batch_size):
+                yield from rows
+        finally:
+            cursor.close()
+
     def update(self, entity: Entity, update_values: dict):
         conn, cursor = self.get_connection()
         set_clause = ", ".join([f"{col} = ?" for col in update_values.keys()])
@@ -94,7 +215,7 @@ class SQLite:
         values = list(update_values.values())
         values.append(entity.primary_key)
         cursor.execute(sql, values)
-        conn.commit()
+        self.commit()
 
     def delete(self, entity: Entity):
         conn, cursor = self.get_connection()
@@ -102,11 +223,11 @@ class SQLite:
             f"DELETE FROM {entity.table_name()} WHERE {entity.primary_key_column()} = ?"
         )
         cursor.execute(sql, [entity.primary_key])
-        conn.commit()
+        self.commit()
 
     def delete_many(self, entities: list[Entity]):
         primary_keys = [entity.primary_key for entity in entities]
         conn, cursor = self.get_connection()
         sql = f"DELETE FROM {entities[0].table_name()} WHERE {entities[0].primary_key_column()} IN ({', '.join(['?'] * len(primary_keys))})"
         cursor.execute(sql, primary_keys)
-        conn.commit()
+        self.commit()
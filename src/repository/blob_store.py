@@ -1,3 +1,4 @@
+from typing import Iterable
 from database.database import Database
 from database.entity.blob import Blob
 from util.array import unique
@@ -13,12 +14,20 @@ class BlobStore:
             return Result.Ok([])
 
         blobs = list(unique(blobs, "object_id"))
-        existing_blobs = self.database.list_blobs_by_ids(
-            [blob.object_id for blob in blobs]
-        )
-        existing_blob_ids = [blob.object_id for blob in existing_blobs]
+        existing_blob_ids = self.exists([blob.object_id for blob in blobs])
         should_create_blobs = [
             blob for blob in blobs if blob.object_id not in existing_blob_ids
         ]
         self.database.create_blobs(should_create_blobs)
         return Result.Ok(should_create_blobs)
+
+    def create_streamed(self, blob: Blob, chunks: Iterable[bytes]) -> Result:
+        """Store a blob from its compressed `chunks`, unless it turns out to
+        be stored already. `blob.object_id` may be set as `chunks` ends."""
+        if not self.database.create_streamed_blob(blob, chunks):
+            return Result.Ok(None)
+        return Result.Ok(blob)
+
+    def exists(self, object_ids: Iterable[str]) -> set[str]:
+        """Ids among `object_ids` that are already stored"""
+        return self.database.list_existing_blob_ids(object_ids)
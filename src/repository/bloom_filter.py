@@ -0,0 +1,52 @@
+import hashlib
+from typing import Iterable
+
+# git's changed-path filter parameters: ~1% false positives
+BITS_PER_ENTRY = 10
+NUM_HASHES = 7
+# above this many changed paths a filter is not worth its size
+MAX_CHANGED_PATHS = 512
+
+
+class BloomFilter:
+    """Fixed-size set of strings that answers "maybe" or "definitely not".
+
+    Each key sets NUM_HASHES bits picked by double hashing a 64-bit blake2b
+    digest. An empty filter contains nothing; the one-byte all-ones filter
+    (see `full`) contains everything.
+    """
+
+    def __init__(self, data: bytes | bytearray):
+        self.data = bytes(data)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str]) -> "BloomFilter":
+        keys = set(keys)
+        if len(keys) > MAX_CHANGED_PATHS:
+            return cls.full()
+        data = bytearray((len(keys) * BITS_PER_ENTRY + 7) // 8)
+        bit_count = len(data) * 8
+        for key in keys:
+            for bit in cls._bits(key, bit_count):
+                data[bit >> 3] |= 1 << (bit & 7)
+        return cls(data)
+
+    @classmethod
+    def full(cls) -> "BloomFilter":
+        return cls(b"\xff")
+
+    def __contains__(self, key: str) -> bool:
+        if not self.data:
+            return False
+        data = self.data
+        return all(
+            data[bit >> 3] & (1 << (bit & 7))
+            for bit in self._bits(key, len(data) * 8)
+        )
+
+    @staticmethod
+    def _bits(key: str, bit_count: int) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        first = int.from_bytes(digest[:4], "little")
+        second = int.from_bytes(digest[4:], "little")
+        return ((first + i * second) % bit_count for i in range(NUM_HASHES))
@@ -0,0 +1,94 @@
+from typing import Optional
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from database.entity.index_tree import IndexTree
+from database.entity.tree_entry import TreeEntry
+from repository.tree import Tree, hash_tree
+from util.path import accumulate_paths
+
+
+class CacheTree:
+    """Build the tree of the index, reusing the cached ids of directories
+    that were not touched since they were last written (see IndexTree).
+
+    Reused directories become leaves of the returned tree: their children are
+    neither loaded nor rehashed.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def build(
+        self, index_entries: list[IndexEntry]
+    ) -> tuple[Tree, list[TreeEntry], list[IndexTree]]:
+        """Returns the index tree, the tree entries to store for it (the root
+        and the children of every rehashed directory) and the cache rows of
+        the rehashed directories."""
+        cached = self.database.list_index_trees()
+        root = self._directory(".", None, cached)
+        tree = Tree(root)
+        tree.index.set(".", root)
+
+        if "." not in cached:
+            for index_entry in index_entries:
+                self._add(tree, index_entry, cached)
+
+        updated_entries: list[TreeEntry] = [root]
+        index_trees: list[IndexTree] = []
+
+        def _hash(path: str, tree_entry: TreeEntry) -> int:
+            count = 0
+            for child in tree_entry.children:
+                if child.entry_type == "blob":
+                    count += 1
+                    continue
+                child_path = f"{path}/{child.entry_name}"
+                if child.entry_object_id is None:
+                    count += _hash(child_path, child)
+                else:
+                    count += cached[child_path].entry_count
+
+            tree_entry.entry_object_id = hash_tree(tree_entry.children)
+            for child in tree_entry.children:
+                child.tree_id = tree_entry.entry_object_id
+                updated_entries.append(child)
+            index_trees.append(IndexTree(path, tree_entry.entry_object_id, count))
+            return count
+
+        if root.entry_object_id is None:
+            _hash(".", root)
+        return tree, updated_entries, index_trees
+
+    def _add(self, tree: Tree, index_entry: IndexEntry, cached: dict[str, IndexTree]):
+        paths = accumulate_paths(index_entry.path)
+        parent = tree.root_entry
+        assert parent is not None
+        for path in paths[1:-1]:
+            directory = tree.get_entry(path)
+            if directory is None:
+                directory = self._directory(path, parent, cached)
+                tree.index.set(path, directory)
+            if directory.entry_object_id is not None:
+                # covered by a cached directory
+                return
+            parent = directory
+
+        blob = TreeEntry(
+            paths[-1].split("/")[-1], index_entry.mode, "blob", index_entry.object_id
+        )
+        parent.append_child(blob)
+        tree.index.set(index_entry.path, blob)
+
+    def _directory(
+        self, path: str, parent: Optional[TreeEntry], cached: dict[str, IndexTree]
+    ) -> TreeEntry:
+        index_tree = cached.get(path)
+        directory = TreeEntry(
+            path.split("/")[-1],
+            "040000",
+            "tree",
+            index_tree.object_id if index_tree is not None else None,
+        )
+        if parent is not None:
+            parent.append_child(directory)
+        return directory
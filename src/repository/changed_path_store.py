@@ -0,0 +1,45 @@
+from typing import Iterable, Optional
+from database.database import Database
+from database.entity.commit_bloom import CommitBloom
+from repository.bloom_filter import BloomFilter
+from util.path import accumulate_paths
+
+
+class ChangedPathStore:
+    """Per-commit Bloom filters of the paths changed against the first parent.
+
+    A filter holds every changed file and each of its parent directories, so
+    both files and directories can be looked up. A negative answer proves a
+    commit left the path alone; only the rest need their trees compared.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def save(self, commit_object_id: str, changed_paths: Iterable[str]) -> None:
+        keys = set()
+        for path in changed_paths:
+            keys.update(accumulate_paths(path)[1:])
+        bloom = BloomFilter.from_keys(keys)
+        self.database.create_commit_bloom(CommitBloom(commit_object_id, bloom.data))
+
+    def may_change(self, object_ids: list[str], path: str) -> list[str]:
+        """Commits that may have changed `path`, including all without a filter"""
+        blooms = self.database.list_commit_blooms(object_ids)
+        return [
+            object_id
+            for object_id in object_ids
+            if object_id not in blooms or path in BloomFilter(blooms[object_id])
+        ]
+
+    def find_path_object_id(self, tree_id: str, path: str) -> Optional[str]:
+        """Object id stored at `path` (e.g. "./a/b.txt") in a commit tree"""
+        object_id: Optional[str] = tree_id
+        for name in path.split("/")[1:]:
+            if not object_id:
+                return None
+            entry = self.database.get_tree_entry(
+                {"tree_id": object_id, "entry_name": name}
+            )
+            object_id = entry.entry_object_id if entry is not None else None
+        return object_id or None
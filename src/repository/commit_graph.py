@@ -0,0 +1,239 @@
+from array import array
+from datetime import datetime
+import heapq
+from typing import Iterator, Optional
+from database.database import Database
+from database.entity.commit import Commit
+from database.entity.commit_graph_entry import CommitGraphEntry
+
+NO_PARENT = -1
+
+
+class CommitGraph:
+    """Parents, generations and dates of all commits held in flat arrays.
+
+    The graph is read with one query and walked in memory, so ancestry
+    questions (log order, merge bases, fast-forward checks) cost no SQL per
+    commit. New commits are appended as they are saved; commits stored
+    without the graph (e.g. by an older version) trigger a rebuild.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self._checked = False
+        self._clear()
+
+    def __len__(self):
+        return len(self._object_ids)
+
+    def load(self) -> "CommitGraph":
+        """Bring the in-memory graph up to date with the database.
+
+        Only the first load counts the commits to find any stored without
+        the graph. Later loads compare the graph size, read off its last
+        position, so keeping in sync costs no scan.
+        """
+        if not self._checked:
+            self._checked = True
+            if self.database.count_commit_graph() != self.database.count_commits():
+                self._rebuild()
+                return self
+        if self.database.get_commit_graph_size() != len(self):
+            self._clear()
+            for row in self.database.iter_commit_graph_rows():
+                self._append_row(*row)
+        return self
+
+    def add(self, commit: Commit, parents: list[Commit]) -> None:
+        """Append a commit just stored with its parents in order"""
+        self.load()
+        if commit.object_id in self._positions:
+            return
+        entry = self._entry(
+            commit.object_id,
+            [self._positions[p.object_id] for p in parents],
+            commit.generation,
+            commit.committer_date,
+        )
+        self.database.create_commit_graph_entries([entry])
+        self._append(entry)
+
+    def parents(self, position: int) -> tuple[int, ...]:
+        first, second = self._parent1[position], self._parent2[position]
+        if first == NO_PARENT:
+            return ()
+        if second == NO_PARENT:
+            return (first,)
+        return (first, second) + self._extra_parents.get(position, ())
+
+    def first_parent(self, object_id: str) -> Optional[str]:
+        """First parent of a commit already in the loaded graph"""
+        position = self._positions.get(object_id)
+        if position is None or self._parent1[position] == NO_PARENT:
+            return None
+        return self._object_ids[self._parent1[position]]
+
+    def iter_ancestry(
+        self, object_id: str, first_parent: bool = False
+    ) -> Iterator[str]:
+        """A commit and its ancestors in log order: highest generation first,
+        then newest commit date"""
+        self.load()
+        start = self._positions.get(object_id)
+        if start is None:
+            return
+        queue = [self._log_key(start)]
+        queued = {start}
+        while queue:
+            _, _, position = heapq.heappop(queue)
+            yield self._object_ids[position]
+            parents = self.parents(position)
+            for parent in parents[:1] if first_parent else parents:
+                if parent not in queued:
+                    queued.add(parent)
+                    heapq.heappush(queue, self._log_key(parent))
+
+    def merge_base(self, one: str, two: str) -> Optional[str]:
+        """Best common ancestor of two commits, found by walking both
+        histories from the highest generation down"""
+        self.load()
+        A, B, BOTH = 1, 2, 3
+        flags: dict[int, int] = {}
+        queue: list[tuple[int, int]] = []
+        for object_id, flag in ((one, A), (two, B)):
+            position = self._positions.get(object_id)
+            if position is None:
+                return None
+            if position not in flags:
+                heapq.heappush(queue, (-self._generations[position], position))
+            flags[position] = flags.get(position, 0) | flag
+
+        while queue:
+            _, position = heapq.heappop(queue)
+            current_flags = flags[position]
+            if current_flags == BOTH:
+                return self._object_ids[position]
+            for parent in self.parents(position):
+                old_flags = flags.get(parent, 0)
+                new_flags = old_flags | current_flags
+                if old_flags != new_flags:
+                    if old_flags == 0:
+                        heapq.heappush(queue, (-self._generations[parent], parent))
+                    flags[parent] = new_flags
+        return None
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """True when `ancestor` is reachable from `descendant` (or is it).
+        Commits below the ancestor's generation are never visited."""
+        self.load()
+        target = self._positions.get(ancestor)
+        start = self._positions.get(descendant)
+        if target is None or start is None:
+            return False
+        min_generation = self._generations[target]
+        stack = [start]
+        seen = {start}
+        while stack:
+            position = stack.pop()
+            if position == target:
+                return True
+            for parent in self.parents(position):
+                if parent not in seen and self._generations[parent] >= min_generation:
+                    seen.add(parent)
+                    stack.append(parent)
+        return False
+
+    def _log_key(self, position: int) -> tuple[int, int, int]:
+        return (
+            -self._generations[position],
+            -self._commit_times[position],
+            position,
+        )
+
+    def _append(self, entry: CommitGraphEntry) -> None:
+        self._append_row(
+            entry.position,
+            entry.object_id,
+            entry.parent1,
+            entry.parent2,
+            entry.extra_parents,
+            entry.generation,
+            entry.commit_time,
+        )
+
+    def _append_row(
+        self,
+        position: int,
+        object_id: str,
+        parent1: int,
+        parent2: int,
+        extra_parents: Optional[str],
+        generation: int,
+        commit_time: int,
+    ) -> None:
+        self._positions[object_id] = position
+        self._object_ids.append(object_id)
+        self._parent1.append(parent1)
+        self._parent2.append(parent2)
+        if extra_parents:
+            self._extra_parents[position] = tuple(
+                int(p) for p in extra_parents.split(",")
+            )
+        self._generations.append(generation)
+        self._commit_times.append(commit_time)
+
+    def _clear(self) -> None:
+        self._object_ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._parent1 = array("l")
+        self._parent2 = array("l")
+        self._extra_parents: dict[int, tuple[int, ...]] = {}
+        self._generations = array("l")
+        self._commit_times = array("q")
+
+    def _entry(
+        self,
+        object_id: str,
+        parents: list[int],
+        generation: int,
+        committer_date: str,
+    ) -> CommitGraphEntry:
+        return CommitGraphEntry(
+            position=len(self),
+            object_id=object_id,
+            parent1=parents[0] if len(parents) > 0 else NO_PARENT,
+            parent2=parents[1] if len(parents) > 1 else NO_PARENT,
+            extra_parents=",".join(map(str, parents[2:])) or None,
+            generation=generation,
+            commit_time=self._commit_time(committer_date),
+        )
+
+    def _rebuild(self) -> None:
+        self._clear()
+        parent_ids: dict[str, list[str]] = {}
+        for commit_id, parent_id in self.database.iter_commit_parent_ids():
+            parent_ids.setdefault(commit_id, []).append(parent_id)
+
+        entries = []
+        for object_id, generation, committer_date in list(
+            self.database.iter_commit_graph_sources()
+        ):
+            parents = [
+                self._positions[p]
+                for p in parent_ids.get(object_id, [])
+                if p in self._positions
+            ]
+            entry = self._entry(object_id, parents, generation, committer_date)
+            self._append(entry)
+            entries.append(entry)
+
+        with self.database.transaction():
+            self.database.delete_commit_graph()
+            self.database.create_commit_graph_entries(entries)
+
+    @staticmethod
+    def _commit_time(committer_date: str) -> int:
+        try:
+            return int(datetime.fromisoformat(committer_date).timestamp())
+        except (TypeError, ValueError):
+            return 0
@@ -1,14 +1,25 @@
 from datetime import datetime
 import hashlib
-from typing import Optional
+import itertools
+from typing import Iterable, Iterator, Optional
 from database.database import Database
 from database.entity.commit import Commit
 from database.entity.commit_parent import CommitParent
+from repository.changed_path_store import ChangedPathStore
+from repository.commit_graph import CommitGraph
+from util.array import chunked
 
 
 class CommitStore:
-    def __init__(self, database: Database):
+    def __init__(
+        self,
+        database: Database,
+        commit_graph: Optional[CommitGraph] = None,
+        changed_path_store: Optional[ChangedPathStore] = None,
+    ):
         self.database = database
+        self.commit_graph = commit_graph or CommitGraph(database)
+        self.changed_path_store = changed_path_store or ChangedPathStore(database)
         
     def _hash(self, commit_data: dict):
         hash_data = "\n".join(map(str, commit_data.values()))
@@ -20,7 +31,11 @@ class CommitStore:
 
     # TODO: config 구현 후 계정 정보 조회 기능 추가 설정
     def save_commit(
-        self, ref_tree_id: str, message: str, parent_commit: Optional[Commit] = None
+        self,
+        ref_tree_id: str,
+        message: str,
+        parent_commit: Optional[Commit] = None,
+        changed_paths: Optional[Iterable[str]] = None,
     ) -> Commit:
         commit_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         commit_data = {
@@ -44,9 +59,22 @@ class CommitStore:
                 new_commit.object_id, parent_commit.object_id, 0
             )
             self.database.create_commit_parent(commit_parent)
-        return self.database.create_commit(new_commit)
+        # the graph row goes first so the graph and commit counts stay equal
+        self.commit_graph.add(
+            new_commit, [parent_commit] if parent_commit is not None else []
+        )
+        self.database.create_commit(new_commit)
+        if changed_paths is not None:
+            self.changed_path_store.save(new_commit.object_id, changed_paths)
+        return new_commit
     
-    def save_merge_commit(self, ref_tree_id: str,parent_commits: list[Commit],  message: Optional[str] = None) -> Commit:
+    def save_merge_commit(
+        self,
+        ref_tree_id: str,
+        parent_commits: list[Commit],
+        message: Optional[str] = None,
+        changed_paths: Optional[Iterable[str]] = None,
+    ) -> Commit:
         commit_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         generation = max([p.generation for p in parent_commits]) + 1
         if message is None:
@@ -68,33 +96,80 @@ class CommitStore:
         commit_data = self._hash(commit_data)
         new_commit = Commit(**commit_data)
         
-        for p in parent_commits:
+        for order, p in enumerate(parent_commits):
             commit_parent = CommitParent(
-                new_commit.object_id, p.object_id, 0
+                new_commit.object_id, p.object_id, order
             )
             self.database.create_commit_parent(commit_parent)
-        return self.database.create_commit(new_commit)
+        self.commit_graph.add(new_commit, parent_commits)
+        self.database.create_commit(new_commit)
+        if changed_paths is not None:
+            self.changed_path_store.save(new_commit.object_id, changed_paths)
+        return new_commit
 
-    # TODO 2개 이상의 parent 에 대한 처리
-    def list_commit_logs(self, commit_object_id: str) -> list[Commit]:
-        current = self.database.get_commit(commit_object_id)
-        if current is None:
-            return []
-        commits: list[Commit] = [current]
-        while current:
-            parents = self.database.get_commit_parents(current.object_id)
-            if not parents:
-                break
-            parent = parents[0]
-            current = self.database.get_commit(parent.parent_id)
-            if current is not None:
-                commits.append(current)
+    def iter_commit_logs(
+        self,
+        commit_object_id: str,
+        max_count: Optional[int] = None,
+        skip: int = 0,
+        first_parent: bool = False,
+        path: Optional[str] = None,
+        page_size: int = 100,
+    ) -> Iterator[Commit]:
+        """Walk the commit-graph in log order, loading commits a page at a time.
+        With `path`, only commits that changed it against their first parent
+        are listed."""
+        object_ids = self.commit_graph.iter_ancestry(commit_object_id, first_parent)
+        if path is not None:
+            object_ids = self._iter_path_changes(object_ids, path, page_size)
+        object_ids = itertools.islice(
+            object_ids,
+            skip,
+            None if max_count is None else skip + max_count,
+        )
+        for page in chunked(object_ids, page_size):
+            commits = {c.object_id: c for c in self.database.list_commits(page)}
+            for object_id in page:
+                yield commits[object_id]
+
+    def _iter_path_changes(
+        self, object_ids: Iterator[str], path: str, page_size: int
+    ) -> Iterator[str]:
+        # the Bloom filters rule out most commits; the rest compare trees
+        for page in chunked(object_ids, page_size):
+            candidates = self.changed_path_store.may_change(page, path)
+            if not candidates:
+                continue
+            first_parents = {
+                object_id: self.commit_graph.first_parent(object_id)
+                for object_id in candidates
+            }
+            commits = {
+                c.object_id: c
+                for c in self.database.list_commits(
+                    candidates + [p for p in first_parents.values() if p is not None]
+                )
+            }
+            for object_id in candidates:
+                parent_id = first_parents[object_id]
+                parent_tree_id = commits[parent_id].tree_id if parent_id else ""
+                if self._path_object_id(
+                    commits[object_id].tree_id, path
+                ) != self._path_object_id(parent_tree_id, path):
+                    yield object_id
+
+    def _path_object_id(self, tree_id: str, path: str) -> Optional[str]:
+        if not tree_id:
+            return None
+        return self.changed_path_store.find_path_object_id(tree_id, path)
+
+    def find_merge_base(self, one: str, two: str) -> Optional[str]:
+        return self.commit_graph.merge_base(one, two)
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        return self.commit_graph.is_ancestor(ancestor, descendant)
 
-        return commits
-    
     def get_commit_parents(self, commit_object_id: str): 
         parents = self.database.get_commit_parents(commit_object_id)
         parent_ids = [p.parent_id for p in parents] 
         return self.database.list_commits(parent_ids)
-        
-
@@ -1,8 +1,12 @@
 import mmap
 from pathlib import Path
+import shutil
+import threading
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
 import zstandard
 
-from util.constant import FILE_SIZE_MEDIUM, FILE_SIZE_SMALL
+from util.constant import DECOMPRESS_CHUNK_SIZE, STREAM_CHUNK_SIZE
+from util.file import open_buffer, read_chunks
 
 
 class CompressFile:
@@ -11,21 +15,60 @@ class CompressFile:
         compression: zstandard.ZstdCompressor,
         decompression: zstandard.ZstdDecompressor,
     ):
-        self.compression = compression
-        self.decompression = decompression
+        # zstd contexts are not thread safe: the given ones serve the thread
+        # creating this, every other thread gets its own
+        self._local = threading.local()
+        self._local.compression = compression
+        self._local.decompression = decompression
 
     def compress(self, path: Path) -> bytes:
-        stat = path.stat()
-        if stat.st_size <= FILE_SIZE_SMALL:
-            return self.compression.compress(path.read_bytes())
-        elif stat.st_size <= FILE_SIZE_MEDIUM:
-            with open(path, "rb") as f:
-                with mmap.mmap(
-                    f.fileno(), length=0, access=mmap.ACCESS_READ
-                ) as mmap_file:
-                    return self.compression.compress(mmap_file)
-        else:
-            raise NotImplementedError("File is too large")
+        with open_buffer(path, path.stat().st_size) as buffer:
+            return self.compress_buffer(buffer)
+
+    def compress_buffer(self, buffer: bytes | mmap.mmap) -> bytes:
+        return self._compression().compress(buffer)
+
+    def compress_stream(
+        self,
+        path: Path,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        on_read: Optional[Callable[[memoryview], None]] = None,
+    ) -> Iterator[bytes]:
+        """Compress a file read in fixed-size chunks into chunks of exactly
+        `chunk_size` bytes (but the last), for files too large to hold
+        compressed in memory. `on_read` sees every chunk read, e.g. to hash
+        the file in the same pass."""
+        chunker = self._compression().chunker(chunk_size=chunk_size)
+        for data in read_chunks(path, chunk_size):
+            if on_read is not None:
+                on_read(data)
+            yield from chunker.compress(data)
+        yield from chunker.finish()
 
     def decompress(self, data: bytes) -> bytes:
-        return self.decompression.decompress(data)
+        return self._decompression().decompress(data)
+
+    def decompress_to(self, data: bytes | Iterable[bytes], file: BinaryIO) -> None:
+        """Stream-decompress `data`, whole or in chunks, into `file` without
+        materializing the content.
+        """
+        decompression = self._decompression()
+        if isinstance(data, bytes):
+            with decompression.stream_reader(data) as reader:
+                shutil.copyfileobj(reader, file, DECOMPRESS_CHUNK_SIZE)
+            return
+        with decompression.stream_writer(file, closefd=False) as writer:
+            for chunk in data:
+                writer.write(chunk)
+
+    def _compression(self) -> zstandard.ZstdCompressor:
+        compression = getattr(self._local, "compression", None)
+        if compression is None:
+            compression = self._local.compression = zstandard.ZstdCompressor()
+        return compression
+
+    def _decompression(self) -> zstandard.ZstdDecompressor:
+        decompression = getattr(self._local, "decompression", None)
+        if decompression is None:
+            decompression = self._local.decompression = zstandard.ZstdDecompressor()
+        return decompression
@@ -1,10 +1,16 @@
 from datetime import datetime
+import os
 from pathlib import Path
+import time
+from typing import Iterator, Optional
 from database.entity.blob import Blob
 from database.entity.index_entry import IndexEntry
 from repository.compress_file import CompressFile
 from repository.hash_file import HashFile
 from repository.repo_path import RepositoryPath
+from repository.worktree import WorktreeFile
+from util.constant import FILE_SIZE_MEDIUM, RACY_TIMESTAMP_NS
+from util.file import open_buffer
 
 
 class Convert:
@@ -13,36 +19,99 @@ class Convert:
         hash_file: HashFile,
         compress_file: CompressFile,
         repo_path: RepositoryPath,
+        stream_size: int = FILE_SIZE_MEDIUM,
     ):
         self.hash_file = hash_file
         self.compress_file = compress_file
         self.repo_path = repo_path
+        # blobs of larger files are compressed from the file as a stream
+        self.stream_size = stream_size
+
+    def path_to_index_entry(
+        self, path: Path, cached_entries: Optional[dict[str, IndexEntry]] = None
+    ) -> IndexEntry:
+        """Build the index entry of a worktree file.
+
+        When `cached_entries` holds an entry for the path whose stat data still
+        matches the file, that entry is returned without reading the file.
+        """
+        entry, _ = self.path_to_index_entry_and_blob(path, cached_entries, False)
+        return entry
+
+    def path_to_index_entry_and_blob(
+        self,
+        path: Path,
+        cached_entries: Optional[dict[str, IndexEntry]] = None,
+        with_blob: bool = True,
+    ) -> tuple[IndexEntry, Optional[Blob]]:
+        file = WorktreeFile(
+            self.repo_path.normalize_relative_path(path), path, path.stat()
+        )
+        return self.worktree_file_to_index_entry_and_blob(
+            file, cached_entries, with_blob
+        )
+
+    def worktree_file_to_index_entry_and_blob(
+        self,
+        file: WorktreeFile,
+        cached_entries: Optional[dict[str, IndexEntry]] = None,
+        with_blob: bool = True,
+    ) -> tuple[IndexEntry, Optional[Blob]]:
+        """Build the index entry and blob of a worktree file from a single read.
+
+        The stat taken by the worktree walk is reused, and the content is read
+        into one buffer that is both hashed and compressed. The blob is only
+        built when the content differs from the cached entry, so it is None
+        for unchanged files. Files above `stream_size` are not read here when
+        a blob is wanted: the entry and blob get no object id and the blob no
+        data, both come from `compress_streamed_blob`.
+        """
+        stat = file.stat
+        cached = cached_entries.get(file.path) if cached_entries else None
+        if cached is not None and cached.is_stat_match(stat):
+            return cached, None
+
+        blob = None
+        if stat.st_size > self.stream_size and with_blob:
+            object_id = ""
+            blob = Blob(
+                object_id=object_id,
+                data=None,
+                size=stat.st_size,
+                created_at=datetime.now(),
+            )
+        elif stat.st_size > self.stream_size:
+            object_id = self.hash_file.hash_stream(file.absolute_path)
+        else:
+            with open_buffer(file.absolute_path, stat.st_size) as buffer:
+                object_id = self.hash_file.hash_buffer(buffer)
+                if with_blob and (cached is None or cached.object_id != object_id):
+                    blob = Blob(
+                        object_id=object_id,
+                        data=self.compress_file.compress_buffer(buffer),
+                        size=stat.st_size,
+                        created_at=datetime.now(),
+                    )
 
-    def path_to_index_entry(self, path: Path) -> IndexEntry:
-        stat = path.stat()
-        object_id = self.hash_file.hash(path)
-        file_path = self.repo_path.normalize_relative_path(path)
         entry = IndexEntry(
             object_id=object_id,
-            path=file_path,
+            path=file.path,
             mode=oct(stat.st_mode),
-            size=stat.st_size,
         )
-        return entry
+        self.apply_stat(entry, stat)
+        return entry, blob
 
-    def path_to_blob(self, path: Path) -> Blob:
-        hash = self.hash_file.hash(path)
-        compressed = self.compress_file.compress(path)
-        stat = path.stat()
-        blob = Blob(
-            object_id=hash,
-            data=compressed,
-            size=stat.st_size,
-            created_at=datetime.now(),
-        )
-        return blob
+    def compress_streamed_blob(self, blob: Blob, path: Path) -> Iterator[bytes]:
+        """Compressed chunks of a file too large to buffer, hashing the same
+        reads so the id always matches the data: `blob.object_id` is set
+        once the last chunk is yielded"""
+        sha1 = self.hash_file.new()
+        yield from self.compress_file.compress_stream(path, on_read=sha1.update)
+        blob.object_id = sha1.hexdigest()
 
-    def index_entry_to_blob(self, entry: IndexEntry) -> Blob:
-        path = self.repo_path.worktree_path / entry.path
-        blob = self.path_to_blob(path)
-        return blob
+    def apply_stat(self, entry: IndexEntry, stat: os.stat_result) -> IndexEntry:
+        # a write landing in the same timestamp tick as the hash would keep
+        # the same stat data, so racily clean files are not cached
+        racy = time.time_ns() - stat.st_mtime_ns < RACY_TIMESTAMP_NS
+        entry.set_stat(stat, cacheable=not racy)
+        return entry
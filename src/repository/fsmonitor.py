@@ -0,0 +1,467 @@
+import ctypes
+import ctypes.util
+from dataclasses import dataclass, field
+import errno
+import json
+import os
+from pathlib import Path
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+from repository.repo_path import RepositoryPath
+from util.constant import GITOY_IGNORE_FILE
+from util.result import Result
+
+FSMONITOR_PID_FILE = "fsmonitor.pid"
+FSMONITOR_LOG_FILE = "fsmonitor.log"
+FSMONITOR_STATE_FILE = "fsmonitor.state"
+FSMONITOR_COOKIE_PREFIX = "fsmonitor-cookie-"
+FSMONITOR_LOG_HEADER = "gitoy-fsmonitor "
+FSMONITOR_COOKIE_LINE = "cookie "
+
+# the log is restarted past this size; clients then rescan once
+FSMONITOR_LOG_MAX_SIZE = 16 * 1024 * 1024
+# more changed paths than this are cheaper to find with a full walk
+FSMONITOR_MAX_PATHS = 5000
+FSMONITOR_SYNC_TIMEOUT = 2.0
+FSMONITOR_POLL_INTERVAL = 1.0
+FSMONITOR_COOKIE_POLL_INTERVAL = 0.05
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+)
+
+
+@dataclass
+class WatchEvents:
+    """Changes seen by a watcher since its last read
+
+    Attributes:
+        paths: Changed worktree paths, e.g. "./dir/file.txt"
+        cookies: Names of the sync cookie files created in the repository dir
+        overflow: True when events were lost and every path may have changed
+    """
+
+    paths: list[str] = field(default_factory=list)
+    cookies: list[str] = field(default_factory=list)
+    overflow: bool = False
+
+
+@dataclass
+class FsMonitorState:
+    """What the last status saw, saved in the repository dir
+
+    Attributes:
+        instance: Id of the daemon log the offset refers to
+        offset: Log offset up to which changes were examined
+        unclean: Paths that had unstaged changes at that point
+    """
+
+    instance: str
+    offset: int
+    unclean: list[str]
+
+
+@dataclass
+class FsMonitorSync:
+    """Result of syncing with the daemon
+
+    Attributes:
+        instance: Id of the current daemon log
+        offset: Log offset covering every change made before the sync
+        changed: Paths to examine since the saved state (including its unclean
+            paths), None when the saved state cannot be used
+    """
+
+    instance: str
+    offset: int
+    changed: Optional[set[str]]
+
+
+class InotifyWatcher:
+    """Watches every worktree directory with Linux inotify through ctypes"""
+
+    def __init__(self, root: Path, repo_dir: Path):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.root = root
+        self.repo_dir = os.fspath(repo_dir)
+        self.dirs: dict[int, str] = {}
+        try:
+            self.repo_wd = self._add_watch(self.repo_dir, IN_CREATE | IN_ONLYDIR)
+            self._watch_tree(os.fspath(root), ".")
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: str, mask: int) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        return wd
+
+    def _watch_tree(self, path: str, prefix: str):
+        """Watch `path` and every directory below it. Raises OSError when a
+        watch cannot be added, e.g. with ENOSPC once max_user_watches is
+        used up, since changes below it would go unnoticed."""
+        stack = [(path, prefix)]
+        while stack:
+            dir_path, dir_prefix = stack.pop()
+            try:
+                self.dirs[self._add_watch(dir_path, INOTIFY_MASK)] = dir_prefix
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        if (
+                            entry.is_dir(follow_symlinks=False)
+                            and entry.path != self.repo_dir
+                        ):
+                            stack.append((entry.path, f"{dir_prefix}/{entry.name}"))
+            except OSError as error:
+                if error.errno in (errno.ENOENT, errno.ENOTDIR):
+                    # removed while being watched, its parent reports the deletion
+                    continue
+                raise
+
+    def read(self, timeout: float) -> WatchEvents:
+        events = WatchEvents()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return events
+
+        data = b""
+        while True:
+            try:
+                data += os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.overflow = True
+                continue
+            if wd == self.repo_wd:
+                if name.startswith(FSMONITOR_COOKIE_PREFIX):
+                    events.cookies.append(name)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            prefix = self.dirs.get(wd)
+            if prefix is None or not name:
+                continue
+            path = f"{prefix}/{name}"
+            events.paths.append(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._watch_tree(os.path.join(self.root, path), path)
+                except OSError:
+                    # the new directory is not fully watched: like an
+                    # overflow, the next query rescans the worktree
+                    events.overflow = True
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Finds changes by comparing stat snapshots of the worktree.
+
+    Used where inotify is unavailable. A sync cookie triggers an immediate
+    rescan so a status never misses changes made before it started.
+    """
+
+    def __init__(
+        self, root: Path, repo_dir: Path, interval: float = FSMONITOR_POLL_INTERVAL
+    ):
+        self.root = os.fspath(root)
+        self.repo_dir = os.fspath(repo_dir)
+        self.interval = interval
+        self.seen_cookies: set[str] = set()
+        self.snapshot = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self) -> dict[str, tuple[int, int, int, int, int]]:
+        snapshot = {}
+        stack = [(self.root, ".")]
+        while stack:
+            dir_path, dir_prefix = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        path = f"{dir_prefix}/{entry.name}"
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path != self.repo_dir:
+                                stack.append((entry.path, path))
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        snapshot[path] = (
+                            stat.st_mode,
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            stat.st_ctime_ns,
+                            stat.st_ino,
+                        )
+            except OSError:
+                continue
+        return snapshot
+
+    def read(self, timeout: float) -> WatchEvents:
+        time.sleep(min(timeout, FSMONITOR_COOKIE_POLL_INTERVAL))
+        cookies = {
+            name
+            for name in os.listdir(self.repo_dir)
+            if name.startswith(FSMONITOR_COOKIE_PREFIX)
+        }
+        new_cookies = sorted(cookies - self.seen_cookies)
+        self.seen_cookies = cookies
+        if not new_cookies and time.monotonic() < self.next_scan:
+            return WatchEvents()
+
+        snapshot = self._scan()
+        paths = [
+            path
+            for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        ]
+        self.snapshot = snapshot
+        self.next_scan = time.monotonic() + self.interval
+        return WatchEvents(sorted(paths), new_cookies)
+
+    def close(self):
+        pass
+
+
+class FsMonitor:
+    """Background process recording changed worktree paths for status.
+
+    The daemon appends changed paths to a log in the repository dir. A
+    status syncs with it by creating a cookie file and waiting for the cookie
+    to show up in the log, then only examines the paths logged since the
+    offset saved by the previous status (plus the paths that were unclean
+    then). A new daemon, a lost event or a changed .gitoyignore starts a new
+    log, which makes the next status walk the whole worktree once.
+    """
+
+    def __init__(self, repository_path: RepositoryPath):
+        self.repo_path = repository_path
+
+    def _file(self, name: str) -> Optional[Path]:
+        repo_dir = self.repo_path.repo_dir
+        return None if repo_dir is None else repo_dir / name
+
+    def get_pid(self) -> Optional[int]:
+        pid_file = self._file(FSMONITOR_PID_FILE)
+        if pid_file is None:
+            return None
+        try:
+            pid = int(pid_file.read_text())
+            os.kill(pid, 0)
+        except (OSError, ValueError):
+            return None
+        return pid
+
+    def is_running(self) -> bool:
+        return self.get_pid() is not None
+
+    def start(self) -> Result[int]:
+        if self.repo_path.repo_dir is None:
+            return Result.Fail("Not a gitoy repository")
+        pid = self.get_pid()
+        if pid is not None:
+            return Result.Fail(f"fsmonitor is already running (pid {pid})")
+
+        src_dir = Path(__file__).resolve().parent.parent
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(src_dir), env.get("PYTHONPATH")])
+        )
+        subprocess.Popen(
+            [sys.executable, "-m", "cli", "fsmonitor", "run"],
+            cwd=self.repo_path.worktree_path,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + FSMONITOR_SYNC_TIMEOUT
+        while time.monotonic() < deadline:
+            pid = self.get_pid()
+            if pid is not None:
+                return Result.Ok(pid)
+            time.sleep(FSMONITOR_COOKIE_POLL_INTERVAL)
+        return Result.Fail("fsmonitor did not start")
+
+    def stop(self) -> Result[None]:
+        pid = self.get_pid()
+        if pid is None:
+            return Result.Fail("fsmonitor is not running")
+        os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + FSMONITOR_SYNC_TIMEOUT
+        while time.monotonic() < deadline and self.get_pid() is not None:
+            time.sleep(FSMONITOR_COOKIE_POLL_INTERVAL)
+        return Result.Ok(None)
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Run the daemon in the foreground until SIGTERM or `stop` is set"""
+        repo_dir = self.repo_path.repo_dir
+        pid_file = self._file(FSMONITOR_PID_FILE)
+        assert repo_dir is not None and pid_file is not None
+        root = self.repo_path.worktree_path
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+        try:
+            watcher = InotifyWatcher(root, repo_dir)
+        except OSError:
+            watcher = PollingWatcher(root, repo_dir)
+
+        log = self._start_log()
+        pid_file.write_text(str(os.getpid()))
+        try:
+            while stop is None or not stop.is_set():
+                events = watcher.read(FSMONITOR_POLL_INTERVAL)
+                restart = (
+                    events.overflow
+                    or log.tell() > FSMONITOR_LOG_MAX_SIZE
+                    or any(p.endswith("/" + GITOY_IGNORE_FILE) for p in events.paths)
+                )
+                if restart:
+                    log.close()
+                    log = self._start_log()
+                else:
+                    log.writelines(
+                        f"{path}\n" for path in dict.fromkeys(events.paths)
+                    )
+                log.writelines(
+                    f"{FSMONITOR_COOKIE_LINE}{cookie}\n" for cookie in events.cookies
+                )
+                log.flush()
+        finally:
+            log.close()
+            watcher.close()
+            pid_file.unlink(missing_ok=True)
+
+    def _start_log(self):
+        log_file = self._file(FSMONITOR_LOG_FILE)
+        assert log_file is not None
+        instance = f"{os.getpid()}-{time.time_ns()}"
+        tmp_file = log_file.with_name(log_file.name + ".tmp")
+        tmp_file.write_text(f"{FSMONITOR_LOG_HEADER}{instance}\n")
+        os.replace(tmp_file, log_file)
+        return open(log_file, "a", encoding="utf-8")
+
+    def sync(self) -> Optional[FsMonitorSync]:
+        """Wait until the daemon logged every change made before this call.
+
+        Returns None when no daemon is running or it does not answer in time.
+        """
+        if not self.is_running():
+            return None
+        log_file = self._file(FSMONITOR_LOG_FILE)
+        cookie_file = self._file(
+            f"{FSMONITOR_COOKIE_PREFIX}{os.getpid()}-{time.time_ns()}"
+        )
+        assert log_file is not None and cookie_file is not None
+        state = self.load_state()
+
+        cookie_file.touch()
+        try:
+            deadline = time.monotonic() + FSMONITOR_SYNC_TIMEOUT
+            while time.monotonic() < deadline:
+                synced = self._read_log(log_file, cookie_file.name, state)
+                if synced is not None:
+                    return synced
+                time.sleep(FSMONITOR_COOKIE_POLL_INTERVAL)
+            return None
+        finally:
+            cookie_file.unlink(missing_ok=True)
+
+    def _read_log(
+        self, log_file: Path, cookie: str, state: Optional[FsMonitorState]
+    ) -> Optional[FsMonitorSync]:
+        try:
+            with open(log_file, "rb") as f:
+                header = f.readline().decode()
+                instance = header.removeprefix(FSMONITOR_LOG_HEADER).strip()
+                same_instance = state is not None and state.instance == instance
+                if same_instance and state is not None:
+                    f.seek(state.offset)
+
+                cookie_line = f"{FSMONITOR_COOKIE_LINE}{cookie}"
+                changed: set[str] = set()
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        break
+                    line = raw_line.decode().rstrip("\n")
+                    if line == cookie_line:
+                        if not same_instance or state is None:
+                            return FsMonitorSync(instance, f.tell(), None)
+                        return FsMonitorSync(
+                            instance, f.tell(), changed | set(state.unclean)
+                        )
+                    if not line.startswith(FSMONITOR_COOKIE_LINE):
+                        changed.add(line)
+        except OSError:
+            return None
+        return None
+
+    def load_state(self) -> Optional[FsMonitorState]:
+        state_file = self._file(FSMONITOR_STATE_FILE)
+        if state_file is None:
+            return None
+        try:
+            return FsMonitorState(**json.loads(state_file.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save_state(self, state: FsMonitorState):
+        state_file = self._file(FSMONITOR_STATE_FILE)
+        if state_file is None:
+            return
+        tmp_file = state_file.with_name(state_file.name + ".tmp")
+        tmp_file.write_text(json.dumps(state.__dict__))
+        os.replace(tmp_file, state_file)
@@ -2,24 +2,30 @@ import hashlib
 import mmap
 from pathlib import Path
 
-from util.constant import FILE_SIZE_MEDIUM, FILE_SIZE_SMALL
+from util.constant import FILE_SIZE_MEDIUM
+from util.file import open_buffer, read_chunks
 
 
 class HashFile:
     def hash(self, path: Path) -> str:
-        stat = path.stat()
-        size = stat.st_size
-        sha1 = hashlib.sha1()
+        size = path.stat().st_size
+        if size > FILE_SIZE_MEDIUM:
+            return self.hash_stream(path)
+        with open_buffer(path, size) as buffer:
+            return self.hash_buffer(buffer)
 
-        if size <= FILE_SIZE_SMALL:
-            sha1.update(path.read_bytes())
-            return sha1.hexdigest()
-        elif size <= FILE_SIZE_MEDIUM:
-            with open(path, "rb") as f:
-                with mmap.mmap(
-                    f.fileno(), length=0, access=mmap.ACCESS_READ
-                ) as mmap_file:
-                    sha1.update(mmap_file)
-                    return sha1.hexdigest()
-        else:
-            raise ValueError("File is too large")
+    def hash_stream(self, path: Path) -> str:
+        """Same id as `hash_buffer` of the whole content, from fixed-size reads"""
+        sha1 = self.new()
+        for chunk in read_chunks(path):
+            sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def hash_buffer(self, buffer: bytes | mmap.mmap) -> str:
+        sha1 = self.new()
+        sha1.update(buffer)
+        return sha1.hexdigest()
+
+    def new(self) -> "hashlib._Hash":
+        """Incremental hash giving object ids with `hexdigest`"""
+        return hashlib.sha1()
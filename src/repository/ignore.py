@@ -0,0 +1,137 @@
+import re
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+
+class IgnoreRules:
+    """Patterns of one .gitoyignore file, compiled into combined regexes.
+
+    Follows the gitignore format: `#` comments, `!` negation, a trailing `/`
+    for directory-only patterns, and patterns containing a `/` anchored to
+    the directory of the ignore file. The last matching pattern wins, so the
+    patterns are joined in reverse order and the first matching group decides.
+
+    Attributes:
+        base: Directory of the ignore file as a walk prefix, e.g. "." or "./src"
+    """
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        patterns = [p for p in map(parse_pattern, lines) if p is not None]
+        self.negations = [negate for _, negate, _ in patterns]
+        self.dir_regex = self._compile(
+            [(i, regex) for i, (regex, _, _) in enumerate(patterns)]
+        )
+        self.file_regex = self._compile(
+            [
+                (i, regex)
+                for i, (regex, _, dir_only) in enumerate(patterns)
+                if not dir_only
+            ]
+        )
+
+    @staticmethod
+    def load(path: Path, base: str) -> Optional["IgnoreRules"]:
+        try:
+            lines = path.read_text(errors="replace").splitlines()
+        except OSError:
+            return None
+        rules = IgnoreRules(base, lines)
+        return rules if rules.negations else None
+
+    @staticmethod
+    def _compile(patterns: list[tuple[int, str]]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        return re.compile(
+            "|".join(f"(?P<p{i}>{regex})" for i, regex in reversed(patterns)),
+            re.DOTALL,
+        )
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True if `path` is ignored, False if re-included by a negated
+        pattern, None if no pattern matches it."""
+        regex = self.dir_regex if is_dir else self.file_regex
+        if regex is None:
+            return None
+        matched = regex.fullmatch(path[len(self.base) + 1 :])
+        if matched is None or matched.lastgroup is None:
+            return None
+        return not self.negations[int(matched.lastgroup[1:])]
+
+
+def is_ignored(rules: Sequence[IgnoreRules], path: str, is_dir: bool) -> bool:
+    """Whether `path` is ignored; rules of deeper ignore files come last and
+    take precedence."""
+    for rule in reversed(rules):
+        matched = rule.match(path, is_dir)
+        if matched is not None:
+            return matched
+    return False
+
+
+def parse_pattern(line: str) -> Optional[tuple[str, bool, bool]]:
+    """Parse one ignore file line into (regex, negate, dir_only)"""
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line[:-1]
+    if not line:
+        return None
+
+    anchored = "/" in line
+    regex = translate_pattern(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negate, dir_only
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate a glob pattern into a regex; `*`, `?` and `[...]` do not match
+    `/`, `**/` matches any leading directories and `/**` everything inside."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if pattern.startswith("/", i + 2):
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                    continue
+            while i + 1 < n and pattern[i + 1] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"(?!/)[{body}]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 1
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
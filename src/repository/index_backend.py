@@ -0,0 +1,141 @@
+from typing import Optional
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from repository.index_file import IndexFile, IndexSnapshot
+
+
+class SqliteIndexBackend:
+    """Index entries as rows of the index_entry table"""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def list_all(self) -> list[IndexEntry]:
+        return self.database.list_index_entries()
+
+    def list_by_paths(self, paths: list[str]) -> list[IndexEntry]:
+        return self.database.list_index_entries_by_paths(paths)
+
+    def list_by_prefixes(self, prefixes: list[str]) -> list[IndexEntry]:
+        return self.database.list_index_entries_by_paths_startwith(prefixes)
+
+    def create(self, entries: list[IndexEntry]) -> None:
+        self.database.create_index_entries(entries)
+
+    def update(self, entries: list[IndexEntry]) -> None:
+        self.database.delete_index_entries(entries)
+        self.database.create_index_entries(entries)
+
+    def delete(self, entries: list[IndexEntry]) -> None:
+        self.database.delete_index_entries(entries)
+
+    def update_stats(self, entries: list[IndexEntry]) -> None:
+        self.database.update_index_entry_stats(entries)
+
+
+class FileIndexBackend:
+    """Index entries in a memory-mapped snapshot file (see IndexFile).
+
+    Reads go to the mapped snapshot until the first write, which loads the
+    entries into a dict. The file is rewritten once the surrounding database
+    transaction commits, so it never refers to blobs that were rolled back.
+    Without a snapshot file the entries of the index_entry table are used,
+    which moves an existing index over on the first write.
+    """
+
+    def __init__(self, index_file: IndexFile, database: Database):
+        self.index_file = index_file
+        self.database = database
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._entries: Optional[dict[str, IndexEntry]] = None
+        self._pending = False
+
+    def _load_snapshot(self) -> Optional[IndexSnapshot]:
+        if self._snapshot is None and self.index_file.exists():
+            self._snapshot = self.index_file.load()
+        return self._snapshot
+
+    def _load_entries(self) -> dict[str, IndexEntry]:
+        if self._entries is None:
+            snapshot = self._load_snapshot()
+            entries = (
+                snapshot if snapshot is not None else self.database.list_index_entries()
+            )
+            self._entries = {entry.path: entry for entry in entries}
+        return self._entries
+
+    def list_all(self) -> list[IndexEntry]:
+        if self._entries is None:
+            snapshot = self._load_snapshot()
+            if snapshot is not None:
+                return list(snapshot)
+        return sorted(self._load_entries().values(), key=lambda e: e.path.encode())
+
+    def list_by_paths(self, paths: list[str]) -> list[IndexEntry]:
+        if self._entries is None:
+            snapshot = self._load_snapshot()
+            if snapshot is not None:
+                found = (snapshot.find(path) for path in dict.fromkeys(paths))
+                return [entry for entry in found if entry is not None]
+        entries = self._load_entries()
+        return [entries[path] for path in dict.fromkeys(paths) if path in entries]
+
+    def list_by_prefixes(self, prefixes: list[str]) -> list[IndexEntry]:
+        if self._entries is None:
+            snapshot = self._load_snapshot()
+            if snapshot is not None:
+                found = {
+                    entry.path: entry
+                    for prefix in prefixes
+                    for entry in snapshot.iter_prefix(prefix)
+                }
+                return list(found.values())
+        return [
+            entry
+            for entry in self.list_all()
+            if any(entry.path.startswith(prefix) for prefix in prefixes)
+        ]
+
+    def create(self, entries: list[IndexEntry]) -> None:
+        self._write(entries, entries)
+
+    def update(self, entries: list[IndexEntry]) -> None:
+        self._write(entries, entries)
+
+    def delete(self, entries: list[IndexEntry]) -> None:
+        self._write(entries, [])
+
+    def update_stats(self, entries: list[IndexEntry]) -> None:
+        index = self._load_entries()
+        for entry in entries:
+            if entry.path in index:
+                index[entry.path] = entry
+        self._schedule_flush()
+
+    def _write(self, removed: list[IndexEntry], added: list[IndexEntry]) -> None:
+        self.database.invalidate_index_trees(removed)
+        index = self._load_entries()
+        for entry in removed:
+            index.pop(entry.path, None)
+        for entry in added:
+            index[entry.path] = entry
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._pending:
+            return
+        self._pending = True
+        self.database.sqlite.on_commit(self._flush, self._discard)
+
+    def _flush(self) -> None:
+        self._pending = False
+        assert self._entries is not None
+        self.index_file.write(self._entries.values())
+        self._snapshot = None
+
+    def _discard(self) -> None:
+        self._pending = False
+        self._entries = None
+
+
+IndexBackend = SqliteIndexBackend | FileIndexBackend
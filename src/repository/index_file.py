@@ -0,0 +1,180 @@
+import bisect
+import mmap
+import os
+from pathlib import Path
+import re
+import struct
+from typing import Iterable, Iterator, Optional
+import zlib
+
+from database.entity.index_entry import IndexEntry
+
+INDEX_FILE_SIGNATURE = b"GIDX"
+INDEX_FILE_VERSION = 1
+
+# signature, version, entry count
+HEADER = struct.Struct("<4sII")
+# path offset, path length, object id length, flags, mode,
+# size, mtime_ns, ctime_ns, inode, dev
+RECORD = struct.Struct("<IHBBIqqqQQ")
+CHECKSUM = struct.Struct("<I")
+
+# a set flag means the stat field is None
+NULL_FIELDS = ("size", "mtime_ns", "ctime_ns", "inode", "dev")
+NULL_FIELDS_MASK = (1 << len(NULL_FIELDS)) - 1
+# object id stored as 20 raw bytes instead of its 40 hex digits
+FLAG_BINARY_OBJECT_ID = 1 << len(NULL_FIELDS)
+OBJECT_ID_PATTERN = re.compile("[0-9a-f]{40}")
+# mode written the way oct() formats it ("0o100644") rather than "100644"
+FLAG_OCTAL_PREFIX = FLAG_BINARY_OBJECT_ID << 1
+
+
+class IndexFileError(Exception):
+    pass
+
+
+def _decode(
+    strings, base: int, offset, path_length, object_id_length, flags, mode, *stat
+) -> IndexEntry:
+    start = base + offset
+    end = start + path_length
+    object_id = strings[end : end + object_id_length]
+    if flags & NULL_FIELDS_MASK:
+        stat = [None if flags & (1 << bit) else value for bit, value in enumerate(stat)]
+    return IndexEntry(
+        strings[start:end].decode(),
+        object_id.hex() if flags & FLAG_BINARY_OBJECT_ID else object_id.decode(),
+        oct(mode) if flags & FLAG_OCTAL_PREFIX else f"{mode:06o}",
+        *stat,
+    )
+
+
+class IndexSnapshot:
+    """Read-only view of an index file mapped into memory.
+
+    Records are fixed width and sorted by path, so lookups binary search the
+    mapping and only the entries that are asked for become IndexEntry objects.
+
+    Layout: header, `count` records, string table (path then object id of
+    each record, addressed by the record), crc32 of everything before it.
+    """
+
+    def __init__(self, buffer, count: int):
+        self._buffer = buffer
+        self._count = count
+        self._strings = HEADER.size + RECORD.size * count
+
+    @staticmethod
+    def load(path: Path) -> "IndexSnapshot":
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size + CHECKSUM.size:
+                raise IndexFileError(f"Index file '{path}' is truncated")
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, version, count = HEADER.unpack_from(buffer, 0)
+        if signature != INDEX_FILE_SIGNATURE:
+            raise IndexFileError(f"Index file '{path}' has a bad signature")
+        if version != INDEX_FILE_VERSION:
+            raise IndexFileError(
+                f"Index file '{path}' has unsupported version {version}"
+            )
+        if size < HEADER.size + RECORD.size * count + CHECKSUM.size:
+            raise IndexFileError(f"Index file '{path}' is truncated")
+        (checksum,) = CHECKSUM.unpack_from(buffer, size - CHECKSUM.size)
+        with memoryview(buffer) as view:
+            if zlib.crc32(view[: size - CHECKSUM.size]) != checksum:
+                raise IndexFileError(f"Index file '{path}' is corrupt")
+        return IndexSnapshot(buffer, count)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        # one pass over the records, decoding from a copy of the string table
+        strings = self._buffer[self._strings : len(self._buffer) - CHECKSUM.size]
+        with memoryview(self._buffer) as view:
+            for record in RECORD.iter_unpack(view[HEADER.size : self._strings]):
+                yield _decode(strings, 0, *record)
+
+    def path_bytes(self, i: int) -> bytes:
+        offset, length = struct.unpack_from(
+            "<IH", self._buffer, HEADER.size + RECORD.size * i
+        )
+        start = self._strings + offset
+        return self._buffer[start : start + length]
+
+    def entry(self, i: int) -> IndexEntry:
+        record = RECORD.unpack_from(self._buffer, HEADER.size + RECORD.size * i)
+        return _decode(self._buffer, self._strings, *record)
+
+    def find(self, path: str) -> Optional[IndexEntry]:
+        key = path.encode()
+        i = bisect.bisect_left(range(self._count), key, key=self.path_bytes)
+        if i < self._count and self.path_bytes(i) == key:
+            return self.entry(i)
+        return None
+
+    def iter_prefix(self, prefix: str) -> Iterator[IndexEntry]:
+        """Entries whose path starts with `prefix`, in path order"""
+        key = prefix.encode()
+        i = bisect.bisect_left(range(self._count), key, key=self.path_bytes)
+        while i < self._count and self.path_bytes(i).startswith(key):
+            yield self.entry(i)
+            i += 1
+
+
+class IndexFile:
+    """The index stored as one snapshot file, replaced atomically on write"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> IndexSnapshot:
+        return IndexSnapshot.load(self.path)
+
+    def write(self, entries: Iterable[IndexEntry]) -> None:
+        encoded = sorted(
+            ((entry.path.encode(), entry) for entry in entries),
+            key=lambda item: item[0],
+        )
+        records = bytearray(
+            HEADER.pack(INDEX_FILE_SIGNATURE, INDEX_FILE_VERSION, len(encoded))
+        )
+        strings = bytearray()
+        for path, entry in encoded:
+            flags = 0
+            stat = []
+            for bit, field in enumerate(NULL_FIELDS):
+                value = getattr(entry, field)
+                if value is None:
+                    flags |= 1 << bit
+                    value = 0
+                stat.append(value)
+            if OBJECT_ID_PATTERN.fullmatch(entry.object_id):
+                object_id = bytes.fromhex(entry.object_id)
+                flags |= FLAG_BINARY_OBJECT_ID
+            else:
+                object_id = entry.object_id.encode()
+            if entry.mode.startswith("0o"):
+                flags |= FLAG_OCTAL_PREFIX
+            records += RECORD.pack(
+                len(strings),
+                len(path),
+                len(object_id),
+                flags,
+                int(entry.mode, 8),
+                *stat,
+            )
+            strings += path
+            strings += object_id
+        records += strings
+        records += CHECKSUM.pack(zlib.crc32(records))
+
+        temporary_path = self.path.with_name(self.path.name + ".lock")
+        with open(temporary_path, "wb") as file:
+            file.write(records)
+        os.replace(temporary_path, self.path)
@@ -1,37 +1,53 @@
 from pathlib import Path
+from typing import Optional, Sequence
 from database.database import Database
 from database.entity.index_entry import IndexEntry
+from repository.index_backend import IndexBackend, SqliteIndexBackend
 from repository.repo_path import RepositoryPath
 from util.result import Result
 
 
 class IndexStore:
-    def __init__(self, database: Database, repo_path: RepositoryPath):
+    def __init__(
+        self,
+        database: Database,
+        repo_path: RepositoryPath,
+        backend: Optional[IndexBackend] = None,
+    ):
         self.database = database
         self.repo_path = repo_path
+        self.backend = backend or SqliteIndexBackend(database)
 
     def create(self, entries: list[IndexEntry]):
         if not entries:
             return []
-        self.database.create_index_entries(entries)
+        self.backend.create(entries)
         return entries
 
     def update(self, entries: list[IndexEntry]):
         if not entries:
             return Result.Ok([])
-        self.database.delete_index_entries(entries)
-        self.database.create_index_entries(entries)
+        self.backend.update(entries)
         return entries
 
     def delete(self, entries: list[IndexEntry]):
         if not entries:
             return Result.Ok([])
-        self.database.delete_index_entries(entries)
+        self.backend.delete(entries)
         return entries
 
-    def find_by_paths(self, paths: list[str | Path]) -> list[IndexEntry]:
+    def refresh_stats(self, entries: list[IndexEntry]):
+        if not entries:
+            return []
+        self.backend.update_stats(entries)
+        return entries
+
+    def find_by_paths(self, paths: Sequence[str | Path]) -> list[IndexEntry]:
         relative_paths = self.repo_path.normalize_relative_paths(paths)
-        return self.database.list_index_entries_by_paths_startwith(relative_paths)
+        return self.backend.list_by_prefixes(relative_paths)
+
+    def find_by_exact_paths(self, paths: list[str]) -> list[IndexEntry]:
+        return self.backend.list_by_paths(paths)
 
     def find_all(self) -> list[IndexEntry]:
-        return self.database.list_index_entries()
+        return self.backend.list_all()
@@ -11,6 +11,6 @@ class PathValidator:
     def validate(self, paths: list[str]) -> Result[None]:
         for path in paths:
             found_index_entries = self.index_store.find_by_paths([path])
-            if len(found_index_entries) == 0 and len(self.worktree.match(path)) == 0:
+            if len(found_index_entries) == 0 and not self.worktree.has_match(path):
                 return Result.Fail(f"Path {path} did not match any files")
         return Result.Ok(None)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Sequence
 from pathlib import Path
 
 from util.constant import GITOY_DB_FILE, GITOY_DIR
@@ -58,5 +58,5 @@ class RepositoryPath:
     def normalize_relative_path(self, path: str | Path) -> str:
         return normalize_path(self.to_relative_path(path).as_posix())
 
-    def normalize_relative_paths(self, paths: list[str | Path]):
+    def normalize_relative_paths(self, paths: Sequence[str | Path]):
         return [self.normalize_relative_path(path) for path in paths]
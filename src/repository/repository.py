@@ -1,10 +1,12 @@
-import collections
-import heapq
+import itertools
 from pathlib import Path
-from typing import Optional
-from custom_types import StatusResult
+from typing import Callable, Iterator, Optional
+from custom_types import Diff, MergeResult, StatusResult
+from database.entity.blob import Blob
 from database.entity.commit import Commit
+from database.entity.index_entry import IndexEntry
 from repository.blob_store import BlobStore
+from repository.bloom_filter import MAX_CHANGED_PATHS
 from repository.commit_store import CommitStore
 from repository.compress_file import CompressFile
 from repository.index_store import IndexStore
@@ -13,11 +15,21 @@ from repository.repo_path import RepositoryPath
 from database.database import Database
 from repository.tree_store import TreeStore
 from repository.entry_diff import EntryDiff
+from repository.cache_tree import CacheTree
+from repository.tree_diff import Change, TreeDiff
+from repository.tree_merge import TreeMerge
 from database.entity.ref import Ref
 from util.result import Result
 from repository.worktree import Worktree
 from repository.hash_file import HashFile
 from repository.convert import Convert
+from repository.fsmonitor import (
+    FSMONITOR_MAX_PATHS,
+    FsMonitor,
+    FsMonitorState,
+)
+from util.constant import ADD_BUFFER_SIZE
+from util.worker_pool import WorkerPool
 
 
 class Repository:
@@ -35,6 +47,11 @@ class Repository:
         tree_store: TreeStore,
         commit_store: CommitStore,
         entry_diff: EntryDiff,
+        tree_diff: TreeDiff,
+        cache_tree: CacheTree,
+        worker_pool: WorkerPool,
+        fsmonitor: FsMonitor,
+        tree_merge: TreeMerge,
     ):
         self.database = database
         self.path = repository_path
@@ -48,6 +65,11 @@ class Repository:
         self.tree_store = tree_store
         self.commit_store = commit_store
         self.entry_diff = entry_diff
+        self.tree_diff = tree_diff
+        self.cache_tree = cache_tree
+        self.worker_pool = worker_pool
+        self.fsmonitor = fsmonitor
+        self.tree_merge = tree_merge
 
     @property
     def worktree_path(self):
@@ -76,14 +98,17 @@ class Repository:
         if create_ref_name == head_branch.ref_name:
             return Result.Fail(f"Branch {create_ref_name} already exists")
 
-        # 헤드 브랜치가 아직 커밋을 가리키지 않는 경우 헤드 브랜치를 새 브랜치로 변경
-        if head_branch.target_object_id is None:
-            self.database.update_ref(head_branch, {"ref_name": create_ref_name})
-            head_branch.ref_name = create_ref_name
-            return Result.Ok({"ref": head_branch, "new": False})
+        with self.database.transaction():
+            # 헤드 브랜치가 아직 커밋을 가리키지 않는 경우 헤드 브랜치를 새 브랜치로 변경
+            if head_branch.target_object_id is None:
+                self.database.update_ref(head_branch, {"ref_name": create_ref_name})
+                head_branch.ref_name = create_ref_name
+                return Result.Ok({"ref": head_branch, "new": False})
 
-        new_branch = self.database.create_branch(name, head_branch.target_object_id)
-        return Result.Ok({"ref": new_branch, "new": True})
+            new_branch = self.database.create_branch(
+                name, head_branch.target_object_id
+            )
+            return Result.Ok({"ref": new_branch, "new": True})
 
     def update_head_branch_name(self, branch_name: str):
         head_branch = self.get_head_branch()
@@ -117,32 +142,118 @@ class Repository:
         self.database.delete_branch(branch)
         return Result.Ok(None)
 
-    def add_index(self, paths: list[str]):
+    def add_index(self, paths: list[str], buffer_size: int = ADD_BUFFER_SIZE):
+        """Stage worktree files, streaming blobs to the database in batches.
+
+        Compressed blobs and their index entries are flushed whenever the
+        buffered blob bytes reach `buffer_size`, so memory stays bounded by
+        the buffer (plus the largest single blob) however much is added.
+        """
         result = self.path_validator.validate(paths)
         if result.failed:
             return result
 
-        diff_result = self.get_unstaged_changes(paths)
-        if diff_result.is_empty():
-            return Result.Ok(None)
+        index_entries = self.index_store.find_by_paths(paths)
+        cached_entries = {entry.path: entry for entry in index_entries}
+        worktree_paths: set[str] = set()
+        refreshed: list[IndexEntry] = []
+        batch = Diff([], [], [])
+        blobs: list[Blob] = []
+        buffered = 0
+
+        with self.database.transaction():
+            for entry, blob in self._iter_worktree_entries(
+                paths, cached_entries, with_blobs=True
+            ):
+                if blob is not None and blob.data is None:
+                    # too large to buffer: hashed and compressed into the store
+                    # in one read, which gives the entry its object id
+                    self.blob_store.create_streamed(
+                        blob,
+                        self.convert.compress_streamed_blob(
+                            blob, entry.absolute_path(self.path.worktree_path)
+                        ),
+                    )
+                    entry.object_id = blob.object_id
+                    blob = None
+
+                worktree_paths.add(entry.path)
+                cached = cached_entries.get(entry.path)
+                if cached is None:
+                    batch.added.append(entry)
+                elif self.entry_diff.is_modified(entry, cached):
+                    batch.modified.append(entry)
+                elif cached is not entry and entry.mtime_ns is not None:
+                    refreshed.append(entry)
+
+                if blob is not None:
+                    assert blob.data is not None
+                    blobs.append(blob)
+                    buffered += len(blob.data)
+                if buffered >= buffer_size:
+                    self._flush_add_batch(batch, blobs)
+                    batch, blobs, buffered = Diff([], [], []), [], 0
+
+            batch.deleted = [
+                entry for entry in index_entries if entry.path not in worktree_paths
+            ]
+            self._flush_add_batch(batch, blobs)
+            self.index_store.refresh_stats(refreshed)
 
-        self.index_store.create(diff_result.added)
-        self.index_store.update(diff_result.modified)
-        self.index_store.delete(diff_result.deleted)
+        return Result.Ok(None)
 
-        blobs = [
-            self.convert.index_entry_to_blob(entry)
-            for entry in diff_result.added + diff_result.modified
-        ]
+    def _flush_add_batch(self, batch: Diff, blobs: list[Blob]):
+        self.index_store.create(batch.added)
+        self.index_store.update(batch.modified)
+        self.index_store.delete(batch.deleted)
         self.blob_store.create(blobs)
 
-        return Result.Ok(None)
-    
     def get_unstaged_changes(self, paths): # TODO parameter type
         index_entries = self.index_store.find_by_paths(paths)
-        worktree_paths = self.worktree.find_paths(paths)
-        worktree_entries = [self.convert.path_to_index_entry(p) for p in worktree_paths]
+        cached_entries = {entry.path: entry for entry in index_entries}
+        worktree_entries = [
+            entry
+            for entry, _ in self._iter_worktree_entries(
+                paths, cached_entries, with_blobs=False
+            )
+        ]
+        self._refresh_index_stats(worktree_entries, cached_entries)
         return self.entry_diff.diff(worktree_entries, index_entries)
+
+    def _iter_worktree_entries(
+        self,
+        paths,
+        cached_entries: dict[str, IndexEntry],
+        with_blobs: bool,
+    ) -> Iterator[tuple[IndexEntry, Optional[Blob]]]:
+        """Hash (and with `with_blobs` compress) worktree files on the worker
+        pool, reading each file once. Results keep the worktree path order."""
+        return self.worker_pool.imap(
+            lambda file: self.convert.worktree_file_to_index_entry_and_blob(
+                file, cached_entries, with_blobs
+            ),
+            self.worktree.find_files(paths, cached_entries.keys()),
+        )
+
+    def _refresh_index_stats(
+        self,
+        worktree_entries: list[IndexEntry],
+        cached_entries: dict[str, IndexEntry],
+    ):
+        """Store stat data of files that were hashed but turned out unchanged,
+        so the next status can skip reading them."""
+        refreshed = []
+        for entry in worktree_entries:
+            cached = cached_entries.get(entry.path)
+            if (
+                cached is None
+                or cached is entry
+                or entry.mtime_ns is None
+                or self.entry_diff.is_modified(entry, cached)
+            ):
+                continue
+            refreshed.append(entry)
+        self.index_store.refresh_stats(refreshed)
         
     def get_staged_changes(self, ref: Ref):
         tree_id = ""
@@ -151,9 +262,9 @@ class Repository:
             assert head_commit is not None
             tree_id = head_commit.tree_id
 
-        tree = self.tree_store.build_commit_tree(tree_id)
-        index_entries = self.database.list_index_entries()
-        return self.entry_diff.diff(index_entries, tree.list_index_entries())
+        # only the HEAD subtrees whose id differs from the index tree are read
+        index_tree, _, _ = self.cache_tree.build(self.index_store.find_all())
+        return self.tree_diff.diff_tree(index_tree, tree_id)
 
     def status(self) -> Result[StatusResult]:
         if not self.is_initialized():
@@ -162,50 +273,117 @@ class Repository:
         branch_name = head_branch.branch_name
         
         result = StatusResult(branch_name)
-        result.unstaged = self.get_unstaged_changes([self.worktree_path.as_posix()])
+        result.unstaged = self._get_monitored_unstaged_changes()
         result.staged = self.get_staged_changes(head_branch)
         return Result.Ok(result)
 
+    def _get_monitored_unstaged_changes(self) -> Diff:
+        """Unstaged changes of the whole worktree; with a running fsmonitor
+        only the paths it reported since the last status are examined."""
+        sync = self.fsmonitor.sync()
+        if sync is None:
+            return self.get_unstaged_changes([self.worktree_path.as_posix()])
+
+        if sync.changed is None or len(sync.changed) > FSMONITOR_MAX_PATHS:
+            diff = self.get_unstaged_changes([self.worktree_path.as_posix()])
+        elif sync.changed:
+            diff = self.get_unstaged_changes(
+                [
+                    (self.worktree_path / path).as_posix()
+                    for path in sorted(sync.changed)
+                ]
+            )
+        else:
+            diff = Diff([], [], [])
+
+        unclean = sorted(entry.path for entry in diff.all())
+        self.fsmonitor.save_state(FsMonitorState(sync.instance, sync.offset, unclean))
+        return diff
+
     def commit(self, message: str) -> Optional[Commit]:
         head_branch = self.get_head_branch()
         head_commit = None
-        if head_branch.target_object_id is not None:
-            head_commit = self.database.get_commit(head_branch.target_object_id)
-            
         tree_id = ""
         if head_branch.target_object_id is not None:
             head_commit = self.database.get_commit(head_branch.target_object_id)
             assert head_commit is not None
             tree_id = head_commit.tree_id
-        
-        commit_tree = self.tree_store.build_commit_tree(tree_id)
-        index_entries = self.database.list_index_entries()
-        diff = self.entry_diff.diff(index_entries, commit_tree.list_index_entries())
-    
-        staged = self.get_staged_changes(head_branch)
-        if staged.is_empty():
+
+        # directories untouched since the last commit keep their cached ids
+        index_entries = self.index_store.find_all()
+        commit_tree, updated_entries, index_trees = self.cache_tree.build(
+            index_entries
+        )
+        assert commit_tree.root_entry is not None
+        if commit_tree.root_entry.entry_object_id == tree_id or (
+            not tree_id and not index_entries
+        ):
             return None
 
-        updated_entries = commit_tree.apply_diff(diff)
-        commit_ref_tree = self.tree_store.save_commit_tree(updated_entries)
+        # paths changed against the parent, for the commit's Bloom filter;
+        # past the filter limit the exact list is not needed
+        changed_paths = [
+            path
+            for path, _, _ in itertools.islice(
+                self.tree_diff.tree_changes(commit_tree, tree_id),
+                MAX_CHANGED_PATHS + 1,
+            )
+        ]
 
-        assert commit_ref_tree.entry_object_id is not None
+        with self.database.transaction():
+            commit_ref_tree = self.tree_store.save_commit_tree(updated_entries)
 
-        new_commit = self.commit_store.save_commit(
-            commit_ref_tree.entry_object_id, message, head_commit
-        )
-        self.database.update_ref(
-            head_branch, {"target_object_id": new_commit.object_id}
-        )
+            assert commit_ref_tree.entry_object_id is not None
+
+            new_commit = self.commit_store.save_commit(
+                commit_ref_tree.entry_object_id, message, head_commit, changed_paths
+            )
+            self.database.update_ref(
+                head_branch, {"target_object_id": new_commit.object_id}
+            )
+            self.database.save_index_trees(index_trees)
 
         return new_commit
 
-    def log(self) -> list[Commit]:
+    def log(
+        self,
+        max_count: Optional[int] = None,
+        skip: int = 0,
+        first_parent: bool = False,
+        path: Optional[str] = None,
+    ) -> Iterator[Commit]:
+        """Commits reachable from HEAD; with `path`, only those that changed
+        the file or directory at that path."""
         head_branch = self.get_head_branch()
         if head_branch.target_object_id is None:
-            return []
-        commit_logs = self.commit_store.list_commit_logs(head_branch.target_object_id)
-        return commit_logs
+            return iter([])
+        if path is not None:
+            path = self.path.normalize_relative_path(path)
+            if path == ".":
+                path = None
+        return self.commit_store.iter_commit_logs(
+            head_branch.target_object_id, max_count, skip, first_parent, path
+        )
+
+    def resolve_commit(self, name: str) -> Optional[Commit]:
+        """Commit a branch name or a commit id refers to."""
+        branch = self.database.get_branch(f"refs/heads/{name}")
+        if branch is not None:
+            if branch.target_object_id is None:
+                return None
+            return self.database.get_commit(branch.target_object_id)
+        return self.database.get_commit(name)
+
+    def diff_commits(self, old: str, new: str) -> Result[Diff]:
+        """Changes from `old` to `new`, each a branch name or commit id."""
+        commits = []
+        for name in (old, new):
+            commit = self.resolve_commit(name)
+            if commit is None:
+                return Result.Fail(f"Unknown revision '{name}'")
+            commits.append(commit)
+        old_commit, new_commit = commits
+        return Result.Ok(self.tree_diff.diff(new_commit.tree_id, old_commit.tree_id))
 
     def checkout(self, ref_name: str) -> Result[None]:
         ref_name = f"refs/heads/{ref_name}"
@@ -217,81 +395,202 @@ class Repository:
         if head_branch.ref_name == checkout_branch.ref_name:
             return Result.Ok(None)
 
-        unstaged= self.get_unstaged_changes([self.worktree_path.as_posix()])
-        staged = self.get_staged_changes(head_branch)
-
-        if not staged.is_empty() or not unstaged.is_empty():
-            return Result.Fail(
-                "You have uncommitted changes. Please commit or stash them before checkout."
-            )
-        
+        head_tree_id = ""
+        if head_branch.target_object_id is not None:
+            head_commit = self.database.get_commit(head_branch.target_object_id)
+            assert head_commit is not None
+            head_tree_id = head_commit.tree_id
         assert checkout_branch.target_object_id is not None
         checkout_commit = self.database.get_commit(checkout_branch.target_object_id)
         assert checkout_commit is not None
-        checkout_tree = self.tree_store.build_commit_tree(checkout_commit.tree_id)
-        current_index_entries = self.index_store.find_all()
-        diff = self.entry_diff.diff(
-            checkout_tree.list_index_entries(), current_index_entries
+
+        # only paths that differ between the two commits are touched
+        changes = self.tree_diff.changes(checkout_commit.tree_id, head_tree_id)
+        return self._switch_tree(
+            changes,
+            "checkout",
+            lambda: self.update_head_branch(head_branch, checkout_branch),
         )
 
+    def merge(self, branch_name: str) -> Result[MergeResult]:
+        """Merge a branch into HEAD: fast-forward when HEAD is its ancestor,
+        otherwise record a merge commit of a three-way tree merge."""
+        branch = self.database.get_branch(f"refs/heads/{branch_name}")
+        if branch is None or branch.target_object_id is None:
+            return Result.Fail(f"Branch '{branch_name}' not found")
+        head_branch = self.get_head_branch()
+        if head_branch.ref_name == branch.ref_name:
+            return Result.Fail(f"Cannot merge branch '{branch_name}' into itself")
+        theirs = self.database.get_commit(branch.target_object_id)
+        assert theirs is not None
+
+        ours = None
+        ours_tree_id = ""
+        if head_branch.target_object_id is not None:
+            ours = self.database.get_commit(head_branch.target_object_id)
+            assert ours is not None
+            ours_tree_id = ours.tree_id
+            if self.commit_store.is_ancestor(theirs.object_id, ours.object_id):
+                return Result.Ok(MergeResult("up-to-date", ours))
+
+        if ours is None or self.commit_store.is_ancestor(
+            ours.object_id, theirs.object_id
+        ):
+            changes = self.tree_diff.changes(theirs.tree_id, ours_tree_id)
+            result = self._switch_tree(
+                changes,
+                "merge",
+                lambda: self.database.update_ref(
+                    head_branch, {"target_object_id": theirs.object_id}
+                ),
+            )
+            if result.failed:
+                return Result.Fail(result.error)
+            return Result.Ok(MergeResult("fast-forward", theirs))
+
+        base = self.find_merge_base(ours, theirs)
+        merged = self.tree_merge.merge(
+            base.tree_id if base is not None else "", ours.tree_id, theirs.tree_id
+        )
+        if merged.conflicts:
+            return Result.Fail(f"Merge conflict in {', '.join(merged.conflicts)}")
+
+        # diffed before it is stored, so a refused merge writes nothing
+        changes = self.tree_diff.unsaved_changes(
+            merged.tree_id, merged.tree_entries, ours.tree_id
+        )
+        merge_commit: list[Commit] = []
+
+        def record_merge():
+            self.tree_store.save_commit_tree(merged.tree_entries)
+            merge_commit.append(
+                self.commit_store.save_merge_commit(
+                    merged.tree_id,
+                    [ours, theirs],
+                    f"Merge branch '{branch_name}'",
+                    [path for path, _, _ in changes],
+                )
+            )
+            self.database.update_ref(
+                head_branch, {"target_object_id": merge_commit[0].object_id}
+            )
+
+        result = self._switch_tree(changes, "merge", record_merge)
+        if result.failed:
+            return Result.Fail(result.error)
+        return Result.Ok(MergeResult("merge", merge_commit[0]))
+
+    def _switch_tree(
+        self, changes: list[Change], action: str, update_refs: Callable[[], object]
+    ) -> Result[None]:
+        """Apply the changes between HEAD's tree and a target tree to the
+        worktree and index, then move the refs in the same transaction."""
+        diff = self.tree_diff.to_diff(changes)
+
+        if self._find_checkout_conflicts(changes):
+            return Result.Fail(
+                f"You have uncommitted changes. Please commit or stash them before {action}."
+            )
+
         # Apply changes to worktree
-        for entry in diff.added:
-            blob = self.database.get_blob(entry.object_id)
-            assert blob is not None
-            self.worktree.write(entry, self.compress_file.decompress(blob.data))
-            entry.size = blob.size
-        for entry in diff.modified:
-            blob = self.database.get_blob(entry.object_id)
-            assert blob is not None
-            self.worktree.write(entry, self.compress_file.decompress(blob.data))
-            entry.size = blob.size
         for entry in diff.deleted:
             self.worktree.delete(entry)
+        self._checkout_entries(diff.added + diff.modified)
 
-        # Apply changes to index
-        self.index_store.delete(diff.deleted)
-        self.index_store.update(diff.modified)
-        self.index_store.create(diff.added)
+        with self.database.transaction():
+            # Apply changes to index, local changes of other paths are kept
+            self.index_store.delete(diff.deleted)
+            self.index_store.update(diff.added + diff.modified)
 
-        self.update_head_branch(head_branch, checkout_branch)
+            update_refs()
 
         return Result.Ok(None)
-    
+
+    def _find_checkout_conflicts(self, changes: list[Change]) -> list[str]:
+        """Paths touched by the checkout whose index or worktree differs from
+        HEAD, unless they already match the checkout target.
+
+        Only the touched paths are read, so the check costs O(changed paths)
+        rather than a status of the whole worktree.
+        """
+        paths = [path for path, _, _ in changes]
+        if not paths:
+            return []
+
+        target = {path: entry for path, entry, _ in changes}
+        head = {path: entry for path, _, entry in changes}
+        index = {
+            entry.path: entry
+            for entry in self.index_store.find_by_exact_paths(paths)
+        }
+        worktree = {
+            entry.path: entry
+            for entry, _ in self._iter_worktree_entries(
+                [(self.worktree_path / path).as_posix() for path in paths],
+                index,
+                with_blobs=False,
+            )
+        }
+
+        def same(one: Optional[IndexEntry], other: Optional[IndexEntry]) -> bool:
+            if one is None or other is None:
+                return one is other
+            return not self.entry_diff.is_modified(one, other)
+
+        conflicts = []
+        for path in paths:
+            dirty = not same(index.get(path), head.get(path)) or not same(
+                worktree.get(path), index.get(path)
+            )
+            if dirty and not (
+                same(index.get(path), target.get(path))
+                and same(worktree.get(path), target.get(path))
+            ):
+                conflicts.append(path)
+        return conflicts
+
+    def _checkout_entries(self, entries: list[IndexEntry]):
+        """Write entries to the worktree. Blobs are fetched in batches in
+        storage order and decompressed on the worker pool straight into their
+        files, and their stat data is recorded on the entries."""
+        entries_by_object_id: dict[str, list[IndexEntry]] = {}
+        for entry in entries:
+            entries_by_object_id.setdefault(entry.object_id, []).append(entry)
+        created_dirs: set[Path] = set()
+
+        def write(blob: tuple[str, Optional[bytes]]) -> str:
+            object_id, data = blob
+            for entry in entries_by_object_id[object_id]:
+                content = data
+                if content is None:
+                    # stored in parts: read incrementally, once per file
+                    content = self.database.iter_blob_parts(object_id)
+                stat = self.worktree.write_compressed(
+                    entry, content, self.compress_file, created_dirs
+                )
+                self.convert.apply_stat(entry, stat)
+            return object_id
+
+        streamed: list[str] = []
+
+        def inline_blobs() -> Iterator[tuple[str, Optional[bytes]]]:
+            for object_id, data in self.database.iter_blob_data(
+                entries_by_object_id.keys()
+            ):
+                if data is None:
+                    streamed.append(object_id)
+                else:
+                    yield object_id, data
+
+        written = set(self.worker_pool.imap(write, inline_blobs()))
+        # blobs stored in parts are read through the database connection,
+        # which belongs to this thread
+        written.update(write((object_id, None)) for object_id in streamed)
+        missing = entries_by_object_id.keys() - written
+        assert not missing, f"Missing blobs: {sorted(missing)}"
+
     def find_merge_base(self, one: Commit, two: Commit) -> Optional[Commit]:
-        A = 1
-        B = 2
-        BOTH = 3
-        
-        pq: list[tuple[int, str]] = []        
-        flags = collections.defaultdict(int)
-        
-        heapq.heappush(pq, (-one.generation, one.object_id))
-        flags[one.object_id] |= A
-        heapq.heappush(pq, (-two.generation, two.object_id))
-        flags[two.object_id] |= B
-        
-        in_pq = {one.object_id, two.object_id}
-        
-        while pq:
-            _, current = heapq.heappop(pq)
-            current_flags = flags[current]
-            
-            if current_flags == BOTH:
-                return self.database.get_commit(current)
-            
-            parents: list[Commit] = self.commit_store.get_commit_parents(current)
-            
-            for parent in parents:
-                old_flags = flags[parent.object_id]
-                new_flags = old_flags | current_flags
-                
-                if old_flags != new_flags:
-                    flags[parent.object_id] = new_flags
-                    if parent.object_id not in in_pq:
-                        heapq.heappush(pq, (-parent.generation, parent.object_id))
-                        in_pq.add(parent.object_id)
-                        
-        return None
-
-            
-            
+        object_id = self.commit_store.find_merge_base(one.object_id, two.object_id)
+        if object_id is None:
+            return None
+        return self.database.get_commit(object_id)
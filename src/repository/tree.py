@@ -6,6 +6,14 @@ from database.entity.tree_entry import TreeEntry
 from util.path import accumulate_paths
 
 
+def hash_tree(children: list[TreeEntry]) -> str:
+    sorted_children = sorted(children, key=lambda x: x.entry_name)
+    content = "\n".join(child.hashable_str for child in sorted_children)
+    sha1 = hashlib.sha1()
+    sha1.update(content.encode())
+    return sha1.hexdigest()
+
+
 class TreeIndex:
     def __init__(self):
         self.cache: dict[str, TreeEntry] = {}
@@ -133,11 +141,7 @@ class Tree:
                 if child.entry_type == "tree" and child.entry_object_id is None:
                     _hash_tree_entry(child)
 
-            sorted_children = sorted(tree_entry.children, key=lambda x: x.entry_name)
-            content = "\n".join(child.hashable_str for child in sorted_children)
-            sha1 = hashlib.sha1()
-            sha1.update(content.encode())
-            tree_entry.entry_object_id = sha1.hexdigest()
+            tree_entry.entry_object_id = hash_tree(tree_entry.children)
             for child in tree_entry.children:
                 if child.tree_id != tree_entry.entry_object_id:
                     child.tree_id = tree_entry.entry_object_id
@@ -150,10 +154,11 @@ class Tree:
         return updated_entries
     
     def apply_diff(self, diff: Diff):
+        # deletions first, so a path can change between file and directory
+        for entry in diff.deleted:
+            self.remove(entry)
         for entry in diff.added:
             self.add(entry)
         for entry in diff.modified:
             self.modify(entry)
-        for entry in diff.deleted:
-            self.remove(entry)
         return self.build_object_ids()
@@ -0,0 +1,165 @@
+from typing import Callable, Iterator, Optional
+from custom_types import Diff
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from database.entity.tree_entry import TreeEntry
+from repository.tree import Tree
+
+# (path, base entry, target entry); a missing side is None
+Change = tuple[str, Optional[IndexEntry], Optional[IndexEntry]]
+ChildLoader = Callable[[TreeEntry], list[TreeEntry]]
+
+
+class TreeDiff:
+    """Diff two trees by walking them side by side.
+
+    Subtrees with the same object id on both sides are skipped without being
+    read, so the cost follows the size of the change instead of the trees.
+    Results use the same direction as `EntryDiff.diff`: `added` holds paths
+    only in `base`, `deleted` paths only in `target`.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def diff(self, base_tree_id: str, target_tree_id: str) -> Diff:
+        return self.to_diff(self.changes(base_tree_id, target_tree_id))
+
+    def diff_tree(self, base: Tree, target_tree_id: str) -> Diff:
+        """Diff an in-memory tree, e.g. one built from the index, against a
+        stored tree. `base` must have its object ids built."""
+        return self.to_diff(self.tree_changes(base, target_tree_id))
+
+    def tree_changes(self, base: Tree, target_tree_id: str) -> Iterator[Change]:
+        """Changes of `diff_tree`, generated lazily"""
+        return self._walk(
+            base.root_entry,
+            self._stored_root(target_tree_id),
+            self._memory_children,
+            self._stored_children,
+        )
+
+    def changes(self, base_tree_id: str, target_tree_id: str) -> list[Change]:
+        return list(
+            self._walk(
+                self._stored_root(base_tree_id),
+                self._stored_root(target_tree_id),
+                self._stored_children,
+                self._stored_children,
+            )
+        )
+
+    def unsaved_changes(
+        self, base_tree_id: str, base_entries: list[TreeEntry], target_tree_id: str
+    ) -> list[Change]:
+        """Changes of `changes` for a base tree not stored yet, read from the
+        entries that would store it (e.g. a merge result). Directories they
+        leave out are stored already and read from storage."""
+        children: dict[str, list[TreeEntry]] = {}
+        for entry in base_entries:
+            if entry.tree_id is not None:
+                children.setdefault(entry.tree_id, []).append(entry)
+
+        def unsaved_children(entry: TreeEntry) -> list[TreeEntry]:
+            assert entry.entry_object_id is not None
+            if entry.entry_object_id in children:
+                return children[entry.entry_object_id]
+            return self._stored_children(entry)
+
+        return list(
+            self._walk(
+                self._stored_root(base_tree_id),
+                self._stored_root(target_tree_id),
+                unsaved_children,
+                self._stored_children,
+            )
+        )
+
+    def to_diff(self, changes) -> Diff:
+        diff = Diff([], [], [])
+        for _, base, target in changes:
+            if target is None:
+                diff.added.append(base)
+            elif base is None:
+                diff.deleted.append(target)
+            else:
+                diff.modified.append(base)
+        return diff
+
+    def _stored_root(self, tree_id: str) -> Optional[TreeEntry]:
+        if not tree_id:
+            return None
+        return TreeEntry(".", "040000", "tree", tree_id)
+
+    def _stored_children(self, entry: TreeEntry) -> list[TreeEntry]:
+        assert entry.entry_object_id is not None
+        return self.database.get_child_tree_entries(entry.entry_object_id)
+
+    def _memory_children(self, entry: TreeEntry) -> list[TreeEntry]:
+        if entry.children:
+            return entry.children
+        # a directory reused from the cache-tree is a leaf, read it from storage
+        return self._stored_children(entry)
+
+    def _walk(
+        self,
+        base_root: Optional[TreeEntry],
+        target_root: Optional[TreeEntry],
+        base_children: ChildLoader,
+        target_children: ChildLoader,
+    ) -> Iterator[Change]:
+        stack: list[tuple[str, Optional[TreeEntry], Optional[TreeEntry]]] = [
+            (".", base_root, target_root)
+        ]
+        while stack:
+            path, base, target = stack.pop()
+            if (
+                base is not None
+                and target is not None
+                and base.entry_object_id == target.entry_object_id
+            ):
+                continue
+
+            base_entries = (
+                {entry.entry_name: entry for entry in base_children(base)}
+                if base is not None
+                else {}
+            )
+            target_entries = (
+                {entry.entry_name: entry for entry in target_children(target)}
+                if target is not None
+                else {}
+            )
+
+            subtrees = []
+            for name in sorted(base_entries.keys() | target_entries.keys()):
+                child_path = f"{path}/{name}"
+                base_child = base_entries.get(name)
+                target_child = target_entries.get(name)
+                base_blob = self._blob(child_path, base_child)
+                target_blob = self._blob(child_path, target_child)
+
+                if base_blob is not None or target_blob is not None:
+                    if (
+                        base_blob is None
+                        or target_blob is None
+                        or base_blob.object_id != target_blob.object_id
+                        or base_blob.mode != target_blob.mode
+                    ):
+                        yield (child_path, base_blob, target_blob)
+
+                # a path that changed between blob and tree expands its tree side
+                base_tree = base_child if base_blob is None else None
+                target_tree = target_child if target_blob is None else None
+                if base_tree is not None or target_tree is not None:
+                    subtrees.append((child_path, base_tree, target_tree))
+
+            stack.extend(reversed(subtrees))
+
+    def _blob(self, path: str, entry: Optional[TreeEntry]) -> Optional[IndexEntry]:
+        if entry is None or entry.entry_type != "blob":
+            return None
+        assert entry.entry_object_id is not None
+        return IndexEntry(
+            path=path, object_id=entry.entry_object_id, mode=entry.entry_mode
+        )
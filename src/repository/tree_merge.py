@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from database.database import Database
+from database.entity.tree_entry import TreeEntry
+from repository.tree import hash_tree
+
+
+@dataclass
+class TreeMergeResult:
+    """Merged root tree id, the tree entries to store for it (the root and
+    the children of every directory changed on both sides) and the paths
+    that could not be merged."""
+
+    tree_id: str
+    tree_entries: list[TreeEntry] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+
+
+class TreeMerge:
+    """Three-way merge of stored trees.
+
+    A path changed on one side only takes that side's entry whole, so a
+    subtree is read only when both sides changed it. Files changed
+    differently on both sides are conflicts; their contents are not merged.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def merge(
+        self, base_tree_id: str, ours_tree_id: str, theirs_tree_id: str
+    ) -> TreeMergeResult:
+        result = TreeMergeResult("")
+        root = self._merge(
+            ".",
+            self._root(base_tree_id),
+            self._root(ours_tree_id),
+            self._root(theirs_tree_id),
+            result,
+        )
+        if root is None:
+            root = TreeEntry(".", "040000", "tree", hash_tree([]))
+        if not result.tree_entries:
+            # the root was not rebuilt: one side's tree is taken whole
+            result.tree_entries.append(root)
+        assert root.entry_object_id is not None
+        result.tree_id = root.entry_object_id
+        return result
+
+    def _merge(
+        self,
+        path: str,
+        base: Optional[TreeEntry],
+        ours: Optional[TreeEntry],
+        theirs: Optional[TreeEntry],
+        result: TreeMergeResult,
+    ) -> Optional[TreeEntry]:
+        if self._same(ours, theirs) or self._same(base, theirs):
+            return ours
+        if self._same(base, ours):
+            return theirs
+        if not (self._is_tree(ours) and self._is_tree(theirs)):
+            result.conflicts.append(path)
+            return ours
+
+        # both sides changed this directory: merge it entry by entry
+        base_children = self._children(base) if self._is_tree(base) else {}
+        ours_children = self._children(ours)
+        theirs_children = self._children(theirs)
+        children = []
+        names = base_children.keys() | ours_children.keys() | theirs_children.keys()
+        for name in sorted(names):
+            child = self._merge(
+                f"{path}/{name}",
+                base_children.get(name),
+                ours_children.get(name),
+                theirs_children.get(name),
+                result,
+            )
+            if child is not None:
+                children.append(child)
+        if not children and path != ".":
+            return None
+
+        object_id = hash_tree(children)
+        for child in children:
+            result.tree_entries.append(
+                TreeEntry(
+                    child.entry_name,
+                    child.entry_mode,
+                    child.entry_type,
+                    child.entry_object_id,
+                    object_id,
+                )
+            )
+        assert ours is not None
+        merged = TreeEntry(ours.entry_name, "040000", "tree", object_id)
+        if path == ".":
+            result.tree_entries.append(merged)
+        return merged
+
+    def _root(self, tree_id: str) -> Optional[TreeEntry]:
+        if not tree_id:
+            return None
+        return TreeEntry(".", "040000", "tree", tree_id)
+
+    def _children(self, entry: Optional[TreeEntry]) -> dict[str, TreeEntry]:
+        assert entry is not None and entry.entry_object_id is not None
+        return {
+            child.entry_name: child
+            for child in self.database.get_child_tree_entries(entry.entry_object_id)
+        }
+
+    @staticmethod
+    def _is_tree(entry: Optional[TreeEntry]) -> bool:
+        return entry is not None and entry.entry_type == "tree"
+
+    @staticmethod
+    def _same(one: Optional[TreeEntry], other: Optional[TreeEntry]) -> bool:
+        if one is None or other is None:
+            return one is other
+        return (one.entry_type, one.entry_object_id, one.entry_mode) == (
+            other.entry_type,
+            other.entry_object_id,
+            other.entry_mode,
+        )
@@ -1,11 +1,33 @@
+from dataclasses import dataclass
+import os
 from pathlib import Path
+from stat import S_ISREG
+from typing import Iterable, Iterator, Optional
 
 from database.entity.index_entry import IndexEntry
-from util.array import unique
+from util.constant import GITOY_IGNORE_FILE
+from util.path import normalize_path
 
+from repository.compress_file import CompressFile
+from repository.ignore import IgnoreRules, is_ignored
 from repository.repo_path import RepositoryPath
 
 
+@dataclass
+class WorktreeFile:
+    """A regular file found by the worktree walk
+
+    Attributes:
+        path: Normalized relative path, e.g. "./dir/file.txt"
+        absolute_path: Absolute path of the file
+        stat: Stat result taken while walking
+    """
+
+    path: str
+    absolute_path: Path
+    stat: os.stat_result
+
+
 class Worktree:
     def __init__(self, repository_path: RepositoryPath):
         self.repo_path = repository_path
@@ -14,24 +36,111 @@ class Worktree:
     def root_dir(self) -> Path:
         return self.repo_path.worktree_path
 
-    def match(self, path: str | Path) -> list[Path]:
+    def walk(self, path: str | Path) -> Iterator[WorktreeFile]:
+        """Yield the files under `path` that are not ignored, using os.scandir.
+
+        The path is resolved once; relative paths of the files below it are
+        built from directory entry names. The repository directory and
+        directories matched by .gitoyignore files are pruned before they are
+        descended into, so ignored subtrees are never stat'ed.
+        """
         relative_path: Path = self.repo_path.to_relative_path(path)
         _path: Path = self.root_dir / relative_path
-        if _path.is_dir():
-            result = []
-            for p in _path.rglob("*"):
-                if self.repo_path.repo_dir in p.parents:
-                    continue
-                if p.is_file():
-                    result.append(p)
-            return result
+        prefix = normalize_path(relative_path.as_posix())
+        is_dir = _path.is_dir()
+        rules = self._ancestor_ignore_rules(prefix, is_dir)
+        if rules is None:
+            return
+        if is_dir:
+            yield from self._walk_dir(_path, prefix, rules)
         elif _path.is_file():
-            return [_path]
-        else:
-            return []
+            yield WorktreeFile(prefix, _path, _path.stat())
+
+    def _ancestor_ignore_rules(
+        self, prefix: str, is_dir: bool
+    ) -> Optional[tuple[IgnoreRules, ...]]:
+        """Ignore rules of the directories above `prefix`, or None when
+        `prefix` itself or one of its parent directories is ignored."""
+        rules: tuple[IgnoreRules, ...] = ()
+        parts = prefix.split("/")
+        for depth in range(1, len(parts)):
+            directory = "/".join(parts[:depth])
+            loaded = IgnoreRules.load(
+                self.root_dir / directory / GITOY_IGNORE_FILE, directory
+            )
+            if loaded is not None:
+                rules += (loaded,)
+            child = "/".join(parts[: depth + 1])
+            if is_ignored(rules, child, is_dir or depth + 1 < len(parts)):
+                return None
+        return rules
+
+    def _walk_dir(
+        self, directory: Path, prefix: str, rules: tuple[IgnoreRules, ...]
+    ) -> Iterator[WorktreeFile]:
+        assert self.repo_path.repo_dir is not None
+        repo_dir = os.fspath(self.repo_path.repo_dir)
+        stack = [(os.fspath(directory), prefix, rules)]
+        while stack:
+            dir_path, dir_prefix, dir_rules = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.name == GITOY_IGNORE_FILE and entry.is_file():
+                    loaded = IgnoreRules.load(Path(entry.path), dir_prefix)
+                    if loaded is not None:
+                        dir_rules += (loaded,)
+
+            sub_dirs = []
+            for entry in entries:
+                entry_path = f"{dir_prefix}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != repo_dir and not is_ignored(
+                        dir_rules, entry_path, True
+                    ):
+                        sub_dirs.append((entry.path, entry_path, dir_rules))
+                elif entry.is_file() and not is_ignored(dir_rules, entry_path, False):
+                    yield WorktreeFile(entry_path, Path(entry.path), entry.stat())
+            stack.extend(reversed(sub_dirs))
+
+    def match(self, path: str | Path) -> list[Path]:
+        return [file.absolute_path for file in self.walk(path)]
+
+    def has_match(self, path: str | Path) -> bool:
+        return next(self.walk(path), None) is not None
+
+    def find_files(
+        self, paths: list[str | Path], tracked_paths: Iterable[str] = ()
+    ) -> Iterator[WorktreeFile]:
+        """Walk every path, yielding each file once.
+
+        Tracked files are never ignored: the ones in `tracked_paths` that the
+        walk skipped are stat'ed directly.
+        """
+        seen: set[str] = set()
+        for path in paths:
+            for file in self.walk(path):
+                if file.path not in seen:
+                    seen.add(file.path)
+                    yield file
+        for tracked_path in tracked_paths:
+            if tracked_path in seen:
+                continue
+            absolute_path = self.root_dir / tracked_path
+            try:
+                stat = absolute_path.stat()
+            except OSError:
+                continue
+            if S_ISREG(stat.st_mode):
+                seen.add(tracked_path)
+                yield WorktreeFile(tracked_path, absolute_path, stat)
 
     def find_paths(self, paths: list[str | Path]) -> list[Path]:
-        return list(unique([p for path in paths for p in self.match(path)], "as_posix"))
+        return [file.absolute_path for file in self.find_files(paths)]
 
     def write(self, index_entry: IndexEntry, content: bytes) -> Path:
         path = index_entry.absolute_path(self.repo_path.worktree_path)
@@ -41,6 +150,36 @@ class Worktree:
         path.chmod(int(index_entry.mode, 0))
         return path
 
+    def write_compressed(
+        self,
+        index_entry: IndexEntry,
+        data: bytes | Iterable[bytes],
+        compress_file: CompressFile,
+        created_dirs: Optional[set[Path]] = None,
+    ) -> os.stat_result:
+        """Decompress a blob straight into the entry's worktree file.
+
+        Parent directories already in `created_dirs` are not created again, and
+        the mode is only changed when creating the file did not set it.
+        Returns the stat of the written file.
+        """
+        path = index_entry.absolute_path(self.repo_path.worktree_path)
+        if created_dirs is None or path.parent not in created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if created_dirs is not None:
+                created_dirs.add(path.parent)
+
+        mode = int(index_entry.mode, 0) & 0o7777
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with open(fd, "wb") as f:
+            compress_file.decompress_to(data, f)
+            f.flush()
+            stat = os.fstat(fd)
+            if stat.st_mode & 0o7777 != mode:
+                os.fchmod(fd, mode)
+                stat = os.fstat(fd)
+        return stat
+
     def delete(self, index_entry: IndexEntry) -> None:
         path: Path = index_entry.absolute_path(self.repo_path.worktree_path)
         path.unlink(missing_ok=True)
@@ -15,3 +15,14 @@ def unique(seq, key=None):
             continue
         seen.add(value)
         yield item
+
+
+def chunked(seq, size):
+    chunk = []
+    for item in seq:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,5 +1,43 @@
 GITOY_DIR = ".gitoy"
 GITOY_DB_FILE = "gitoy.db"
+# blob payloads, kept apart from the metadata in GITOY_DB_FILE
+GITOY_OBJECTS_DB_FILE = "objects.db"
+GITOY_IGNORE_FILE = ".gitoyignore"
+GITOY_INDEX_FILE = "index"
 
 FILE_SIZE_SMALL = 32 * 1024
+# larger files are hashed and compressed as streams and stored in blob parts
 FILE_SIZE_MEDIUM = 512 * 1024 * 1024
+
+# read size, and compressed chunk size, of files handled as streams
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# compressed bytes per blob_part row, well under SQLite's 1 GB value limit
+BLOB_PART_SIZE = 16 * 1024 * 1024
+
+# files modified this close to the time they were hashed are "racily clean":
+# a later write can keep the same timestamp, so their stat is not cached
+RACY_TIMESTAMP_NS = 2 * 1_000_000_000
+
+# number of threads hashing and compressing files, defaults to the cpu count
+GITOY_WORKERS_ENV = "GITOY_WORKERS"
+
+# compressed blob bytes buffered by `add` before they are flushed to the database
+ADD_BUFFER_SIZE = 64 * 1024 * 1024
+
+# bound parameters per IN (...) query, well under SQLITE_MAX_VARIABLE_NUMBER
+SQL_VARIABLE_BATCH = 500
+
+# chunk size used when streaming decompressed blobs into worktree files
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# "file" keeps the index in a memory-mapped snapshot file instead of SQLite
+GITOY_INDEX_ENV = "GITOY_INDEX"
+
+# "binary" stores object ids as 20-byte keys; an existing hex database is
+# converted when it is opened
+GITOY_OBJECT_IDS_ENV = "GITOY_OBJECT_IDS"
+
+# settings of the objects database: large pages keep compressed file data in
+# few overflow pages, and a small cache since payloads are read once
+OBJECTS_DB_PRAGMAS = {"page_size": 64 * 1024, "cache_size": -4 * 1024}
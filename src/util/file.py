@@ -1,5 +1,10 @@
+from contextlib import contextmanager
 import mmap
+import os
 from pathlib import Path
+from typing import Generator, Iterator
+
+from util.constant import FILE_SIZE_SMALL, STREAM_CHUNK_SIZE
 
 
 class File:
@@ -26,11 +31,30 @@ class File:
     def is_mid(self):
         return self.size <= self.mid_size_treshold()
 
-    def read_body(self):
-        if self.is_small:
-            return self.path.read_bytes()
-        elif self.is_mid:
-            with open(self.path, "rb") as f:
-                return mmap.mmap(f.fileno(), length=0, access=mmap.ACCESS_READ)
-        else:
-            raise NotImplementedError("File size is too large")
+
+@contextmanager
+def open_buffer(path: Path, size: int) -> Generator[bytes | mmap.mmap]:
+    """Yield the file content as one buffer: bytes for small files, a
+    read-only mmap for larger ones, so every consumer shares a single read."""
+    if size <= FILE_SIZE_SMALL:
+        yield path.read_bytes()
+    else:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), length=0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+
+
+def read_chunks(
+    path: Path, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[memoryview]:
+    """Read a file front to back in `chunk_size` reads into one reused buffer,
+    so memory use does not grow with the file. The kernel is told the access
+    is sequential so it reads ahead. A chunk is only valid until the next one
+    is read."""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while size := f.readinto(buffer):
+            yield view[:size]
@@ -0,0 +1,49 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from util.constant import GITOY_WORKERS_ENV
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WorkerPool:
+    """Maps a function over items on a bounded thread pool.
+
+    hashlib and zstandard release the GIL while they work on a buffer, so
+    hashing and compressing files on threads scales with cores. Results are
+    yielded in input order, and at most `max_pending` items are in flight so
+    the buffered results (e.g. compressed blobs) stay bounded.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int | None = None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 4
+
+    @staticmethod
+    def from_env() -> "WorkerPool":
+        """Worker count from GITOY_WORKERS, defaulting to the cpu count when
+        it is unset, empty or not a number"""
+        try:
+            return WorkerPool(int(os.environ.get(GITOY_WORKERS_ENV, "")))
+        except ValueError:
+            return WorkerPool(os.cpu_count() or 1)
+
+    def imap(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        if self.workers == 1:
+            yield from map(fn, items)
+            return
+
+        executor = ThreadPoolExecutor(self.workers, thread_name_prefix="gitoy")
+        pending: deque[Future[R]] = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -9,6 +9,9 @@ import sys
 import tempfile
 
 from src.repository.entry_diff import EntryDiff
+from src.repository.tree_diff import TreeDiff
+from src.repository.tree_merge import TreeMerge
+from src.repository.cache_tree import CacheTree
 
 from src.repository.commit_store import CommitStore
 from src.repository.compress_file import CompressFile
@@ -25,6 +28,9 @@ from src.repository.worktree import Worktree
 from src.repository.repo_path import RepositoryPath
 from src.database.database import Database
 from src.repository.repository import Repository
+from src.repository.fsmonitor import FsMonitor
+from src.util.worker_pool import WorkerPool
+from src.util.constant import GITOY_OBJECTS_DB_FILE, OBJECTS_DB_PRAGMAS
 
 root_path = Path(__file__).parent.parent
 src_path = root_path / "src"
@@ -69,8 +75,16 @@ def sqlite(repository_path):
 
 
 @pytest.fixture(scope="function")
-def database(sqlite):
-    database = Database(sqlite)
+def objects_sqlite(repository_path):
+    return SQLite(
+        repository_path.create_repo_db_path().with_name(GITOY_OBJECTS_DB_FILE),
+        OBJECTS_DB_PRAGMAS,
+    )
+
+
+@pytest.fixture(scope="function")
+def database(sqlite, objects_sqlite):
+    database = Database(sqlite, objects=objects_sqlite)
     return database
 
 
@@ -124,6 +138,31 @@ def entry_diff():
     return EntryDiff()
 
 
+@pytest.fixture(scope="function")
+def tree_diff(database: Database):
+    return TreeDiff(database)
+
+
+@pytest.fixture(scope="function")
+def cache_tree(database: Database):
+    return CacheTree(database)
+
+
+@pytest.fixture(scope="function")
+def tree_merge(database: Database):
+    return TreeMerge(database)
+
+
+@pytest.fixture(scope="function")
+def worker_pool():
+    return WorkerPool(2)
+
+
+@pytest.fixture(scope="function")
+def fsmonitor(repository_path):
+    return FsMonitor(repository_path)
+
+
 @pytest.fixture(scope="function")
 def repository(
     database,
@@ -138,6 +177,11 @@ def repository(
     tree_store,
     commit_store,
     entry_diff,
+    tree_diff,
+    cache_tree,
+    worker_pool,
+    fsmonitor,
+    tree_merge,
 ):
     return Repository(
         database,
@@ -152,6 +196,11 @@ def repository(
         tree_store,
         commit_store,
         entry_diff,
+        tree_diff,
+        cache_tree,
+        worker_pool,
+        fsmonitor,
+        tree_merge,
     )
 
 
@@ -2,9 +2,14 @@
 from pathlib import Path
 import sys
 
+from datetime import datetime
+
+from database.entity.blob import Blob
 from database.entity.tree_entry import TreeEntry
+from database.migration import BASELINE_VERSION, LATEST_VERSION, MIGRATIONS
 
 from src.database.database import Database
+from src.database.sqlite import SQLite
 from test.factory import random_index_entry
 
 
@@ -69,3 +74,268 @@ class TestDatabase:
             }
         )
         assert tree_entry is not None
+
+    def test_list_existing_blob_ids(self, database: Database):
+        stored = [f"{i:040x}" for i in range(1200)]
+        database.create_blobs(
+            [
+                Blob(object_id, b"data", i, datetime.now())
+                for i, object_id in enumerate(stored)
+            ]
+        )
+
+        missing = [f"{i:040x}" for i in range(5000, 5010)]
+        assert database.list_existing_blob_ids(stored[::2] + missing) == set(stored[::2])
+        assert database.list_existing_blob_ids([]) == set()
+        assert database.list_blob_sizes(stored[:3] + missing) == {
+            stored[0]: 0,
+            stored[1]: 1,
+            stored[2]: 2,
+        }
+
+    def test_create_streamed_blob(self, database: Database):
+        object_id = "ab" * 20
+        chunks = [b"0123456789", b"abc", b"", b"defghijklmnopq"]
+        assert database.create_streamed_blob(
+            Blob(object_id, None, 100, datetime.now()), chunks, part_size=8
+        )
+
+        stored = database.iter_blob_parts(object_id, chunk_size=5)
+        assert b"".join(stored) == b"".join(chunks)
+        parts = database.objects.select(
+            "SELECT part, length(data) AS size FROM blob_part"
+        )
+        assert parts == [
+            {"part": 0, "size": 8},
+            {"part": 1, "size": 8},
+            {"part": 2, "size": 8},
+            {"part": 3, "size": 3},
+        ]
+        assert list(database.iter_blob_data([object_id])) == [(object_id, None)]
+        assert database.list_blob_sizes([object_id]) == {object_id: 100}
+
+    def test_create_streamed_blob_takes_the_id_after_the_last_chunk(
+        self, database: Database
+    ):
+        blob = Blob("", None, 4, datetime.now())
+
+        def chunks():
+            yield b"da"
+            yield b"ta"
+            blob.object_id = "cd" * 20
+
+        assert database.create_streamed_blob(blob, chunks(), part_size=3)
+        assert b"".join(database.iter_blob_parts("cd" * 20)) == b"data"
+
+        again = Blob("", None, 4, datetime.now())
+
+        def same_chunks():
+            yield b"data"
+            again.object_id = "cd" * 20
+
+        assert not database.create_streamed_blob(again, same_chunks(), part_size=3)
+        assert database.objects.select("SELECT part FROM blob_part") == [
+            {"part": 0},
+            {"part": 1},
+        ]
+        assert database.list_blob_sizes(["cd" * 20]) == {"cd" * 20: 4}
+
+    def test_transaction_commits_on_exit(self, database: Database):
+        with database.transaction():
+            database.create_index_entries([random_index_entry("./file.txt")])
+            database.create_tree_entry(
+                TreeEntry(".", "040000", "tree", "root_entry_object_id")
+            )
+            assert database.sqlite.in_transaction
+
+        assert not database.sqlite.in_transaction
+        assert database.sqlite.conn is not None
+        assert not database.sqlite.conn.in_transaction
+        assert len(database.list_index_entries()) == 1
+        assert database.get_root_tree_entry("root_entry_object_id") is not None
+
+    def test_transaction_rollback_on_error(self, database: Database):
+        try:
+            with database.transaction():
+                database.create_index_entries([random_index_entry("./file.txt")])
+                with database.transaction():
+                    database.create_tree_entry(
+                        TreeEntry(".", "040000", "tree", "root_entry_object_id")
+                    )
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+
+        assert not database.sqlite.in_transaction
+        assert len(database.list_index_entries()) == 0
+        assert database.get_root_tree_entry("root_entry_object_id") is None
+
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE blob (object_id TEXT PRIMARY KEY, data BLOB, size INTEGER, created_at TIMESTAMP, encoding TEXT, mime_type TEXT)",
+    "CREATE TABLE commits (object_id TEXT PRIMARY KEY, tree_id TEXT, author_name TEXT, author_email TEXT, author_date DATETIME, committer_name TEXT, committer_email TEXT, committer_date DATETIME, message TEXT, generation INTEGER, created_at DATETIME)",
+    "CREATE TABLE commit_parent (commit_id TEXT, parent_id TEXT, parent_order INTEGER)",
+    "CREATE TABLE ref (ref_name TEXT PRIMARY KEY, ref_type TEXT, is_symbolic BOOLEAN, head BOOLEAN, updated_at TIMESTAMP, target_object_id TEXT, symbolic_target TEXT, namespace TEXT)",
+    "CREATE TABLE reflog (ref_name TEXT, timestamp DATETIME, old_object_id TEXT, new_object_id TEXT, committer_name TEXT, committer_email TEXT, message TEXT, sequence INTEGER)",
+    "CREATE TABLE tag (object_id TEXT PRIMARY KEY, tag_name TEXT, tagged_object_id TEXT, tagged_type TEXT, tagger_name TEXT, tagger_email TEXT, tagger_date DATETIME, message TEXT, size INTEGER, created_at DATETIME)",
+    "CREATE TABLE tree_entry (tree_id TEXT, entry_name TEXT, entry_mode TEXT, entry_object_id TEXT, entry_type TEXT)",
+    "CREATE TABLE index_entry (path TEXT PRIMARY KEY, object_id TEXT, mode TEXT, size INTEGER)",
+]
+
+
+def describe_schema(sqlite: SQLite) -> dict:
+    schema = {}
+    for table in sorted(sqlite.list_tables()):
+        columns = sqlite.select(f"PRAGMA table_info({table})")
+        indexes = sqlite.select(f"PRAGMA index_list({table})")
+        schema[table] = {
+            "columns": [(c["name"], c["type"], c["pk"]) for c in columns],
+            "indexes": sorted(
+                (
+                    i["unique"],
+                    tuple(
+                        c["name"]
+                        for c in sqlite.select(f"PRAGMA index_info({i['name']})")
+                    ),
+                )
+                for i in indexes
+            ),
+        }
+    return schema
+
+
+def fresh_database(sqlite_db_path: Path, binary_object_ids=False) -> Database:
+    """Database in files of its own next to `sqlite_db_path`"""
+    return Database(
+        SQLite(sqlite_db_path.with_name("fresh.db")),
+        binary_object_ids,
+        SQLite(sqlite_db_path.with_name("fresh_objects.db")),
+    )
+
+
+class TestDatabaseMigration:
+    def test_init_records_latest_version(self, database: Database):
+        assert database.is_initialized()
+        assert database.get_schema_version() == LATEST_VERSION
+        assert database.migrate() == []
+
+    def test_uninitialized_database(self, sqlite: SQLite):
+        database = Database(sqlite)
+        assert not database.is_initialized()
+
+    def test_migrate_legacy_database(self, sqlite_db_path: Path):
+        legacy = SQLite(sqlite_db_path)
+        for statement in LEGACY_SCHEMA:
+            legacy.execute(statement)
+        legacy.execute(
+            "INSERT INTO commit_parent VALUES ('child', 'parent', 0), ('child', 'parent', 0)"
+        )
+        legacy.execute(
+            "INSERT INTO tree_entry VALUES ('tree', 'a', '100644', 'blob', 'blob'), "
+            "('tree', 'a', '100644', 'blob', 'blob')"
+        )
+        legacy.execute(
+            "INSERT INTO blob VALUES ('blob', x'00', 1, '2024-01-01 00:00:00', NULL, NULL)"
+        )
+        database = Database(legacy)
+
+        assert database.is_initialized()
+        assert database.get_schema_version() == BASELINE_VERSION
+
+        applied = database.migrate()
+
+        assert applied == [m.version for m in MIGRATIONS]
+        assert database.get_schema_version() == LATEST_VERSION
+        parents = database.get_commit_parents("child")
+        assert len(parents) == 1
+        assert parents[0].parent_id == "parent"
+        assert len(database.get_child_tree_entries("tree")) == 1
+        # blobs moved to the objects database
+        assert "blob" not in legacy.list_tables()
+        blob = database.get_blob("blob")
+        assert blob is not None and blob.data == b"\x00"
+
+        fresh = fresh_database(sqlite_db_path)
+        fresh.init()
+        assert describe_schema(legacy) == describe_schema(fresh.sqlite)
+        assert describe_schema(database.objects) == describe_schema(fresh.objects)
+
+    def test_lookups_use_indexes(self, database: Database):
+        queries = [
+            ("SELECT * FROM tree_entry WHERE tree_id = 'a'", "idx_tree_entry_unique"),
+            (
+                "SELECT * FROM tree_entry WHERE entry_object_id = 'a' "
+                "and entry_type = 'tree' and entry_name = '.'",
+                "idx_tree_entry_entry_object_id",
+            ),
+            (
+                "SELECT * FROM commit_parent WHERE parent_id = 'a'",
+                "idx_commit_parent_parent_id",
+            ),
+            ("SELECT * FROM commit_parent WHERE commit_id = 'a'", "sqlite_autoindex"),
+        ]
+        for query, index_name in queries:
+            plan = database.sqlite.select(f"EXPLAIN QUERY PLAN {query}")
+            details = " ".join(row["detail"] for row in plan)
+            assert index_name in details, details
+
+
+class TestBinaryObjectIds:
+    def save_objects(self, database: Database) -> tuple[str, str]:
+        blob_id = "ab" * 20
+        tree_id = "cd" * 20
+        database.create_blobs([Blob(blob_id, b"data", 4, datetime.now())])
+        database.create_tree_entries(
+            [
+                TreeEntry(".", "040000", "tree", tree_id),
+                TreeEntry("a.txt", "100644", "blob", blob_id, tree_id),
+                TreeEntry("b.txt", "100644", "blob", "not_a_sha1", tree_id),
+            ]
+        )
+        return blob_id, tree_id
+
+    def test_convert_hex_database(self, database: Database, sqlite_db_path: Path):
+        blob_id, tree_id = self.save_objects(database)
+        assert not database.uses_binary_ids
+
+        assert database.convert_to_binary_ids()
+        assert not database.convert_to_binary_ids()
+
+        assert database.uses_binary_ids
+        assert database.list_existing_blob_ids([blob_id, "ef" * 20]) == {blob_id}
+        assert database.get_root_tree_entry(tree_id) is not None
+        assert sorted(
+            (entry.entry_name, entry.entry_object_id, entry.tree_id)
+            for entry in database.get_child_tree_entries(tree_id)
+        ) == [("a.txt", blob_id, tree_id), ("b.txt", "not_a_sha1", tree_id)]
+        stored = database.objects.select("SELECT object_id FROM blob")
+        assert stored == [{"object_id": bytes.fromhex(blob_id)}]
+
+        fresh = fresh_database(sqlite_db_path, binary_object_ids=True)
+        fresh.init()
+        assert fresh.uses_binary_ids
+        assert describe_schema(database.sqlite) == describe_schema(fresh.sqlite)
+        assert describe_schema(database.objects) == describe_schema(fresh.objects)
+
+    def test_object_tables_are_clustered_on_their_keys(self, sqlite_db_path: Path):
+        database = Database(SQLite(sqlite_db_path), binary_object_ids=True)
+        database.init()
+        tables = {
+            row["name"]: row["sql"]
+            for row in database.sqlite.select(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+
+        for table in ("commits", "commit_parent", "tree_entry"):
+            assert tables[table].endswith("WITHOUT ROWID"), table
+        assert "blob" not in tables
+        assert database.objects.list_tables() == ["blob", "blob_part"]
+        database.create_streamed_blob(
+            Blob("ef" * 20, None, 4, datetime.now()), [b"da", b"ta"], part_size=3
+        )
+        assert b"".join(database.iter_blob_parts("ef" * 20)) == b"data"
+        self.save_objects(database)
+        # root entries keep their missing tree_id
+        root = database.get_tree_entry({"entry_name": ".", "tree_id": None})
+        assert root is not None and root.tree_id is None
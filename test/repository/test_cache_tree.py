@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from repository.cache_tree import CacheTree
+from repository.repository import Repository
+from repository.tree_store import TreeStore
+from src.repository import cache_tree as cache_tree_module
+
+
+def index_entry(path: str, object_id: str) -> IndexEntry:
+    return IndexEntry(path=path, object_id=object_id, mode="100644", size=1)
+
+
+class TestCacheTree:
+    def test_commit_caches_directory_tree_ids(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        database.create_index_entries(
+            [
+                index_entry("./a/one.txt", "blob_1"),
+                index_entry("./a/b/two.txt", "blob_2"),
+                index_entry("./c/three.txt", "blob_3"),
+            ]
+        )
+        commit = repository.commit("Initial commit")
+        assert commit is not None
+
+        index_trees = database.list_index_trees()
+        assert sorted(index_trees) == [".", "./a", "./a/b", "./c"]
+        assert index_trees["."].object_id == commit.tree_id
+        assert index_trees["."].entry_count == 3
+        assert index_trees["./a"].entry_count == 2
+
+    def test_index_changes_invalidate_parent_directories(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        entries = [
+            index_entry("./a/one.txt", "blob_1"),
+            index_entry("./a/b/two.txt", "blob_2"),
+            index_entry("./c/three.txt", "blob_3"),
+        ]
+        database.create_index_entries(entries)
+        repository.commit("Initial commit")
+
+        repository.index_store.update([index_entry("./a/b/two.txt", "blob_4")])
+
+        assert sorted(database.list_index_trees()) == ["./c"]
+
+    def test_commit_rehashes_only_invalidated_directories(
+        self,
+        repository: Repository,
+        database: Database,
+        tree_store: TreeStore,
+    ):
+        repository.init()
+        database.create_index_entries(
+            [
+                index_entry("./a/one.txt", "blob_1"),
+                index_entry("./a/b/two.txt", "blob_2"),
+                index_entry("./c/d/three.txt", "blob_3"),
+            ]
+        )
+        repository.commit("Initial commit")
+        repository.index_store.update([index_entry("./a/one.txt", "blob_4")])
+
+        with patch.object(
+            cache_tree_module, "hash_tree", wraps=cache_tree_module.hash_tree
+        ) as hash_mock:
+            commit = repository.commit("Modify one")
+        assert commit is not None
+        assert hash_mock.call_count == 2
+
+        tree = tree_store.build_commit_tree(commit.tree_id)
+        assert sorted(
+            (entry.path, entry.object_id) for entry in tree.list_index_entries()
+        ) == [
+            ("./a/b/two.txt", "blob_2"),
+            ("./a/one.txt", "blob_4"),
+            ("./c/d/three.txt", "blob_3"),
+        ]
+
+        # the same tree as hashing the whole index from scratch
+        database.delete_index_trees(list(database.list_index_trees()))
+        fresh_tree, _, _ = CacheTree(database).build(database.list_index_entries())
+        assert fresh_tree.root_entry is not None
+        assert fresh_tree.root_entry.entry_object_id == commit.tree_id
+
+    def test_commit_without_changes_uses_cached_root(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        database.create_index_entries([index_entry("./a/one.txt", "blob_1")])
+        repository.commit("Initial commit")
+
+        with patch.object(
+            cache_tree_module, "hash_tree", wraps=cache_tree_module.hash_tree
+        ) as hash_mock:
+            assert repository.commit("Nothing") is None
+            staged = repository.get_staged_changes(repository.get_head_branch())
+        assert staged.is_empty()
+        hash_mock.assert_not_called()
+
+    def test_staged_changes_expand_cached_directories_from_storage(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        database.create_index_entries(
+            [
+                index_entry("./a/one.txt", "blob_1"),
+                index_entry("./c/two.txt", "blob_2"),
+            ]
+        )
+        first = repository.commit("Initial commit")
+        assert first is not None
+        repository.index_store.update([index_entry("./a/one.txt", "blob_3")])
+        repository.commit("Modify one")
+
+        # move HEAD back without touching the index, like a soft reset
+        database.update_ref(
+            repository.get_head_branch(), {"target_object_id": first.object_id}
+        )
+        staged = repository.get_staged_changes(repository.get_head_branch())
+
+        assert [(e.path, e.object_id) for e in staged.modified] == [
+            ("./a/one.txt", "blob_3")
+        ]
+        assert staged.added == [] and staged.deleted == []
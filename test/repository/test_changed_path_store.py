@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from repository.bloom_filter import MAX_CHANGED_PATHS, BloomFilter
+from repository.repository import Repository
+
+
+def commit_files(repository: Repository, database: Database, files: dict[str, str]):
+    entries = [IndexEntry(path, object_id, "100644") for path, object_id in files.items()]
+    database.delete_index_entries(entries)
+    database.create_index_entries(entries)
+    return repository.commit(f"update {', '.join(files)}")
+
+
+def log_messages(repository: Repository, path: str) -> list[str]:
+    return [
+        commit.message
+        for commit in repository.commit_store.iter_commit_logs(
+            repository.get_head_branch().target_object_id, path=path
+        )
+    ]
+
+
+class TestBloomFilter:
+    def test_contains_its_keys(self):
+        keys = [f"./dir/file{i}.txt" for i in range(100)]
+        bloom = BloomFilter.from_keys(keys)
+
+        assert len(bloom.data) == 125
+        assert all(key in bloom for key in keys)
+        assert sum(f"./other{i}" in bloom for i in range(1000)) < 50
+
+    def test_empty_and_full_filters(self):
+        assert "./a" not in BloomFilter.from_keys([])
+        full = BloomFilter.from_keys(f"./{i}" for i in range(MAX_CHANGED_PATHS + 1))
+        assert full.data == b"\xff"
+        assert "./anything" in full
+
+
+class TestChangedPathStore:
+    def test_log_lists_commits_that_changed_a_path(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        commit_files(repository, database, {"./a.txt": "a1", "./d/b.txt": "b1"})
+        commit_files(repository, database, {"./a.txt": "a2"})
+        commit_files(repository, database, {"./d/b.txt": "b2"})
+        commit_files(repository, database, {"./d/c.txt": "c1"})
+
+        assert log_messages(repository, "./a.txt") == [
+            "update ./a.txt",
+            "update ./a.txt, ./d/b.txt",
+        ]
+        assert log_messages(repository, "./d") == [
+            "update ./d/c.txt",
+            "update ./d/b.txt",
+            "update ./a.txt, ./d/b.txt",
+        ]
+        assert log_messages(repository, "./missing.txt") == []
+
+        worktree_path = repository.path.worktree_path
+        assert [c.message for c in repository.log(path=str(worktree_path / "d/c.txt"))] == [
+            "update ./d/c.txt"
+        ]
+
+    def test_filters_skip_tree_lookups(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        commit_files(repository, database, {"./a.txt": "a0", "./b.txt": "b0"})
+        for i in range(1, 30):
+            commit_files(repository, database, {"./b.txt": f"b{i}"})
+        store = repository.commit_store.changed_path_store
+
+        with patch.object(
+            store, "find_path_object_id", wraps=store.find_path_object_id
+        ) as lookup_mock:
+            assert len(log_messages(repository, "./a.txt")) == 1
+        assert lookup_mock.call_count < 10
+
+        # commits stored without a filter fall back to their trees
+        database.delete_commit_blooms()
+        with patch.object(
+            store, "find_path_object_id", wraps=store.find_path_object_id
+        ) as lookup_mock:
+            assert len(log_messages(repository, "./a.txt")) == 1
+        assert lookup_mock.call_count == 59
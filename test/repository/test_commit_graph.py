@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+from database.database import Database
+from repository.commit_graph import CommitGraph
+from repository.repository import Repository
+
+
+def save_chain(repository: Repository, parent, name: str, length: int):
+    commits = []
+    for i in range(length):
+        parent = repository.commit_store.save_commit(f"{name}{i}", f"{name}{i}", parent)
+        commits.append(parent)
+    return commits
+
+
+class TestCommitGraph:
+    def test_merge_base_walks_the_graph_without_queries(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        base = repository.commit_store.save_commit("base", "base")
+        left = save_chain(repository, base, "left", 50)
+        right = save_chain(repository, base, "right", 80)
+
+        with patch.object(
+            database.sqlite, "select", wraps=database.sqlite.select
+        ) as select_mock, patch.object(
+            database.sqlite, "iterate", wraps=database.sqlite.iterate
+        ) as iterate_mock:
+            merge_base = repository.find_merge_base(left[-1], right[-1])
+
+        assert merge_base == base
+        # graph freshness check and the final get_commit only
+        assert select_mock.call_count + iterate_mock.call_count <= 3
+
+    def test_counts_commits_only_on_first_load(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        base = repository.commit_store.save_commit("base", "base")
+
+        with patch.object(
+            database, "count_commits", wraps=database.count_commits
+        ) as count_mock, patch.object(
+            database, "count_commit_graph", wraps=database.count_commit_graph
+        ) as graph_count_mock:
+            left = save_chain(repository, base, "left", 5)
+            right = save_chain(repository, base, "right", 5)
+            assert repository.find_merge_base(left[-1], right[-1]) == base
+            assert repository.commit_store.is_ancestor(
+                base.object_id, left[-1].object_id
+            )
+
+        count_mock.assert_not_called()
+        graph_count_mock.assert_not_called()
+
+    def test_reloads_graph_changed_by_another_instance(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        base = repository.commit_store.save_commit("base", "base")
+        graph = CommitGraph(database).load()
+        child = repository.commit_store.save_commit("child", "child", base)
+
+        assert list(graph.iter_ancestry(child.object_id)) == [
+            child.object_id,
+            base.object_id,
+        ]
+
+    def test_merge_base_with_merge_commit(self, repository: Repository):
+        """
+          A - B - C - M - D
+               \\     /
+                E - F - G
+        """
+        repository.init()
+        store = repository.commit_store
+        a = store.save_commit("A", "A")
+        b = store.save_commit("B", "B", a)
+        c = store.save_commit("C", "C", b)
+        e = store.save_commit("E", "E", b)
+        f = store.save_commit("F", "F", e)
+        m = store.save_merge_commit("M", [c, f], "M")
+        d = store.save_commit("D", "D", m)
+        g = store.save_commit("G", "G", f)
+
+        assert repository.find_merge_base(d, g) == f
+        assert store.is_ancestor(f.object_id, d.object_id)
+        assert store.is_ancestor(d.object_id, d.object_id)
+        assert not store.is_ancestor(g.object_id, d.object_id)
+        assert not store.is_ancestor(d.object_id, a.object_id)
+
+    def test_rebuilds_graph_for_commits_stored_without_it(
+        self, repository: Repository, database: Database
+    ):
+        repository.init()
+        store = repository.commit_store
+        a = store.save_commit("A", "A")
+        b = store.save_commit("B", "B", a)
+        c = store.save_commit("C", "C", a)
+        m = store.save_merge_commit("M", [b, c], "M")
+        database.delete_commit_graph()
+
+        graph = CommitGraph(database).load()
+
+        assert database.count_commit_graph() == 4
+        assert list(graph.iter_ancestry(m.object_id, first_parent=True)) == [
+            m.object_id,
+            b.object_id,
+            a.object_id,
+        ]
+        assert graph.merge_base(b.object_id, c.object_id) == a.object_id
+        entries = list(database.iter_commit_graph())
+        positions = {entry.object_id: entry.position for entry in entries}
+        merge_entry = entries[positions[m.object_id]]
+        assert (merge_entry.parent1, merge_entry.parent2) == (
+            positions[b.object_id],
+            positions[c.object_id],
+        )
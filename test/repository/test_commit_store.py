@@ -34,11 +34,57 @@ class TestCommitStore:
         commit2 = repository.commit_store.save_commit("ref_tree_id2", "commit message 2", commit)
         commit3 = repository.commit_store.save_commit("ref_tree_id3", "commit message 3", commit2)
 
-        commit_logs = repository.commit_store.list_commit_logs(commit3.object_id)
+        commit_logs = list(repository.commit_store.iter_commit_logs(commit3.object_id))
+        assert len(commit_logs) == 3
         assert commit_logs[0].object_id == commit3.object_id
         assert commit_logs[1].object_id == commit2.object_id
         assert commit_logs[2].object_id == commit.object_id
 
+    def test_iter_commit_logs_with_max_count_and_skip(self, repository: Repository):
+        repository.init()
+        commits = [repository.commit_store.save_commit("ref_tree_id0", "commit 0")]
+        for i in range(1, 6):
+            commits.append(
+                repository.commit_store.save_commit(
+                    f"ref_tree_id{i}", f"commit {i}", commits[-1]
+                )
+            )
+
+        commit_logs = list(
+            repository.commit_store.iter_commit_logs(
+                commits[-1].object_id, max_count=2, skip=1
+            )
+        )
+        assert [c.message for c in commit_logs] == ["commit 4", "commit 3"]
+
+    def test_iter_commit_logs_with_merge_commit(self, repository: Repository):
+        """
+          A - B - D - M
+               \     /
+                C --
+        """
+        repository.init()
+        commit_store = repository.commit_store
+        a = commit_store.save_commit("A", "A")
+        b = commit_store.save_commit("B", "B", a)
+        c = commit_store.save_commit("C", "C", b)
+        d = commit_store.save_commit("D", "D", b)
+        e = commit_store.save_commit("E", "E", d)
+        m = commit_store.save_merge_commit("M", [e, c], "M")
+
+        commit_logs = list(commit_store.iter_commit_logs(m.object_id))
+        messages = [commit.message for commit in commit_logs]
+        assert len(messages) == 6
+        assert messages[0] == "M"
+        assert messages[1] == "E"
+        assert set(messages[2:4]) == {"C", "D"}
+        assert messages[4:] == ["B", "A"]
+
+        first_parent_logs = list(
+            commit_store.iter_commit_logs(m.object_id, first_parent=True)
+        )
+        assert [c.message for c in first_parent_logs] == ["M", "E", "D", "B", "A"]
+
     # TODO merge commit generation test
     def test_generation_number(self, repository: Repository):
         """
@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+import errno
+from pathlib import Path
+import threading
+import time
+from unittest.mock import patch
+
+from src.repository.fsmonitor import FsMonitor, InotifyWatcher, PollingWatcher
+from src.repository.repository import Repository
+
+
+@contextmanager
+def running(fsmonitor: FsMonitor):
+    stop = threading.Event()
+    thread = threading.Thread(target=fsmonitor.run, args=(stop,))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not fsmonitor.is_running():
+            assert time.monotonic() < deadline, "fsmonitor did not start"
+            time.sleep(0.01)
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def unstaged_paths(repository: Repository):
+    result = repository.status()
+    assert result.value is not None
+    diff = result.value.unstaged
+    return (
+        sorted(e.path for e in diff.added),
+        sorted(e.path for e in diff.modified),
+        sorted(e.path for e in diff.deleted),
+    )
+
+
+class TestFsMonitor:
+    def test_status_examines_only_reported_paths(
+        self, repository: Repository, test_repo_directory: Path
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_repo_directory.as_posix()):
+            (test_repo_directory / "a.txt").write_bytes(b"a")
+            (test_repo_directory / "dir").mkdir()
+            (test_repo_directory / "dir" / "b.txt").write_bytes(b"b")
+            repository.add_index(["."])
+
+            with running(repository.fsmonitor):
+                # no saved state yet, the first status walks everything
+                assert unstaged_paths(repository) == ([], [], [])
+
+                (test_repo_directory / "a.txt").write_bytes(b"changed")
+                (test_repo_directory / "dir" / "new.txt").write_bytes(b"new")
+                with patch.object(
+                    repository.worktree, "walk", wraps=repository.worktree.walk
+                ) as walk_mock:
+                    assert unstaged_paths(repository) == (
+                        ["./dir/new.txt"],
+                        ["./a.txt"],
+                        [],
+                    )
+                walked = {Path(call.args[0]).name for call in walk_mock.call_args_list}
+                assert walked == {"a.txt", "new.txt"}
+
+                # unclean paths stay reported without further changes
+                assert unstaged_paths(repository) == (
+                    ["./dir/new.txt"],
+                    ["./a.txt"],
+                    [],
+                )
+
+                repository.add_index(["."])
+                (test_repo_directory / "dir" / "b.txt").unlink()
+                assert unstaged_paths(repository) == ([], [], ["./dir/b.txt"])
+
+    def test_status_without_daemon_walks_worktree(
+        self, repository: Repository, test_repo_directory: Path
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_repo_directory.as_posix()):
+            (test_repo_directory / "a.txt").write_bytes(b"a")
+            assert repository.fsmonitor.sync() is None
+            assert unstaged_paths(repository) == (["./a.txt"], [], [])
+
+    def test_polling_fallback(
+        self, repository: Repository, test_repo_directory: Path
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_repo_directory.as_posix()):
+            (test_repo_directory / "a.txt").write_bytes(b"a")
+            repository.add_index(["."])
+
+            with patch(
+                "src.repository.fsmonitor.InotifyWatcher", side_effect=OSError
+            ), running(repository.fsmonitor):
+                assert unstaged_paths(repository) == ([], [], [])
+                (test_repo_directory / "b.txt").write_bytes(b"b")
+                assert unstaged_paths(repository) == (["./b.txt"], [], [])
+
+
+def test_polling_watcher_reports_changes(tmp_path: Path):
+    repo_dir = tmp_path / ".gitoy"
+    repo_dir.mkdir()
+    (tmp_path / "a.txt").write_bytes(b"a")
+    watcher = PollingWatcher(tmp_path, repo_dir, interval=0)
+
+    (tmp_path / "a.txt").write_bytes(b"changed")
+    (tmp_path / "b.txt").write_bytes(b"b")
+    (repo_dir / "fsmonitor-cookie-1").touch()
+    events = watcher.read(0)
+    assert events.paths == ["./a.txt", "./b.txt"]
+    assert events.cookies == ["fsmonitor-cookie-1"]
+    assert watcher.read(0).cookies == []
+
+
+def test_inotify_watcher_raises_when_watches_run_out(tmp_path: Path):
+    repo_dir = tmp_path / ".gitoy"
+    repo_dir.mkdir()
+    (tmp_path / "dir").mkdir()
+    add_watch = InotifyWatcher._add_watch
+    no_space = OSError(errno.ENOSPC, "inotify_add_watch failed")
+
+    def add_watch_until_full(watcher, path, mask):
+        if path.endswith("full"):
+            raise no_space
+        return add_watch(watcher, path, mask)
+
+    with patch.object(InotifyWatcher, "_add_watch", side_effect=no_space):
+        try:
+            InotifyWatcher(tmp_path, repo_dir)
+            assert False, "OSError not raised"
+        except OSError as error:
+            # the daemon falls back to polling
+            assert error.errno == errno.ENOSPC
+
+    watcher = InotifyWatcher(tmp_path, repo_dir)
+    try:
+        with patch.object(InotifyWatcher, "_add_watch", add_watch_until_full):
+            (tmp_path / "full").mkdir()
+            events = watcher.read(1)
+        assert events.overflow
+        assert "./full" in events.paths
+
+        # a directory removed during the walk is skipped
+        missing = OSError(errno.ENOENT, "inotify_add_watch failed")
+        with patch.object(InotifyWatcher, "_add_watch", side_effect=missing):
+            watcher._watch_tree(str(tmp_path / "gone"), "./gone")
+    finally:
+        watcher.close()
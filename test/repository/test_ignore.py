@@ -0,0 +1,43 @@
+from src.repository.ignore import IgnoreRules, is_ignored
+
+
+class TestIgnoreRules:
+    def test_unanchored_patterns_match_at_any_depth(self):
+        rules = IgnoreRules(".", ["node_modules", "*.pyc"])
+        assert rules.match("./node_modules", True) is True
+        assert rules.match("./web/node_modules", True) is True
+        assert rules.match("./pkg/mod.pyc", False) is True
+        assert rules.match("./pkg/mod.py", False) is None
+
+    def test_anchored_patterns(self):
+        rules = IgnoreRules(".", ["/top.txt", "docs/*.md", "docs/**/*.txt", "out/**"])
+        assert rules.match("./top.txt", False) is True
+        assert rules.match("./sub/top.txt", False) is None
+        assert rules.match("./docs/a.md", False) is True
+        assert rules.match("./docs/sub/a.md", False) is None
+        assert rules.match("./docs/a/b/c.txt", False) is True
+        assert rules.match("./out/file", False) is True
+        assert rules.match("./out", True) is None
+
+    def test_directory_only_patterns(self):
+        rules = IgnoreRules(".", ["build/"])
+        assert rules.match("./build", True) is True
+        assert rules.match("./build", False) is None
+
+    def test_last_matching_pattern_wins(self):
+        rules = IgnoreRules(".", ["*.log", "!keep.log", "# comment", "", "\\#hash"])
+        assert rules.match("./debug.log", False) is True
+        assert rules.match("./keep.log", False) is False
+        assert rules.match("./#hash", False) is True
+
+        rules = IgnoreRules(".", ["!keep.log", "*.log"])
+        assert rules.match("./keep.log", False) is True
+
+    def test_nested_rules_take_precedence(self):
+        root = IgnoreRules(".", ["*.log"])
+        nested = IgnoreRules("./sub", ["!keep.log", "/local"])
+        rules = (root, nested)
+        assert is_ignored(rules, "./sub/keep.log", False) is False
+        assert is_ignored(rules, "./sub/other.log", False) is True
+        assert is_ignored(rules, "./sub/local", False) is True
+        assert is_ignored(rules, "./sub/deeper/local", False) is False
@@ -0,0 +1,125 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from repository.index_backend import FileIndexBackend
+from repository.index_file import IndexFile, IndexFileError
+from repository.index_store import IndexStore
+from repository.repo_path import RepositoryPath
+from repository.repository import Repository
+
+
+OBJECT_ID = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.fixture(scope="function")
+def index_file(repository_path: RepositoryPath):
+    repository_path.create_repo_dir()
+    return IndexFile(repository_path.create_repo_db_path().with_name("index"))
+
+
+@pytest.fixture(scope="function")
+def index_store(database: Database, repository_path: RepositoryPath, index_file):
+    return IndexStore(
+        database, repository_path, FileIndexBackend(index_file, database)
+    )
+
+
+class TestIndexFile:
+    def test_round_trip(self, index_file: IndexFile):
+        entries = [
+            IndexEntry("./b.txt", OBJECT_ID, "0o100755", 3, 10, 11, 12, 13),
+            IndexEntry("./a/é.txt", "blob_1", "100644"),
+        ]
+        index_file.write(entries)
+
+        snapshot = index_file.load()
+
+        assert len(snapshot) == 2
+        loaded = list(snapshot)
+        assert [entry.path for entry in loaded] == ["./a/é.txt", "./b.txt"]
+        assert loaded[0] == entries[1]
+        assert loaded[0].mtime_ns is None and loaded[0].dev is None
+        assert loaded[1] == entries[0]
+        assert (loaded[1].mtime_ns, loaded[1].ctime_ns) == (10, 11)
+        assert (loaded[1].inode, loaded[1].dev) == (12, 13)
+
+    def test_find_and_prefix(self, index_file: IndexFile):
+        index_file.write(
+            IndexEntry(path, OBJECT_ID, "100644")
+            for path in ["./a/1", "./a/2", "./ab", "./b/1"]
+        )
+        snapshot = index_file.load()
+
+        found = snapshot.find("./ab")
+        assert found is not None and found.path == "./ab"
+        assert snapshot.find("./a") is None
+        assert [e.path for e in snapshot.iter_prefix("./a/")] == ["./a/1", "./a/2"]
+        assert [e.path for e in snapshot.iter_prefix("./c")] == []
+
+    def test_load_rejects_corrupt_file(self, index_file: IndexFile):
+        index_file.write([IndexEntry("./a.txt", OBJECT_ID, "100644")])
+        data = bytearray(index_file.path.read_bytes())
+        data[20] ^= 0xFF
+        index_file.path.write_bytes(data)
+
+        with pytest.raises(IndexFileError):
+            index_file.load()
+
+
+class TestFileIndexBackend:
+    def test_repository_uses_index_file(
+        self,
+        repository: Repository,
+        database: Database,
+        index_file: IndexFile,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "a.txt").write_text("a")
+            (test_directory / "b.txt").write_text("b")
+            assert repository.add_index(["."]).success
+            assert repository.commit("Initial commit") is not None
+
+            (test_directory / "a.txt").write_text("changed")
+            status = repository.status().value
+
+        assert database.list_index_entries() == []
+        assert sorted(entry.path for entry in index_file.load()) == [
+            "./test_dir/a.txt",
+            "./test_dir/b.txt",
+        ]
+        assert status is not None
+        assert status.staged.is_empty()
+        assert [e.path for e in status.unstaged.modified] == ["./test_dir/a.txt"]
+
+    def test_index_file_follows_the_transaction(
+        self, database: Database, index_store: IndexStore, index_file: IndexFile
+    ):
+        database.init()
+        index_store.create([IndexEntry("./a.txt", OBJECT_ID, "100644")])
+
+        with pytest.raises(RuntimeError):
+            with database.transaction():
+                index_store.create([IndexEntry("./b.txt", OBJECT_ID, "100644")])
+                assert len(index_file.load()) == 1
+                raise RuntimeError()
+
+        assert [entry.path for entry in index_store.find_all()] == ["./a.txt"]
+        assert [entry.path for entry in index_file.load()] == ["./a.txt"]
+
+    def test_existing_index_entries_move_to_the_file(
+        self, database: Database, index_store: IndexStore, index_file: IndexFile
+    ):
+        database.init()
+        database.create_index_entries([IndexEntry("./a.txt", OBJECT_ID, "100644")])
+
+        assert [entry.path for entry in index_store.find_all()] == ["./a.txt"]
+        index_store.create([IndexEntry("./b.txt", OBJECT_ID, "100644")])
+
+        assert [entry.path for entry in index_file.load()] == ["./a.txt", "./b.txt"]
@@ -6,9 +6,11 @@ error handling, and edge cases.
 """
 
 import datetime
+import os
 from pathlib import Path
 import sys
 import tempfile
+import time
 from unittest import mock
 from unittest.mock import patch
 
@@ -22,6 +24,8 @@ from src.repository.convert import Convert
 from src.repository.repo_path import RepositoryPath
 from src.repository.repository import Repository
 from src.repository.tree_store import TreeStore
+from src.util.file import read_chunks
+from src.util.worker_pool import WorkerPool
 
 # Add src to path
 src_path = Path(__file__).parent.parent / "src"
@@ -153,7 +157,11 @@ class TestRepositoryAddIndex:
             assert result.error == "Path temp_file did not match any files"
 
     def test_add_index_with_one_file(
-        self, sqlite: SQLite, repository: Repository, test_file_path: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_file_path: Path,
     ):
         repository.init()
 
@@ -172,7 +180,7 @@ class TestRepositoryAddIndex:
             assert entry_from_db[0]["mode"] == test_file_entry.mode
             assert entry_from_db[0]["size"] == test_file_entry.size
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
             assert blobs[0]["object_id"] == repository.hash_file.hash(test_file_path)
 
@@ -181,7 +189,11 @@ class TestRepositoryAddIndex:
             assert blobs[0]["size"] == test_file_path.stat().st_size
 
     def test_add_index_with_same_content_multiple_files(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -196,12 +208,16 @@ class TestRepositoryAddIndex:
             assert len(entries) == 2
             assert entries[0]["object_id"] == entries[1]["object_id"]
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
             assert entries[0]["object_id"] == blobs[0]["object_id"]
 
     def test_add_index_with_multiple_files(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -216,11 +232,15 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 2
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 2
 
     def test_add_index_with_mutiple_files_in_directory(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -236,12 +256,13 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 2
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 2
 
     def test_add_index_with_large_file(
         self,
         sqlite: SQLite,
+        objects_sqlite: SQLite,
         repository: Repository,
         test_directory: Path,
         test_large_file_path: Path,
@@ -258,14 +279,99 @@ class TestRepositoryAddIndex:
             assert len(entries) == 1
             assert entries[0]["size"] == test_large_file_path.stat().st_size
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
             assert blobs[0]["object_id"] == repository.hash_file.hash(test_large_file_path)
             assert blobs[0]["data"] == compressed
             assert blobs[0]["size"] == test_large_file_path.stat().st_size
 
+    def test_add_index_reads_each_file_once(
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
+    ):
+        """Hashing and compression share the buffer of a single read."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "one.txt").write_bytes(b"one")
+            (test_directory / "two.txt").write_bytes(b"two")
+
+            with patch.object(
+                repository.hash_file, "hash_buffer", wraps=repository.hash_file.hash_buffer
+            ) as hash_mock, patch.object(
+                repository.hash_file, "hash"
+            ) as path_hash_mock, patch.object(
+                repository.compress_file, "compress"
+            ) as path_compress_mock:
+                result = repository.add_index(["one.txt", "two.txt"])
+
+            assert result.success is True
+            assert hash_mock.call_count == 2
+            path_hash_mock.assert_not_called()
+            path_compress_mock.assert_not_called()
+
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            assert sorted(
+                repository.compress_file.decompress(blob["data"]) for blob in blobs
+            ) == [b"one", b"two"]
+
+    def test_add_index_compresses_on_many_workers(
+        self, objects_sqlite: SQLite, repository: Repository, test_directory: Path
+    ):
+        """Each worker thread compresses with its own zstd context."""
+        repository.init()
+        repository.worker_pool = WorkerPool(8)
+        contents = {
+            f"file{i:03}.bin": os.urandom(150 * 1024) + bytes(150 * 1024)
+            for i in range(200)
+        }
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            for name, content in contents.items():
+                (test_directory / name).write_bytes(content)
+            assert repository.add_index(["."]).success
+
+        blobs = objects_sqlite.select(f"SELECT object_id, data FROM {Blob.table_name()}")
+        assert sorted(
+            repository.compress_file.decompress(blob["data"]) for blob in blobs
+        ) == sorted(contents.values())
+
+    def test_add_index_flushes_blobs_in_batches(
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
+    ):
+        """Blobs are written whenever the buffered bytes reach the buffer size."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            for i in range(5):
+                (test_directory / f"file{i}.txt").write_bytes(f"content {i}".encode())
+
+            with patch.object(
+                repository.blob_store, "create", wraps=repository.blob_store.create
+            ) as create_mock:
+                result = repository.add_index(["."], buffer_size=1)
+
+            assert result.success is True
+            assert all(len(call.args[0]) <= 1 for call in create_mock.call_args_list)
+
+            entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
+            assert len(entries) == 5
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            assert len(blobs) == 5
+
     def test_add_index_when_update_file_index_entry_replacement(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -277,7 +383,7 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 1
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
             assert entries[0]["object_id"] == blobs[0]["object_id"]
 
@@ -289,14 +395,18 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 1
 
-            blobs = sqlite.select(
+            blobs = objects_sqlite.select(
                 f"SELECT * FROM {Blob.table_name()} ORDER BY created_at ASC"
             )
             assert len(blobs) == 2
             assert entries[0]["object_id"] == blobs[1]["object_id"]
 
     def test_add_index_when_add_new_and_update_file(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -316,11 +426,15 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 2
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 3
 
     def test_add_index_when_add_completed_same_file(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -334,11 +448,15 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 1
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
 
     def test_add_index_duplicate_paths_in_single_call(
-        self, sqlite: SQLite, repository: Repository, test_directory: Path
+        self,
+        sqlite: SQLite,
+        objects_sqlite: SQLite,
+        repository: Repository,
+        test_directory: Path,
     ):
         repository.init()
 
@@ -351,9 +469,74 @@ class TestRepositoryAddIndex:
             entries = sqlite.select(f"SELECT * FROM {IndexEntry.table_name()}")
             assert len(entries) == 1
 
-            blobs = sqlite.select(f"SELECT * FROM {Blob.table_name()}")
+            blobs = objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")
             assert len(blobs) == 1
 
+    def test_add_index_streams_large_files_into_blob_parts(
+        self, repository: Repository, objects_sqlite: SQLite, test_directory: Path
+    ):
+        repository.init()
+        content = os.urandom(200 * 1024)
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()), patch.object(
+            repository.convert, "stream_size", 64 * 1024
+        ):
+            path = test_directory / "large.bin"
+            path.write_bytes(content)
+            (test_directory / "small.txt").write_text("small")
+            assert repository.add_index(["."]).success
+            assert repository.commit("large file") is not None
+
+            blobs = objects_sqlite.select(
+                f"SELECT size, data IS NULL AS streamed FROM {Blob.table_name()} "
+                "ORDER BY size"
+            )
+            assert blobs == [
+                {"size": 5, "streamed": 0},
+                {"size": len(content), "streamed": 1},
+            ]
+            assert objects_sqlite.select("SELECT part FROM blob_part") == [{"part": 0}]
+
+            repository.create_branch("feature")
+            assert repository.checkout("feature").success
+            path.unlink()
+            assert repository.add_index(["."]).success
+            assert repository.commit("remove large file") is not None
+            assert repository.checkout("main").success
+
+        assert path.read_bytes() == content
+
+    def test_add_index_reads_large_files_once(
+        self, repository: Repository, objects_sqlite: SQLite, test_directory: Path
+    ):
+        repository.init()
+        content = os.urandom(200 * 1024)
+        reads = []
+
+        def counted_read_chunks(path, *args, **kwargs):
+            reads.append(Path(path).name)
+            return read_chunks(path, *args, **kwargs)
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()), patch.object(
+            repository.convert, "stream_size", 64 * 1024
+        ), patch(
+            "src.repository.compress_file.read_chunks", counted_read_chunks
+        ), patch("src.repository.hash_file.read_chunks", counted_read_chunks):
+            (test_directory / "large.bin").write_bytes(content)
+            (test_directory / "copy.bin").write_bytes(content)
+            assert repository.add_index(["."]).success
+
+        assert sorted(reads) == ["copy.bin", "large.bin"]
+        entries = repository.index_store.find_by_paths(
+            [test_directory / "large.bin", test_directory / "copy.bin"]
+        )
+        assert len(entries) == 2
+        assert {entry.object_id for entry in entries} == {
+            repository.hash_file.hash_buffer(content)
+        }
+        assert len(objects_sqlite.select(f"SELECT * FROM {Blob.table_name()}")) == 1
+        assert objects_sqlite.select("SELECT part FROM blob_part") == [{"part": 0}]
+
 
 class TestRepositoryStatus:
     """Test cases for Repository status functionality."""
@@ -552,6 +735,144 @@ class TestRepositoryStatus:
             ]
 
 
+    def test_status_skips_ignored_files(
+        self, repository: Repository, test_repo_directory: Path
+    ):
+        """Ignored directories are pruned and tracked files are never ignored."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_repo_directory.as_posix()):
+            (test_repo_directory / "tracked.log").write_bytes(b"tracked")
+            repository.add_index(["tracked.log"])
+
+            (test_repo_directory / ".gitoyignore").write_text("*.log\nnode_modules/\n")
+            (test_repo_directory / "debug.log").write_bytes(b"debug")
+            node_modules = test_repo_directory / "web" / "node_modules"
+            node_modules.mkdir(parents=True)
+            (node_modules / "module.js").write_bytes(b"module")
+            (test_repo_directory / "web" / "app.js").write_bytes(b"app")
+
+            with patch("os.scandir", wraps=os.scandir) as scandir_mock:
+                result = repository.status()
+            scanned = [call.args[0] for call in scandir_mock.call_args_list]
+            assert os.fspath(node_modules) not in scanned
+
+            assert result.value is not None
+            unstaged = result.value.unstaged
+            assert sorted(e.path for e in unstaged.added) == [
+                "./.gitoyignore",
+                "./web/app.js",
+            ]
+            assert unstaged.modified == []
+            assert unstaged.deleted == []
+
+    def test_status_skips_hashing_files_with_matching_stat(
+        self, repository: Repository, test_directory: Path
+    ):
+        """Files whose stat data matches the index are not read again."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            path = test_directory / "cached.txt"
+            path.write_bytes(b"cached content")
+            an_hour_ago = time.time_ns() - 3600 * 1_000_000_000
+            os.utime(path, ns=(an_hour_ago, an_hour_ago))
+
+            repository.add_index([path.name])
+            entry = repository.index_store.find_by_paths([path.name])[0]
+            assert entry.mtime_ns == an_hour_ago
+            assert entry.inode == path.stat().st_ino
+
+            with patch.object(
+                repository.hash_file,
+                "hash_buffer",
+                wraps=repository.hash_file.hash_buffer,
+            ) as hash_mock:
+                result = repository.status()
+                assert hash_mock.call_count == 0
+
+            assert result.value is not None
+            assert result.value.unstaged.is_empty()
+
+    def test_status_does_not_cache_racily_clean_files(
+        self, repository: Repository, test_directory: Path
+    ):
+        """A file written in the same timestamp tick as the index is rehashed."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            path = test_directory / "racy.txt"
+            path.write_bytes(b"aaaa")
+            repository.add_index([path.name])
+
+            entry = repository.index_store.find_by_paths([path.name])[0]
+            assert entry.size == 4
+            assert entry.mtime_ns is None
+
+            stat = path.stat()
+            path.write_bytes(b"bbbb")
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            result = repository.status()
+            assert result.value is not None
+            assert [e.path for e in result.value.unstaged.modified] == [entry.path]
+
+    def test_status_refreshes_stat_of_unchanged_files(
+        self, repository: Repository, test_directory: Path
+    ):
+        """Unchanged files hashed by status get their stat data cached."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            path = test_directory / "refresh.txt"
+            path.write_bytes(b"refresh content")
+            repository.add_index([path.name])
+            assert repository.index_store.find_by_paths([path.name])[0].mtime_ns is None
+
+            an_hour_ago = time.time_ns() - 3600 * 1_000_000_000
+            os.utime(path, ns=(an_hour_ago, an_hour_ago))
+
+            result = repository.status()
+            assert result.value is not None
+            assert result.value.unstaged.is_empty()
+            entry = repository.index_store.find_by_paths([path.name])[0]
+            assert entry.mtime_ns == an_hour_ago
+
+            with patch.object(repository.hash_file, "hash_buffer") as hash_mock:
+                repository.status()
+                hash_mock.assert_not_called()
+
+    def test_metadata_commands_do_not_open_objects_database(
+        self, repository: Repository, objects_sqlite: SQLite, test_directory: Path
+    ):
+        """Blob payloads are only read by commands that need file contents."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            path = test_directory / "file.txt"
+            path.write_bytes(b"content")
+            an_hour_ago = time.time_ns() - 3600 * 1_000_000_000
+            os.utime(path, ns=(an_hour_ago, an_hour_ago))
+            repository.add_index([path.name])
+            assert repository.commit("first") is not None
+            repository.create_branch("feature")
+
+            assert objects_sqlite.conn is not None
+            objects_sqlite.conn.close()
+            objects_sqlite.conn = None
+            with patch.object(
+                objects_sqlite, "connect", side_effect=AssertionError
+            ) as connect_mock:
+                status = repository.status().value
+                assert [commit.message for commit in repository.log()] == ["first"]
+                assert len(repository.list_branches()) == 2
+            connect_mock.assert_not_called()
+
+        assert status is not None
+        assert status.staged.is_empty() and status.unstaged.is_empty()
+        assert objects_sqlite.select("PRAGMA page_size") == [{"page_size": 64 * 1024}]
+
+
 class TestRepositoryCommit:
     def test_no_update_commit(
         self, repository: Repository, database: Database, tree_store: TreeStore
@@ -1994,7 +2315,7 @@ class TestRepositoryCheckout:
                 file_content = f.read()
             assert file_content == "Modified content"
 
-            logs = repository.log()
+            logs = list(repository.log())
             assert len(logs) == 2
             assert logs[0].message == "Modify file in new branch"
             assert logs[1].message == "Initial commit"
@@ -2017,7 +2338,7 @@ class TestRepositoryCheckout:
             assert status.staged.is_empty()
             assert status.unstaged.is_empty()
 
-            logs = repository.log()
+            logs = list(repository.log())
             assert len(logs) == 1
             assert logs[0].message == "Initial commit"
 
@@ -2028,7 +2349,7 @@ class TestRepositoryCheckout:
             repository.add_index([main_new_file.name])
             repository.commit("Add new file in main branch")
 
-            logs = repository.log()
+            logs = list(repository.log())
             assert len(logs) == 2
             assert logs[0].message == "Add new file in main branch"
             assert logs[1].message == "Initial commit"
@@ -2057,6 +2378,50 @@ class TestRepositoryCheckout:
             assert file_content == "Modified content"
             assert test_file_path.stat().st_mode == path.stat().st_mode
 
+    def test_checkout_writes_blobs_in_batches(
+        self,
+        repository: Repository,
+        test_directory: Path,
+    ):
+        """Blobs are streamed from batched queries, shared contents included."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "keep.txt").write_bytes(b"keep")
+            repository.add_index(["."])
+            repository.commit("Initial commit")
+            repository.create_branch("feature")
+            repository.checkout("feature")
+
+            for i in range(5):
+                path = test_directory / "dir" / f"sub{i % 2}" / f"file{i}.txt"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"same content")
+            script = test_directory / "dir" / "run.sh"
+            script.write_bytes(b"#!/bin/sh\n")
+            script.chmod(0o755)
+            repository.add_index(["."])
+            repository.commit("Add files")
+
+            repository.checkout("main")
+            assert not (test_directory / "dir").exists()
+
+            with patch.object(repository.database, "get_blob") as get_blob_mock:
+                result = repository.checkout("feature")
+            assert result.success, result.error
+            get_blob_mock.assert_not_called()
+
+            for i in range(5):
+                path = test_directory / "dir" / f"sub{i % 2}" / f"file{i}.txt"
+                assert path.read_bytes() == b"same content"
+            assert script.read_bytes() == b"#!/bin/sh\n"
+            assert script.stat().st_mode & 0o777 == 0o755
+
+            status = repository.status().value
+            assert status is not None
+            assert status.unstaged.is_empty()
+            assert status.staged.is_empty()
+
     def test_checkout_on_delete_file(
         self,
         repository: Repository,
@@ -2107,7 +2472,7 @@ class TestRepositoryCheckout:
             assert not test_file_path.parent.exists()
 
             assert len(repository.database.list_index_entries()) == 0
-            assert len(repository.log()) == 2
+            assert len(list(repository.log())) == 2
 
     def test_checkout_on_delete_parent_directory(
         self,
@@ -2216,25 +2581,27 @@ class TestRepositoryCheckout:
         repository.init()
 
         with patch("os.getcwd", return_value=test_file_path.parent.as_posix()):
+            test_file_path.write_text("initial")
             repository.add_index([test_file_path.name])
             repository.commit("Initial commit")
 
-            _, temp_path = tempfile.mkstemp(dir=repository.worktree.root_dir)
-            uncommitted_file = Path(temp_path)
-            uncommitted_file.write_text("uncommitted changes")
-
-            # Create and checkout new branch
             new_branch_name = "new-branch"
             result = repository.create_branch(new_branch_name)
             assert result.success
+            repository.checkout(new_branch_name)
+            test_file_path.write_text("changed in new branch")
+            repository.add_index([test_file_path.name])
+            repository.commit("Change file")
+            repository.checkout("main")
 
-            status_result = repository.status()
+            test_file_path.write_text("uncommitted changes")
 
+            status_result = repository.status()
             assert status_result.success
             status = status_result.value
             assert status is not None
             assert status.branch_name == "main"
-            assert len(status.unstaged.added) == 1
+            assert len(status.unstaged.modified) == 1
 
             result = repository.checkout(new_branch_name)
             assert not result.success
@@ -2242,6 +2609,59 @@ class TestRepositoryCheckout:
                 result.error
                 == "You have uncommitted changes. Please commit or stash them before checkout."
             )
+            assert test_file_path.read_text() == "uncommitted changes"
+            assert repository.get_head_branch().ref_name == "refs/heads/main"
+
+    def test_checkout_keeps_changes_of_untouched_paths(
+        self,
+        repository: Repository,
+        test_directory: Path,
+    ):
+        """Only paths that differ between the branches are checked and updated."""
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "shared.txt").write_text("shared")
+            (test_directory / "branch.txt").write_text("main")
+            repository.add_index(["."])
+            repository.commit("Initial commit")
+
+            repository.create_branch("new-branch")
+            repository.checkout("new-branch")
+            (test_directory / "branch.txt").write_text("new branch")
+            repository.add_index(["."])
+            repository.commit("Change branch file")
+            repository.checkout("main")
+
+            (test_directory / "shared.txt").write_text("local change")
+            (test_directory / "untracked.txt").write_text("untracked")
+            (test_directory / "staged.txt").write_text("staged")
+            repository.add_index(["staged.txt"])
+
+            with patch.object(
+                repository.worktree, "walk", wraps=repository.worktree.walk
+            ) as walk_mock:
+                result = repository.checkout("new-branch")
+            assert result.success, result.error
+            assert [Path(call.args[0]).name for call in walk_mock.call_args_list] == [
+                "branch.txt"
+            ]
+
+            assert (test_directory / "branch.txt").read_text() == "new branch"
+            assert (test_directory / "shared.txt").read_text() == "local change"
+            assert (test_directory / "untracked.txt").read_text() == "untracked"
+
+            status = repository.status().value
+            assert status is not None
+            assert status.branch_name == "new-branch"
+            assert [e.path for e in status.staged.added] == ["./test_dir/staged.txt"]
+            assert [e.path for e in status.unstaged.modified] == [
+                "./test_dir/shared.txt"
+            ]
+            assert [e.path for e in status.unstaged.added] == [
+                "./test_dir/untracked.txt"
+            ]
+
 
 class TestFindMergeBase:
     
@@ -0,0 +1,171 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from database.database import Database
+from repository.repository import Repository
+from repository.tree_diff import TreeDiff
+
+
+def commit_files(repository: Repository, directory: Path, files: dict, message):
+    for name, content in files.items():
+        path = directory / name
+        if content is None:
+            path.unlink()
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    repository.add_index(["."])
+    commit = repository.commit(message)
+    assert commit is not None
+    return commit
+
+
+class TestTreeDiff:
+    def test_diff_skips_identical_subtrees(
+        self,
+        repository: Repository,
+        database: Database,
+        tree_diff: TreeDiff,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            first = commit_files(
+                repository,
+                test_directory,
+                {
+                    "same/a.txt": "a",
+                    "same/deep/b.txt": "b",
+                    "changed/c.txt": "c",
+                    "changed/d.txt": "d",
+                    "gone.txt": "gone",
+                },
+                "first",
+            )
+            second = commit_files(
+                repository,
+                test_directory,
+                {"changed/c.txt": "c2", "changed/d.txt": None, "new.txt": "new", "gone.txt": None},
+                "second",
+            )
+
+        with patch.object(
+            database, "get_child_tree_entries", wraps=database.get_child_tree_entries
+        ) as children_mock:
+            diff = tree_diff.diff(second.tree_id, first.tree_id)
+
+        assert [e.path for e in diff.added] == ["./test_dir/new.txt"]
+        assert [e.path for e in diff.modified] == ["./test_dir/changed/c.txt"]
+        assert sorted(e.path for e in diff.deleted) == [
+            "./test_dir/changed/d.txt",
+            "./test_dir/gone.txt",
+        ]
+        same_tree_id = next(
+            entry.entry_object_id
+            for entry in database.get_child_tree_entries(
+                next(
+                    entry.entry_object_id
+                    for entry in database.get_child_tree_entries(first.tree_id)
+                    if entry.entry_name == "test_dir"
+                )
+            )
+            if entry.entry_name == "same"
+        )
+        loaded = [call.args[0] for call in children_mock.call_args_list]
+        assert same_tree_id not in loaded
+        # root, test_dir and changed on each side
+        assert len(loaded) == 6
+
+    def test_diff_of_identical_trees_reads_nothing(
+        self,
+        repository: Repository,
+        database: Database,
+        tree_diff: TreeDiff,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            commit = commit_files(
+                repository, test_directory, {"dir/a.txt": "a"}, "first"
+            )
+
+        with patch.object(
+            database, "get_child_tree_entries", wraps=database.get_child_tree_entries
+        ) as children_mock:
+            diff = tree_diff.diff(commit.tree_id, commit.tree_id)
+
+        assert diff.is_empty()
+        children_mock.assert_not_called()
+
+    def test_diff_expands_path_changed_between_file_and_directory(
+        self,
+        repository: Repository,
+        tree_diff: TreeDiff,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            first = commit_files(
+                repository, test_directory, {"entry": "file"}, "first"
+            )
+            (test_directory / "entry").unlink()
+            second = commit_files(
+                repository,
+                test_directory,
+                {"entry/a.txt": "a", "entry/sub/b.txt": "b"},
+                "second",
+            )
+
+        diff = tree_diff.diff(second.tree_id, first.tree_id)
+
+        assert sorted(e.path for e in diff.added) == [
+            "./test_dir/entry/a.txt",
+            "./test_dir/entry/sub/b.txt",
+        ]
+        assert [e.path for e in diff.deleted] == ["./test_dir/entry"]
+        assert diff.modified == []
+
+    def test_diff_against_empty_tree(
+        self,
+        repository: Repository,
+        tree_diff: TreeDiff,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            commit = commit_files(
+                repository, test_directory, {"a.txt": "a", "dir/b.txt": "b"}, "first"
+            )
+
+        diff = tree_diff.diff(commit.tree_id, "")
+        assert sorted(e.path for e in diff.added) == [
+            "./test_dir/a.txt",
+            "./test_dir/dir/b.txt",
+        ]
+        assert tree_diff.diff("", commit.tree_id).deleted == diff.added
+
+    def test_diff_commits_resolves_branches_and_commit_ids(
+        self,
+        repository: Repository,
+        test_directory: Path,
+    ):
+        repository.init()
+
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            first = commit_files(repository, test_directory, {"a.txt": "a"}, "first")
+            repository.create_branch("feature")
+            commit_files(repository, test_directory, {"a.txt": "b"}, "second")
+
+        result = repository.diff_commits(first.object_id, "main")
+        assert result.success
+        assert result.value is not None
+        assert [e.path for e in result.value.modified] == ["./test_dir/a.txt"]
+
+        result = repository.diff_commits("feature", first.object_id)
+        assert result.value is not None and result.value.is_empty()
+
+        assert repository.diff_commits("missing", "main").failed
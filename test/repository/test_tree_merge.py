@@ -0,0 +1,199 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from database.database import Database
+from database.entity.index_entry import IndexEntry
+from repository.repository import Repository
+from repository.tree_merge import TreeMerge
+
+
+def commit_tree(
+    repository: Repository, database: Database, files: dict[str, str]
+) -> str:
+    """Replace the index with `files` and commit it, returning the tree id"""
+    if entries := database.list_index_entries():
+        database.delete_index_entries(entries)
+    database.create_index_entries(
+        [IndexEntry(path, object_id, "100644") for path, object_id in files.items()]
+    )
+    commit = repository.commit(f"tree of {len(files)} files")
+    assert commit is not None
+    return commit.tree_id
+
+
+def tree_files(repository: Repository, tree_id: str) -> dict[str, str]:
+    tree = repository.tree_store.build_commit_tree(tree_id)
+    return {entry.path: entry.object_id for entry in tree.list_index_entries()}
+
+
+class TestTreeMerge:
+    def test_takes_subtrees_changed_on_one_side(
+        self, repository: Repository, database: Database, tree_merge: TreeMerge
+    ):
+        repository.init()
+        base_files = {
+            "./a/1.txt": "a1",
+            "./b/1.txt": "b1",
+            "./c/1.txt": "c1",
+            "./c/2.txt": "c2",
+        }
+        base = commit_tree(repository, database, base_files)
+        ours_files = base_files | {"./a/1.txt": "a1-ours", "./c/1.txt": "c1-ours"}
+        ours = commit_tree(repository, database, ours_files)
+        theirs_files = base_files | {"./b/1.txt": "b1-theirs", "./c/2.txt": "c2-theirs"}
+        theirs = commit_tree(
+            repository,
+            database,
+            {p: o for p, o in theirs_files.items() if p != "./a/1.txt"}
+            | {"./a/new.txt": "new"},
+        )
+
+        # ./a/1.txt modified by us, deleted by them
+        assert tree_merge.merge(base, ours, theirs).conflicts == ["./a/1.txt"]
+
+        theirs = commit_tree(repository, database, theirs_files)
+        with patch.object(
+            database, "get_child_tree_entries", wraps=database.get_child_tree_entries
+        ) as children_mock:
+            result = tree_merge.merge(base, ours, theirs)
+
+        assert result.conflicts == []
+        # the root and ./c of all three trees; ./a and ./b are taken whole
+        assert children_mock.call_count == 6
+        repository.tree_store.save_commit_tree(result.tree_entries)
+        assert tree_files(repository, result.tree_id) == {
+            "./a/1.txt": "a1-ours",
+            "./b/1.txt": "b1-theirs",
+            "./c/1.txt": "c1-ours",
+            "./c/2.txt": "c2-theirs",
+        }
+
+    def test_deletions_and_identical_changes(
+        self, repository: Repository, database: Database, tree_merge: TreeMerge
+    ):
+        repository.init()
+        base_files = {"./a/1.txt": "a1", "./b.txt": "b", "./c.txt": "c"}
+        base = commit_tree(repository, database, base_files)
+        ours = commit_tree(repository, database, {"./b.txt": "b2", "./c.txt": "c"})
+        theirs = commit_tree(
+            repository, database, {"./a/1.txt": "a1", "./b.txt": "b2", "./d.txt": "d"}
+        )
+
+        result = tree_merge.merge(base, ours, theirs)
+
+        assert result.conflicts == []
+        repository.tree_store.save_commit_tree(result.tree_entries)
+        assert tree_files(repository, result.tree_id) == {
+            "./b.txt": "b2",
+            "./d.txt": "d",
+        }
+
+
+class TestMerge:
+    def test_fast_forward_and_three_way_merge(
+        self, repository: Repository, test_directory: Path
+    ):
+        repository.init()
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "a.txt").write_text("a")
+            (test_directory / "b.txt").write_text("b")
+            repository.add_index(["."])
+            base = repository.commit("base")
+            assert base is not None
+            repository.create_branch("feature")
+
+            assert repository.checkout("feature").success
+            (test_directory / "b.txt").write_text("b feature")
+            repository.add_index(["."])
+            feature = repository.commit("feature")
+            assert feature is not None
+
+            assert repository.checkout("main").success
+            result = repository.merge("feature")
+            assert result.success and result.value is not None
+            assert result.value.kind == "fast-forward"
+            assert (test_directory / "b.txt").read_text() == "b feature"
+            assert repository.get_head_branch().target_object_id == feature.object_id
+
+            assert repository.merge("feature").value.kind == "up-to-date"
+
+            (test_directory / "a.txt").write_text("a main")
+            repository.add_index(["."])
+            assert repository.commit("main") is not None
+            assert repository.checkout("feature").success
+            (test_directory / "c.txt").write_text("c")
+            repository.add_index(["."])
+            assert repository.commit("feature 2") is not None
+            assert repository.checkout("main").success
+
+            result = repository.merge("feature")
+            assert result.success and result.value is not None
+            merge_commit = result.value.commit
+            status = repository.status().value
+
+        assert result.value.kind == "merge"
+        assert merge_commit.message == "Merge branch 'feature'"
+        parents = repository.commit_store.get_commit_parents(merge_commit.object_id)
+        assert len(parents) == 2
+        assert (test_directory / "a.txt").read_text() == "a main"
+        assert (test_directory / "c.txt").read_text() == "c"
+        assert status is not None
+        assert status.staged.is_empty() and status.unstaged.is_empty()
+
+    def test_refused_merge_stores_no_tree(
+        self, repository: Repository, database: Database, test_directory: Path
+    ):
+        repository.init()
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "a.txt").write_text("a")
+            repository.add_index(["."])
+            assert repository.commit("base") is not None
+            repository.create_branch("feature")
+            (test_directory / "a.txt").write_text("a main")
+            repository.add_index(["."])
+            main = repository.commit("main")
+            assert main is not None
+            assert repository.checkout("feature").success
+            (test_directory / "c.txt").write_text("c")
+            repository.add_index(["."])
+            assert repository.commit("feature") is not None
+            assert repository.checkout("main").success
+            (test_directory / "c.txt").write_text("c untracked")
+            tree_rows = database.sqlite.select("SELECT COUNT(*) AS count FROM tree_entry")
+
+            result = repository.merge("feature")
+
+        assert result.failed
+        assert result.error is not None and "uncommitted changes" in result.error
+        assert (
+            database.sqlite.select("SELECT COUNT(*) AS count FROM tree_entry")
+            == tree_rows
+        )
+        assert repository.get_head_branch().target_object_id == main.object_id
+        assert (test_directory / "c.txt").read_text() == "c untracked"
+
+    def test_merge_conflict_leaves_head_unchanged(
+        self, repository: Repository, test_directory: Path
+    ):
+        repository.init()
+        with patch("os.getcwd", return_value=test_directory.as_posix()):
+            (test_directory / "a.txt").write_text("a")
+            repository.add_index(["."])
+            assert repository.commit("base") is not None
+            repository.create_branch("feature")
+            (test_directory / "a.txt").write_text("a main")
+            repository.add_index(["."])
+            main = repository.commit("main")
+            assert main is not None
+            assert repository.checkout("feature").success
+            (test_directory / "a.txt").write_text("a feature")
+            repository.add_index(["."])
+            assert repository.commit("feature") is not None
+            assert repository.checkout("main").success
+
+            result = repository.merge("feature")
+
+        assert result.failed
+        assert result.error == "Merge conflict in ./test_dir/a.txt"
+        assert repository.get_head_branch().target_object_id == main.object_id
+        assert (test_directory / "a.txt").read_text() == "a main"
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from database.database import Database
 
 from database.entity.tree_entry import TreeEntry
@@ -326,6 +328,43 @@ class TestTreeStoreBuildCommitTree:
         )
 
 
+    def test_build_commit_tree_with_single_query(
+        self, tree_store: TreeStore, repository: Repository, database: Database
+    ):
+        """The whole tree is loaded without per-directory child queries."""
+        repository.init()
+        database.sqlite.insert_many(
+            [
+                TreeEntry(".", "040000", "tree", "root", None),
+                TreeEntry("a", "040000", "tree", "tree_a", "root"),
+                TreeEntry("b", "040000", "tree", "tree_a", "root"),
+                TreeEntry("c", "040000", "tree", "tree_c", "tree_a"),
+                TreeEntry("file.txt", "100644", "blob", "blob_1", "tree_c"),
+                TreeEntry("file.txt", "100644", "blob", "blob_2", "root"),
+            ]
+        )
+
+        with patch.object(
+            database, "get_child_tree_entries", side_effect=AssertionError
+        ):
+            result = tree_store.build_commit_tree("root")
+
+        assert result.entry_count == 8
+        assert sorted(path for path, _ in result.index) == [
+            ".",
+            "./a",
+            "./a/c",
+            "./a/c/file.txt",
+            "./b",
+            "./b/c",
+            "./b/c/file.txt",
+            "./file.txt",
+        ]
+        assert result.get_entry("./b/c/file.txt").entry_object_id == "blob_1"
+        assert result.get_entry("./b/c").parent is result.get_entry("./b")
+        assert len(result.root_entry.children) == 3
+
+
 class TestTreeStoreSaveCommitTree:
     def test_save_commit_tree(
         self, tree_store: TreeStore, repository: Repository, database: Database
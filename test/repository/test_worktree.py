@@ -4,6 +4,7 @@ Test suite for Worktree class.
 Tests all Worktree methods including find_paths.
 """
 
+import os
 from pathlib import Path
 import tempfile
 from unittest.mock import patch
@@ -210,6 +211,33 @@ class TestWorktreeFindPaths:
             result = worktree.match("../")
             assert len(result) == 2
 
+    def test_walk_returns_relative_paths_and_prunes_repo_dir(
+        self,
+        repository: Repository,
+        worktree: Worktree,
+        test_repo_directory: Path,
+    ):
+        repository.init()
+
+        (test_repo_directory / "b.txt").write_bytes(b"b")
+        (test_repo_directory / "a").mkdir()
+        (test_repo_directory / "a" / "c.txt").write_bytes(b"cc")
+
+        with patch("os.getcwd", return_value=test_repo_directory.as_posix()):
+            with patch("os.scandir", wraps=os.scandir) as scandir_mock:
+                files = list(worktree.walk("."))
+
+            assert [file.path for file in files] == ["./b.txt", "./a/c.txt"]
+            assert files[1].absolute_path == test_repo_directory / "a" / "c.txt"
+            assert files[1].stat.st_size == 2
+
+            repo_dir = repository.path.repo_dir
+            assert repo_dir is not None and repo_dir.exists()
+            scanned = [call.args[0] for call in scandir_mock.call_args_list]
+            assert os.fspath(repo_dir) not in scanned
+
+            assert [file.path for file in worktree.walk("a")] == ["./a/c.txt"]
+
     def test_write(
         self,
         repository: Repository,
@@ -1,6 +1,6 @@
 from datetime import datetime
 from src.database.entity.blob import Blob
-from src.util.array import unique
+from src.util.array import chunked, unique
 
 
 def test_array_unique():
@@ -31,3 +31,8 @@ def test_array_unique():
     empty_list = []
 
     assert len(list(unique(empty_list))) == 0
+
+
+def test_array_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
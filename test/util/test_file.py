@@ -0,0 +1,47 @@
+import io
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import zstandard
+
+from src.repository.compress_file import CompressFile
+from src.repository.hash_file import HashFile
+from src.util.file import read_chunks
+
+
+def test_read_chunks_reuses_one_buffer(test_directory: Path):
+    path = test_directory / "data.bin"
+    content = os.urandom(10_000)
+    path.write_bytes(content)
+
+    chunks = []
+    buffers = set()
+    for chunk in read_chunks(path, chunk_size=4096):
+        chunks.append(bytes(chunk))
+        buffers.add(id(chunk.obj))
+
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 1808]
+    assert b"".join(chunks) == content
+    assert len(buffers) == 1
+
+
+def test_streams_match_the_in_memory_path(test_directory: Path):
+    path = test_directory / "data.bin"
+    content = os.urandom(300_000) + bytes(300_000)
+    path.write_bytes(content)
+    hash_file = HashFile()
+    compress_file = CompressFile(
+        zstandard.ZstdCompressor(), zstandard.ZstdDecompressor()
+    )
+
+    assert hash_file.hash_stream(path) == hash_file.hash_buffer(content)
+    with patch("src.repository.hash_file.FILE_SIZE_MEDIUM", 1024):
+        assert hash_file.hash(path) == hash_file.hash_buffer(content)
+
+    chunks = list(compress_file.compress_stream(path, chunk_size=64 * 1024))
+    assert all(len(chunk) == 64 * 1024 for chunk in chunks[:-1])
+    assert len(chunks[-1]) <= 64 * 1024
+    output = io.BytesIO()
+    compress_file.decompress_to(chunks, output)
+    assert output.getvalue() == content
@@ -0,0 +1,58 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.util.worker_pool import WorkerPool
+
+
+def test_worker_pool_keeps_input_order():
+    def slow_for_small(n: int) -> int:
+        time.sleep(0.001 * (10 - n))
+        return n * n
+
+    pool = WorkerPool(4)
+    assert list(pool.imap(slow_for_small, range(10))) == [n * n for n in range(10)]
+
+
+def test_worker_pool_runs_inline_with_one_worker():
+    pool = WorkerPool(1)
+    threads = list(pool.imap(lambda _: threading.current_thread(), range(3)))
+    assert threads == [threading.main_thread()] * 3
+
+
+def test_worker_pool_bounds_pending_items():
+    consumed = []
+
+    def items():
+        for n in range(100):
+            consumed.append(n)
+            yield n
+
+    pool = WorkerPool(2, max_pending=3)
+    results = pool.imap(lambda n: n, items())
+    assert next(results) == 0
+    assert len(consumed) <= 3
+    results.close()
+
+
+def test_worker_pool_propagates_errors():
+    def fail_on_three(n: int) -> int:
+        if n == 3:
+            raise ValueError("three")
+        return n
+
+    with pytest.raises(ValueError, match="three"):
+        list(WorkerPool(2).imap(fail_on_three, range(10)))
+
+
+def test_worker_pool_from_env():
+    with patch.dict("os.environ", {"GITOY_WORKERS": "3"}):
+        assert WorkerPool.from_env().workers == 3
+    with patch.dict("os.environ", {"GITOY_WORKERS": "0"}):
+        assert WorkerPool.from_env().workers == 1
+    with patch("os.cpu_count", return_value=5):
+        for invalid in ("", "four", "2.5"):
+            with patch.dict("os.environ", {"GITOY_WORKERS": invalid}):
+                assert WorkerPool.from_env().workers == 5